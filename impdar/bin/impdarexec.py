@@ -38,6 +38,12 @@ def _get_args():
     parser_load.add_argument('-o', type=str, help='Write to this filename')
     parser_load.add_argument('--nans', type=str, choices=['interp', 'delete'], default=None,
                              help='Interpolate or delete bad GPS. Only used by BSI.')
+    parser_load.add_argument('-j', '--jobs',
+                             type=int,
+                             default=1,
+                             dest='workers',
+                             help='Load this many files at once in separate \
+                                     processes (ignored for gecko and osu)')
     parser_load.add_argument('-dname',
                              type=str,
                              help='Name of data field',
@@ -112,6 +118,18 @@ def _get_args():
     parser_proc.add_argument('-migrate',
                              type=str,
                              help='Migrate with the indicated routine.')
+    parser_proc.add_argument('--jobs',
+                             type=int,
+                             default=1,
+                             help='Process this many files at once in \
+                                     separate processes (ignored with -cat)')
+    parser_proc.add_argument('-blocksize',
+                             type=int,
+                             default=None,
+                             help='Stream the data through blocks of this many \
+                                     traces, from the input to an h5 output, so \
+                                     that only one block is in memory at a time \
+                                     (ignored with -cat)')
     parser_proc.add_argument('fn',
                              type=str,
                              nargs='+',
@@ -8,8 +8,10 @@
 
 """An executable to start the picker."""
 
+import os.path
 import sys
 import argparse
+import numpy as np
 from PyQt5 import QtWidgets
 
 from matplotlib import rc
@@ -40,12 +42,30 @@ def pick(radardata, xd=False, yd=False):
     sys.exit(app.exec_())
 
 
+def auto_pick(radardata, seeds, jobs=1):
+    """Track reflectors from each seed, without the gui."""
+    if not hasattr(radardata, 'picks') or radardata.picks is None:
+        radardata.picks = Picks.Picks(radardata)
+    radardata.picks.auto_pick_all(seeds, workers=jobs)
+
+
 def main():
     """Get arguments, start picking."""
     parser = _get_args()
     args = parser.parse_args(sys.argv[1:])
     radardata = load.load('mat', [args.fn])[0]
-    pick(radardata, xd=args.xd, yd=args.yd)
+    if args.seeds is not None:
+        # one snum, tnum pair per line
+        seeds = np.loadtxt(args.seeds, delimiter=',' if args.seeds.endswith('.csv') else None,
+                           ndmin=2)
+        auto_pick(radardata, seeds, jobs=args.jobs)
+        if args.o is not None:
+            out_fn = args.o
+        else:
+            out_fn = os.path.splitext(args.fn)[0] + '_pick.mat'
+        radardata.save(out_fn)
+    else:
+        pick(radardata, xd=args.xd, yd=args.yd)
 
 
 def _get_args():
@@ -56,6 +76,20 @@ def _get_args():
                         help='The file to pick. One file at a time.')
     parser.add_argument('-xd', action='store_true', help='Distance on the x')
     parser.add_argument('-yd', action='store_true', help='Depth on the y')
+    parser.add_argument('--seeds',
+                        type=str,
+                        help='Instead of opening the picker, track a reflector \
+                            from each snum, tnum pair in this text file, \
+                            then save')
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=1,
+                        help='With --seeds, track this many reflectors at once \
+                            in separate processes (default 1)')
+    parser.add_argument('-o',
+                        type=str,
+                        help='With --seeds, output to this file \
+                            (default is the input with _pick appended)')
     return parser
 
 
@@ -18,8 +18,10 @@ import os.path
 import argparse
 
 from impdar.lib.load import load, FILETYPE_OPTIONS
-from impdar.lib.process import concat
+from impdar.lib.process import concat, run_parallel
+from impdar.lib.ImpdarError import ImpdarError
 from impdar.lib.gpslib import interp as interpdeep
+from impdar.lib.recipe import load_recipe, apply_recipe
 
 
 def _get_args():
@@ -301,7 +303,7 @@ def _get_args():
     parser_mig.add_argument('--mtype',
                             type=str,
                             default='phsh',
-                            choices=['stolt', 'kirch', 'phsh', 'tk',
+                            choices=['stolt', 'kirch', 'kirchtab', 'phsh', 'tk',
                                      'sumigtk', 'sustolt', 'sumigffd'],
                             help='Migration routines.')
     parser_mig.add_argument('--vel',
@@ -340,8 +342,37 @@ def _get_args():
                             type=int,
                             default=1,
                             help='Print output from SeisUnix migration')
+    parser_mig.add_argument('--aperture',
+                            type=float,
+                            default=None,
+                            help='Maximum horizontal distance (m) summed in \
+                                    Kirchhoff migration. Default unlimited.')
+    parser_mig.add_argument('--max_angle',
+                            type=float,
+                            default=None,
+                            help='Maximum angle (degrees) from vertical \
+                                    summed in Kirchhoff migration. \
+                                    Default unlimited.')
+    parser_mig.add_argument('--n_threads',
+                            type=int,
+                            default=None,
+                            help='Number of threads for compiled Kirchhoff \
+                                    (default all available) or phase-shift \
+                                    (default one) migration.')
     _add_def_args(parser_mig)
 
+    # Recipe of several steps
+    parser_recipe = _add_procparser(subparsers,
+                                    'recipe',
+                                    'Apply the steps in a recipe (json or yaml) file \
+                                        with a single load and save',
+                                    recipe,
+                                    defname='proc')
+    parser_recipe.add_argument('recipe_fn',
+                               type=str,
+                               help='The recipe file')
+    _add_def_args(parser_recipe)
+
     return parser
 
 
@@ -373,6 +404,11 @@ def _add_def_args(parser):
                         default='mat',
                         help='Type of file to load (default ImpDAR mat)',
                         choices=FILETYPE_OPTIONS)
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=1,
+                        help='Process this many files at once in separate \
+                            processes (default 1)')
 
 
 def main():
@@ -382,6 +418,15 @@ def main():
     if not hasattr(args, 'func'):
         parser.parse_args(['-h'])
 
+    if args.jobs > 1 and args.name != 'cat':
+        if (len(args.fns) > 1) and (args.o is not None) and (not os.path.isdir(args.o)):
+            raise FileNotFoundError('The output directory does not exist')
+        failed = run_parallel(_process_file, args.fns, args.jobs, args)
+        if len(failed) > 0:
+            raise ImpdarError('Failed to process {:d} of {:d} files: {:s}'.format(
+                len(failed), len(args.fns), ', '.join(failed)))
+        return
+
     radar_data = load(args.ftype, args.fns)
 
     if args.name == 'cat':
@@ -394,9 +439,25 @@ def main():
         for dat in radar_data:
             args.func(dat, **vars(args))
 
+    _save(radar_data, args.fns, args)
+
+
+def _process_file(fn, args):
+    """Load, process, and save one file, for use with --jobs."""
+    radar_data = load(args.ftype, [fn])
+    if args.name == 'interp':
+        interp(radar_data, **vars(args))
+    else:
+        for dat in radar_data:
+            args.func(dat, **vars(args))
+    _save(radar_data, [fn], args)
+
+
+def _save(radar_data, fns, args):
+    """Save with names based on the input files and the processing step."""
     if args.o is not None:
-        if ((len(radar_data) > 1) or (args.o[-1] == '/')):
-            for d, f in zip(radar_data, args.fns):
+        if ((len(radar_data) > 1) or (args.o[-1] == '/') or os.path.isdir(args.o)):
+            for d, f in zip(radar_data, fns):
                 bn = os.path.split(os.path.splitext(f)[0])[1]
                 if bn[-4:] == '_raw':
                     bn = bn[:-4]
@@ -407,7 +468,7 @@ def main():
             out_fn = args.o
             radar_data[0].save(out_fn)
     else:
-        for d, f in zip(radar_data, args.fns):
+        for d, f in zip(radar_data, fns):
             bn = os.path.splitext(f)[0]
             if bn[-4:] == '_raw':
                 bn = bn[:-4]
@@ -506,7 +567,8 @@ def denoise(dat, vert_win=1, hor_win=10, noise=None, filt='wiener', **kwargs):
 
 
 def mig(dat, mtype='stolt', vel=1.69e8, vtaper=100, htaper=100, tmig=0,
-        verbose=0, vel_fn=None, nxpad=1, nearfield=False, **kwargs):
+        verbose=0, vel_fn=None, nxpad=1, nearfield=False, n_threads=None,
+        aperture=None, max_angle=None, **kwargs):
     """Migrate data."""
     dat.migrate(mtype,
                 vel=vel,
@@ -516,7 +578,22 @@ def mig(dat, mtype='stolt', vel=1.69e8, vtaper=100, htaper=100, tmig=0,
                 verbose=verbose,
                 vel_fn=vel_fn,
                 nxpad=nxpad,
-                nearfield=nearfield)
+                nearfield=nearfield,
+                n_threads=n_threads,
+                aperture=aperture,
+                max_angle=max_angle)
+
+
+def recipe(dat, recipe_fn=None, o=None, **kwargs):
+    """Apply the steps from a recipe file."""
+    if (o is not None) and os.path.isdir(o):
+        out_bn = os.path.split(os.path.splitext(dat.fn)[0])[1]
+        if out_bn[-4:] == '_raw':
+            out_bn = out_bn[:-4]
+        out_bn = os.path.join(o, out_bn)
+    else:
+        out_bn = None
+    apply_recipe(dat, load_recipe(recipe_fn), out_bn=out_bn)
 
 
 if __name__ == '__main__':
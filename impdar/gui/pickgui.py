@@ -7,6 +7,8 @@
 # Distributed under terms of the GNU GPL3.0 license.
 """The picking gui classes (i.e. the different windows that can pop up)."""
 
+import os
+
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import colors
@@ -235,7 +237,10 @@ class InteractivePicker(QtWidgets.QMainWindow, RawPickGUI.Ui_MainWindow):
         # Do not use picks that already exist
         if self.dat.picks is not None and self.dat.picks.picknums is not None:
             if val not in self.dat.picks.picknums:
-                self.dat.picks.picknums[self._pick_ind] = val
+                # Assign a new list so that the picks re-index their numbers
+                picknums = list(self.dat.picks.picknums)
+                picknums[self._pick_ind] = val
+                self.dat.picks.picknums = picknums
             elif self.dat.picks.picknums[self._pick_ind] == val:
                 pass
             else:
@@ -392,40 +397,20 @@ class InteractivePicker(QtWidgets.QMainWindow, RawPickGUI.Ui_MainWindow):
             3-letter string of one-letter colors
         """
 
-        auto_picks = picklib.auto_pick(self.dat,self.autopick_indices[:,0].astype(int),self.autopick_indices[:,1].astype(int))
+        # Layers are independent, so track them in parallel when we have several
+        seeds = self.autopick_indices.astype(int)
         self.autopick_indices = None
-
-        if self.dat.picks.samp1 is None:
-            self.dat.picks.samp1 = auto_picks[:,0]
-            self.dat.picks.samp2 = auto_picks[:,1]
-            self.dat.picks.samp3 = auto_picks[:,2]
-            self.dat.picks.time = auto_picks[:,3]
-            self.dat.picks.power = auto_picks[:,4]
-            self.dat.picks.picknums = np.arange(self.pickNumberBox.value(),self.pickNumberBox.value()+len(self.dat.picks.samp1))
-            self.cline = [None for i in range(auto_picks.shape[0])]
-            self.bline = [None for i in range(auto_picks.shape[0])]
-            self.tline = [None for i in range(auto_picks.shape[0])]
-
-            self.dat.picks.lasttrace.tnum = self.dat.tnum*np.ones(len(self.dat.picks.samp1)).astype(int)
-            self.dat.picks.lasttrace.snum = auto_picks[:,0,-1].astype(int)
-
-        else:
-            self.dat.picks.samp1 = np.append(self.dat.picks.samp1,auto_picks[:,0],axis=0)
-            self.dat.picks.samp2 = np.append(self.dat.picks.samp2,auto_picks[:,1],axis=0)
-            self.dat.picks.samp3 = np.append(self.dat.picks.samp3,auto_picks[:,2],axis=0)
-            self.dat.picks.time = np.append(self.dat.picks.samp3,auto_picks[:,3],axis=0)
-            self.dat.picks.power = np.append(self.dat.picks.samp3,auto_picks[:,4],axis=0)
-            self.dat.picks.picknums = np.append(self.dat.picks.picknums,
-                    np.arange(self.pickNumberBox.value(),self.pickNumberBox.value()+len(auto_picks)))
-            for i in range(auto_picks.shape[0]):
-                self.cline.append(None)
-                self.bline.append(None)
-                self.tline.append(None)
-
-            self.dat.picks.lasttrace.tnum = np.append(self.dat.picks.lasttrace.tnum,self.dat.tnum*np.ones(auto_picks.shape[0]).astype(int))
-            self.dat.picks.lasttrace.snum = np.append(self.dat.picks.lasttrace.snum,auto_picks[:,0,-1].astype(int))
-
-        for i in range(self.dat.picks.samp1.shape[0]-len(auto_picks),self.dat.picks.samp1.shape[0]):
+        first = self.pickNumberBox.value()
+        self.dat.picks.auto_pick_all(seeds,
+                                     workers=min(len(seeds), os.cpu_count() or 1),
+                                     picknums=range(first, first + len(seeds)))
+        n_new = len(seeds)
+        for i in range(n_new):
+            self.cline.append(None)
+            self.bline.append(None)
+            self.tline.append(None)
+
+        for i in range(self.dat.picks.samp1.shape[0] - n_new, self.dat.picks.samp1.shape[0]):
             colors = 'byy'
             self.current_pick = np.vstack((self.dat.picks.samp1[i, :],
                                            self.dat.picks.samp2[i, :],
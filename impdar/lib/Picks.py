@@ -7,6 +7,8 @@
 # Distributed under terms of the GNU GPL3.0 license.
 
 """The Picks structure tracks picks and picking parameters."""
+import warnings
+
 import numpy as np
 from scipy.signal import filtfilt, butter
 
@@ -14,6 +16,7 @@ from .ImpdarError import ImpdarError
 from .LastTrace import LastTrace
 from .LeaderTrailer import LeaderTrailer
 from .PickParameters import PickParameters
+from .picklib import auto_pick
 
 
 class Picks():
@@ -51,6 +54,7 @@ class Picks():
     attrs = ['samp1', 'samp2', 'samp3', 'time', 'power', 'picknums']
     flatten = [False, False, False, False, False, True]
     spec_attrs = ['lasttrace', 'lt', 'pickparams']
+    matrix_attrs = ['samp1', 'samp2', 'samp3', 'time', 'power']
 
     def __str__(self):
         try:
@@ -108,6 +112,12 @@ class Picks():
         self.radardata = radardata
         self.lines = []
 
+        # The pick matrices live in one buffer with room to grow, see _add_rows
+        self._buffer = None
+        self._buffer_views = None
+        self._picknum_rows = {}
+        self._indexed_picknums = (None, 0)
+
     def add_pick(self, picknum=0):
         """Add a new pick.
 
@@ -130,18 +140,13 @@ class Picks():
         ValueError if the picknum already exists--we do not deal with repeats
 
         """
+        # If loading from matlab, need to cast picknums as a list
+        if type(self.picknums) == np.ndarray:
+            self.picknums = self.picknums.flatten().tolist()
+
         if self.samp1 is None:
             # We have no matrices yet
-            self.samp1 = np.zeros((1, self.radardata.tnum))
-            self.samp2 = np.zeros((1, self.radardata.tnum))
-            self.samp3 = np.zeros((1, self.radardata.tnum))
-            self.time = np.zeros((1, self.radardata.tnum))
-            self.power = np.zeros((1, self.radardata.tnum))
-            self.samp1[0, :] = np.nan
-            self.samp2[0, :] = np.nan
-            self.samp3[0, :] = np.nan
-            self.time[0, :] = np.nan
-            self.power[0, :] = np.nan
+            self._add_rows(1)
             self.picknums = [picknum]
             self.lasttrace.add_pick(-9999, 0)
         elif np.all(np.isnan(self.samp1[-1, :])):
@@ -152,32 +157,17 @@ class Picks():
             self.time[-1, :] = np.nan
             self.power[-1, :] = np.nan
             self.picknums[-1] = picknum
+            self._index_pick(picknum, len(self.picknums) - 1)
         else:
-            # If loading from matlab, need to cast picknums as a list
-            if type(self.picknums) == np.ndarray:
-                self.picknums = self.picknums.flatten().tolist()
-            if picknum in self.picknums:
+            if self._pick_row(picknum) is not None:
                 raise ValueError('We already have that pick')
 
             # We are just adding a row to the existing matrices of samples etc.
-            self.samp1 = np.vstack((self.samp1,
-                                    np.zeros((1, self.radardata.tnum))))
-            self.samp2 = np.vstack((self.samp2,
-                                    np.zeros((1, self.radardata.tnum))))
-            self.samp3 = np.vstack((self.samp3,
-                                    np.zeros((1, self.radardata.tnum))))
-            self.time = np.vstack((self.time,
-                                   np.zeros((1, self.radardata.tnum))))
-            self.power = np.vstack((self.power,
-                                    np.zeros((1, self.radardata.tnum))))
-            self.samp1[-1, :] = np.nan
-            self.samp2[-1, :] = np.nan
-            self.samp3[-1, :] = np.nan
-            self.time[-1, :] = np.nan
-            self.power[-1, :] = np.nan
+            self._add_rows(1)
             self.lasttrace.add_pick(-9999, 0)
 
             self.picknums.append(picknum)
+            self._index_pick(picknum, len(self.picknums) - 1)
         return self.samp1.shape[0]
 
     def update_pick(self, picknum, pick_info):
@@ -202,9 +192,8 @@ class Picks():
         pick_info is bad.
 
         """
-        try:
-            ind = self.picknums.index(picknum)
-        except ValueError:
+        ind = self._pick_row(picknum)
+        if ind is None:
             raise ValueError('picknum provided is not a pick; you must you \
                              use a picknum not an index')
 
@@ -217,6 +206,133 @@ class Picks():
         self.time[ind, :] = pick_info[3, :]
         self.power[ind, :] = pick_info[4, :]
 
+    def auto_pick_all(self, seeds, workers=None, picknums=None):
+        """Track reflectors from seed points, adding a new pick for each.
+
+        Each reflector is followed from its seed out to both ends of the
+        profile (see `impdar.lib.picklib.auto_pick`). The reflectors are
+        independent, so with many seeds it helps to track them in several
+        processes at once.
+
+        Parameters
+        ----------
+        seeds: array_like
+            (number of picks) x 2. The sample and trace index of each seed.
+        workers: int, optional
+            Track the reflectors in this many processes. Default is to track
+            them one after another in this process.
+        picknums: list of ints, optional
+            Numbers for the new picks. Default counts up from the largest
+            existing pick number.
+
+        Returns
+        -------
+        picknums: list of ints
+            The numbers of the new picks
+
+        Raises
+        ------
+        ValueError if any of picknums already exist, or there is not one per seed.
+        """
+        seeds = np.reshape(seeds, (-1, 2))
+        if type(self.picknums) == np.ndarray:
+            self.picknums = self.picknums.flatten().tolist()
+        existing = [] if self.picknums is None else self.picknums
+
+        if picknums is None:
+            first = max(existing) + 1 if len(existing) > 0 else 1
+            picknums = list(range(first, first + seeds.shape[0]))
+        picknums = [int(picknum) for picknum in picknums]
+        if len(picknums) != seeds.shape[0]:
+            raise ValueError('Need one picknum per seed')
+        if len(set(picknums)) != len(picknums) or any(
+                self._pick_row(picknum) is not None for picknum in picknums):
+            raise ValueError('We already have that pick')
+
+        new_picks = auto_pick(self.radardata, seeds[:, 0], seeds[:, 1], workers=workers)
+
+        first_row = self._add_rows(len(picknums))
+        for i, attr in enumerate(self.matrix_attrs):
+            getattr(self, attr)[first_row:, :] = new_picks[:, i, :]
+        self.picknums = existing + picknums
+        for pick in new_picks:
+            self.lasttrace.add_pick(int(pick[0, -1]), self.radardata.tnum)
+        return picknums
+
+    def _add_rows(self, n_rows):
+        """Add rows of NaNs to the end of the pick matrices.
+
+        The matrices are views of one (capacity, 5, tnum) buffer, which doubles
+        in size when it is full, so adding one pick at a time does not copy all
+        the others each time. If the matrices have been replaced since we last
+        made the views (e.g. by cropping), they are copied into a new buffer.
+
+        Parameters
+        ----------
+        n_rows: int
+            The number of rows to add
+
+        Returns
+        -------
+        int
+            The index of the first new row
+        """
+        n_old = 0 if self.samp1 is None else self.samp1.shape[0]
+        n_new = n_old + n_rows
+        if self._buffer_views is None or any(
+                getattr(self, attr) is not view for attr, view in zip(self.matrix_attrs, self._buffer_views)):
+            tnum = self.radardata.tnum if self.samp1 is None else self.samp1.shape[1]
+            buffer = np.empty((2 * n_new, len(self.matrix_attrs), tnum))
+            for i, attr in enumerate(self.matrix_attrs):
+                buffer[:n_old, i, :] = np.nan if getattr(self, attr) is None else getattr(self, attr)
+            self._buffer = buffer
+        elif n_new > self._buffer.shape[0]:
+            buffer = np.empty((max(2 * self._buffer.shape[0], n_new), ) + self._buffer.shape[1:])
+            buffer[:n_old] = self._buffer[:n_old]
+            self._buffer = buffer
+        self._buffer[n_old:n_new] = np.nan
+
+        self._buffer_views = [self._buffer[:n_new, i, :] for i in range(len(self.matrix_attrs))]
+        for attr, view in zip(self.matrix_attrs, self._buffer_views):
+            setattr(self, attr, view)
+        return n_old
+
+    def _pick_row(self, picknum):
+        """Find the row of the matrices with a given pick number.
+
+        Lookups go through a dictionary, which is rebuilt when picknums is
+        replaced or changes length from outside. Changing a number in place
+        (rather than assigning a new list) is only noticed for the old number.
+
+        Returns
+        -------
+        int or None
+            The row, or None if there is no pick with that number
+        """
+        if self.picknums is None:
+            return None
+        if self._indexed_picknums[0] is not self.picknums or (
+                self._indexed_picknums[1] != len(self.picknums)):
+            self._index_picknums()
+        row = self._picknum_rows.get(picknum)
+        if row is not None and self.picknums[row] != picknum:
+            self._index_picknums()
+            row = self._picknum_rows.get(picknum)
+        return row
+
+    def _index_picknums(self):
+        """Rebuild the dictionary from pick numbers to rows."""
+        self._picknum_rows = {}
+        for row, num in enumerate(self.picknums):
+            self._picknum_rows.setdefault(num, row)
+        self._indexed_picknums = (self.picknums, len(self.picknums))
+
+    def _index_pick(self, picknum, row):
+        """Add a pick we just put in picknums to the dictionary."""
+        if self._indexed_picknums[0] is self.picknums:
+            self._picknum_rows.setdefault(picknum, row)
+            self._indexed_picknums = (self.picknums, len(self.picknums))
+
     def smooth(self, lowpass, units='tnum'):
         """Smooth the picks.
 
@@ -335,8 +451,7 @@ class Picks():
 
         Called by the overall RadarData.hcrop
         """
-        attrs = ['samp1', 'samp2', 'samp3', 'time', 'power']
-        for attr in attrs:
+        for attr in self.matrix_attrs:
             val = getattr(self, attr)
             if val is not None:
                 setattr(self, attr, val[:, limits[0]:limits[1]])
@@ -362,6 +477,45 @@ class Picks():
                 mat[attr] = 0
         return mat
 
+    def write_h5(self, grp):
+        """Write to a subgroup in an hdf5 file.
+
+        Parameters
+        ----------
+        grp: h5py.Group
+            The group to which the picks subgroup is written
+        """
+        _write_h5_struct(grp.create_group('picks'), self.to_struct())
+
+    def read_h5(self, grp):
+        """Read from the picks subgroup of an hdf5 file.
+
+        Parameters
+        ----------
+        grp: h5py.Group
+            The group containing the picks subgroup
+        """
+        subgrp = grp['picks']
+        for attr in self.attrs:
+            val = _read_h5_val(subgrp, attr)
+            if not hasattr(val, 'shape') or len(val.shape) == 0:
+                # Zeros were written in place of None
+                val = None
+            setattr(self, attr, val)
+        if self.picknums is not None:
+            self.picknums = [int(num) for num in self.picknums]
+
+        for attr in self.lasttrace.attrs:
+            val = np.atleast_1d(_read_h5_val(subgrp['lasttrace'], attr))
+            if len(val) == 1 and val[0] == -9999:
+                val = None
+            setattr(self.lasttrace, attr, val)
+        for attr in self.lt.attrs:
+            setattr(self.lt, attr, _read_h5_val(subgrp['lt'], attr))
+        for attr in self.pickparams.attrs:
+            setattr(self.pickparams, attr, _read_h5_val(subgrp['pickparams'], attr))
+        self.pickparams.freq_update(self.pickparams.freq)
+
     def crop(self, ind):
         """Crop the picks.
 
@@ -394,12 +548,65 @@ class Picks():
             if hasattr(self, attr) and getattr(self, attr) is not None:
                 val = getattr(self, attr)
                 tnum = int(np.floor(val.shape[1] / traces))
-                new_vals = np.zeros((val.shape[0], tnum))
-                new_vals[:] = np.nan
-
-                for j in range(tnum):
-                    # It is not totally clear if this should be a mean or nanmean
-                    new_vals[:, j] = np.nanmean(val[:, j * traces:min((j + 1) * traces, val.shape[1])], axis=1).astype(nptype)
+                # It is not totally clear if this should be a mean or nanmean
+                with warnings.catch_warnings():
+                    # all-nan groups (no pick) are expected
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    new_vals = np.nanmean(val[:, :tnum * traces].reshape((val.shape[0], tnum, traces)), axis=2)
+                if nptype is int:
+                    new_vals = np.trunc(new_vals)
+                with np.errstate(invalid='ignore'):
                     new_vals[new_vals < 0] = np.nan
                     new_vals[new_vals >= self.radardata.snum] = np.nan
                 setattr(self, attr, new_vals)
+
+
+def _write_h5_struct(grp, struct):
+    """Write a (possibly nested) dictionary to a group, with arrays as datasets."""
+    for key, val in struct.items():
+        val = _unwrap_object(val)
+        if isinstance(val, dict):
+            _write_h5_struct(grp.create_group(key), val)
+        elif isinstance(val, (list, np.ndarray)) and np.ndim(val) > 0:
+            grp.create_dataset(key, data=_h5_array(val))
+        else:
+            grp.attrs[key] = val
+
+
+def _unwrap_object(val):
+    """Strip the single-element object arrays that loadmat wraps around cells and structs."""
+    while isinstance(val, np.ndarray) and val.dtype == object and val.size == 1:
+        val = val.flat[0]
+    return val
+
+
+def _h5_array(val):
+    """Convert to an array with a native hdf5 type.
+
+    Object arrays become numeric if every element is a scalar, and strings otherwise.
+    """
+    val = np.asarray(val)
+    if val.dtype == object:
+        elements = [_unwrap_object(element) for element in val.flat]
+        if all(np.size(element) == 1 for element in elements):
+            val = np.array([np.asarray(element).item() for element in elements]).reshape(val.shape)
+        if val.dtype == object:
+            val = np.array([str(element) for element in elements]).reshape(val.shape)
+    if val.dtype.kind == 'U':
+        val = np.char.encode(val, 'utf-8')
+    return val
+
+
+def _read_h5_val(grp, key):
+    """Read something written by _write_h5_struct."""
+    if key in grp:
+        val = grp[key][()]
+        if isinstance(val, np.ndarray) and val.dtype.kind == 'S':
+            val = np.char.decode(val, 'utf-8')
+        return val
+    val = grp.attrs[key]
+    if isinstance(val, bytes):
+        val = val.decode()
+    elif isinstance(val, np.generic):
+        val = val.item()
+    return val
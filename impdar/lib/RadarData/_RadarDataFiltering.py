@@ -57,29 +57,23 @@ def adaptivehfilt(self, window_size, *args, **kwargs):
     # taper average trace so it mostly affects only the upper layers in the data
     avg_trace_scale = (np.exp(-self.travel_time.flatten() * 0.05) / np.exp(-self.travel_time[0] * 0.05))
 
-    # preallocate array to fill with processed data
-    ahfilt_data = np.zeros_like(self.data, dtype=self.data.dtype)
-
-    # begin looping through data trace-by-trace
-    for i in range(int(self.tnum)):
-        # build a packet of window_size # of traces around the trace in question
-        if i <= window_size // 2:
-            scpacket = self.data[:, 0:window_size // 2 + i].copy()
-        elif i >= self.tnum - window_size // 2:
-            scpacket = self.data[:, int(self.tnum) - window_size:int(self.tnum)].copy()
-        else:
-            scpacket = self.data[:, i - window_size // 2 + 1:i + window_size // 2].copy()
-
-        # average the packet horizontally and double filter it (allows the
-        # program to maintain small horizontal artifacts that are likely real)
-        avg_trace_scan_low = filtfilt([.25, .25, .25, .25],
-                                      1,
-                                      np.mean(scpacket, axis=-1)
-                                      ).flatten() * avg_trace_scale.flatten()
-
-        # subtract the average trace off the data trace
-        # hfiltdata_scan_low[:, i] = hfiltdata_mass[:, i] - avg_trace_scan_low
-        ahfilt_data[:, i] = self.data[:, i].copy() - avg_trace_scan_low
+    # build a packet of window_size # of traces around each trace
+    tnum = int(self.tnum)
+    half = window_size // 2
+    inds = np.arange(tnum)
+    starts = np.where(inds <= half, 0, inds - half + 1)
+    ends = inds + half
+    right = (inds > half) & (inds >= tnum - half)
+    starts[right] = tnum - window_size
+    ends[right] = tnum
+
+    # average the packets horizontally and double filter them (allows the
+    # program to maintain small horizontal artifacts that are likely real)
+    avg_traces = filtfilt([.25, .25, .25, .25], 1,
+                          _window_means(self.data, starts, ends), axis=0)
+
+    # subtract the average traces off the data traces
+    ahfilt_data = self.data - avg_traces * avg_trace_scale[:, None]
 
     self.data = ahfilt_data.astype(self.data.dtype)
     print('Adaptive filtering complete')
@@ -89,6 +83,23 @@ def adaptivehfilt(self, window_size, *args, **kwargs):
     self.flags.hfilt[1] = 4
 
 
+def _window_means(data, starts, ends):
+    """Average the traces data[:, starts[i]:ends[i]] for every i.
+
+    This uses a cumulative sum along the traces, so the cost does not depend on
+    the window size. Starts and ends follow normal slicing rules (negative
+    values count from the end), and empty windows give nan like np.mean.
+    """
+    tnum = data.shape[1]
+    starts = np.clip(np.where(starts < 0, starts + tnum, starts), 0, tnum)
+    ends = np.clip(np.where(ends < 0, ends + tnum, ends), 0, tnum)
+    counts = np.maximum(ends - starts, 0)
+    csum = np.zeros((data.shape[0], tnum + 1), dtype=np.result_type(data.dtype, np.float64))
+    np.cumsum(data, axis=1, out=csum[:, 1:])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (csum[:, np.maximum(ends, starts)] - csum[:, starts]) / counts[None, :]
+
+
 def horizontalfilt(self, ntr1, ntr2, *args, **kwargs):
     """Remove the average trace.
 
@@ -414,25 +425,14 @@ def winavg_hfilt(self, avg_win, taper='full', filtdepth=100):
     else:
         raise ValueError('Unrecognized taper. Options are full, pexp, or tukey')
 
-    hfiltdata = np.zeros_like(self.data, dtype=self.data.dtype)
     # set up ranges, create average, taper average, subtract average
+    # As opposed to StoDeep, don't wrap just cutoff for simplicity
+    inds = np.arange(int(self.tnum))
+    starts = np.maximum(inds - (avg_win - 1) // 2, 0)
+    ends = np.minimum(inds + (avg_win - 1) // 2, int(self.tnum))
+    avg_traces = _window_means(self.data, starts, ends) * exptaper[:, None]
 
-    for i in range(int(self.tnum)):
-        range_start = i - ((avg_win - 1) // 2)
-        range_end = i + ((avg_win - 1) // 2)
-
-        # As opposed to StoDeep, don't wrap just cutoff for simplicity
-        if range_start < 0:
-            range_start = 0
-        if range_end > self.tnum:
-            range_end = self.tnum
-        # Create an average trace
-        avg_trace = np.mean(self.data[:, range_start:range_end], axis=-1) * exptaper
-
-        # Subtract avg_trace from each trace
-        hfiltdata[:, i] = self.data[:, i] - avg_trace
-
-    self.data = hfiltdata.copy()
+    self.data = (self.data - avg_traces).astype(self.data.dtype)
     self.flags.hfilt = np.zeros((2,))
     self.flags.hfilt[1] = 2
 
@@ -595,7 +595,10 @@ def migrate(self,
             vel=1.68e8,
             nxpad=10,
             nearfield=False,
-            verbose=0):
+            verbose=0,
+            n_threads=None,
+            aperture=None,
+            max_angle=None):
     """Migrate the data.
 
     This is a wrapper around all the migration routines in migration_routines.py.
@@ -603,15 +606,32 @@ def migrate(self,
     Parameters
     ----------
     mtype: str, optional
-        The chosen migration routine. Options are: kirch, stolt, phsh.
+        The chosen migration routine. Options are: kirch, kirchtab, stolt, phsh.
+        kirchtab is Kirchhoff migration using a precomputed travel-time table,
+        which needs constant trace spacing.
         Default: stolt
+    n_threads: int, optional
+        Number of threads for the compiled Kirchhoff migration (default, None,
+        uses all available cores) or for phase-shift migration (default, None,
+        uses one).
+    aperture: float, optional
+        Maximum horizontal distance (m) summed in Kirchhoff migration.
+        Default (None) is unlimited.
+    max_angle: float, optional
+        Maximum angle (degrees) from vertical summed in Kirchhoff migration.
+        Default (None) is unlimited.
     """
     if mtype == 'kirch':
-        migrationlib.migrationKirchhoff(self, vel=vel, nearfield=nearfield)
+        migrationlib.migrationKirchhoff(self, vel=vel, nearfield=nearfield, n_threads=n_threads,
+                                        aperture=aperture, max_angle=max_angle)
+    elif mtype == 'kirchtab':
+        migrationlib.migrationKirchhoffTable(self, vel=vel, nearfield=nearfield,
+                                             aperture=aperture, max_angle=max_angle)
     elif mtype == 'stolt':
         migrationlib.migrationStolt(self, vel=vel, htaper=htaper, vtaper=vtaper)
     elif mtype == 'phsh':
-        migrationlib.migrationPhaseShift(self, vel=vel, vel_fn=vel_fn, htaper=htaper, vtaper=vtaper)
+        migrationlib.migrationPhaseShift(self, vel=vel, vel_fn=vel_fn, htaper=htaper, vtaper=vtaper,
+                                         n_threads=n_threads)
     elif mtype == 'tk':
         migrationlib.migrationTimeWavenumber(self,
                                              vel=vel,
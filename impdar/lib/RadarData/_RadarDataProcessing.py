@@ -12,6 +12,7 @@ Define processing steps for Radar Data. These are all instance methods.
 
 import numpy as np
 from scipy.interpolate import interp1d
+from scipy.ndimage import maximum_filter1d
 from scipy.optimize import minimize
 from ..permittivity_models import firn_permittivity
 from ..ImpdarError import ImpdarError
@@ -131,43 +132,47 @@ def nmo(self, ant_sep, uice=1.69e8, uair=3.0e8, const_firn_offset=None, rho_prof
 
     # --- Do the move-out correction --- #
 
-    # empty array to fill with new times
-    nmotime = np.zeros((len(self.travel_time)))
-
-    if rho_profile is not None:
+    if rho_profile is None:
+        u_rms = uice
+    else:
         print('Iterating velocity profile in firn...')
-    for i,t in enumerate(self.travel_time):
-        if rho_profile is None:
-            u_rms = uice
-        else:
-            ### Get RMS velocity used for correction
-            d = t / 2. * uice * 1.0e-6  # start by guessing
-            d_last = d.copy()
-            j, tol = 0, 0.1 * self.dt / 2. * uice
-            while abs(d-d_last) > tol or j < 5:  # Iterate until convergence
-                d_last = d.copy()
-                vels = u_interp[d_interp<=d]
-                u_rms = np.sqrt(np.mean(vels**2.))
-                d = t / 2. * u_rms * 1.0e-6
-                j += 1
-        # get the upper leg of the travel_path triangle (direct arrival) from the antenna separation and the rms velocity
-        tsep_ice = 1e6*(ant_sep / u_rms)
-        # hypotenuese, adjust to 'transmit time' by adding the separation time
-        thyp = t+tsep_ice
-        # calculate the vertical two-way travel time
-        nmotime[i] = np.sqrt((thyp)**2. - tsep_ice**2.)
+        # RMS velocity above each depth of the interpolated profile
+        # (nan above the first depth, since nothing is averaged there)
+        cum_u2 = np.cumsum(u_interp ** 2.)
+        u_rms_table = np.hstack(([np.nan], np.sqrt(cum_u2 / np.arange(1, len(u_interp) + 1))))
+
+        # Get RMS velocity used for correction: iterate until convergence,
+        # with each sample stopping on its own once converged
+        d = self.travel_time / 2. * uice * 1.0e-6  # start by guessing
+        d_last = d.copy()
+        u_rms = np.empty_like(d)
+        tol = 0.1 * self.dt / 2. * uice
+        active = np.ones(d.shape, dtype=bool)
+        j = 0
+        while np.any(active):
+            d_last[active] = d[active]
+            # number of profile depths above d, which is zero (so nan) if d is nan
+            n_above = np.searchsorted(d_interp, d[active], side='right')
+            n_above[np.isnan(d[active])] = 0
+            u_rms[active] = u_rms_table[n_above]
+            d[active] = self.travel_time[active] / 2. * u_rms[active] * 1.0e-6
+            j += 1
+            with np.errstate(invalid='ignore'):
+                active = (np.abs(d - d_last) > tol) | (j < 5)
+
+    # get the upper leg of the travel_path triangle (direct arrival) from the antenna separation and the rms velocity
+    tsep_ice = 1e6 * (ant_sep / u_rms)
+    # hypotenuese, adjust to 'transmit time' by adding the separation time
+    thyp = self.travel_time + tsep_ice
+    # calculate the vertical two-way travel time
+    nmotime = np.sqrt(thyp ** 2. - tsep_ice ** 2.)
 
     # Time vector with original time step
-    self.travel_time = np.arange(min(self.travel_time),max(nmotime),self.dt*1e6)
+    self.travel_time = np.arange(np.min(self.travel_time), np.max(nmotime), self.dt * 1e6)
     self.snum = len(self.travel_time)
 
-    # Interpolate onto new time vector
-    newdata = np.empty((self.snum,self.tnum))
-    for ti in np.arange(self.tnum):
-        trace = self.data[:,ti]
-        f = interp1d(nmotime,trace,kind='linear')
-        newdata[:,ti] = f(self.travel_time)
-    self.data = newdata
+    # Interpolate all traces onto new time vector at once
+    self.data = interp1d(nmotime, self.data, kind='linear', axis=0)(self.travel_time)
 
     # --- Cleanup --- #
 
@@ -420,7 +425,9 @@ def restack(self, traces):
         print('Only will stack odd numbers of traces. Using {:d}'.format(int(traces + 1)))
         traces = traces + 1
     tnum = int(np.floor(self.tnum / traces))
-    stack = np.zeros((self.snum, tnum))
+    # Average each group of traces in one shot, dropping any leftovers at the end
+    stack = np.mean(self.data[:, :tnum * traces].reshape((self.data.shape[0], tnum, traces)),
+                    axis=2).astype(np.float64)
     trace_int = np.zeros((tnum, ))
     oned_restack_vars = ['dist',
                          'pressure',
@@ -431,15 +438,8 @@ def restack(self, traces):
                          'elev',
                          'decday',
                          'trig']
-    oned_newdata = {key: np.zeros((tnum, )) if getattr(self, key) is not None else None for key in oned_restack_vars}
-    for j in range(tnum):
-        stack[:, j] = np.mean(self.data[:, j * traces:min((j + 1) * traces, self.data.shape[1])],
-                              axis=1)
-        # trace_int[j] = np.sum(self.trace_int[j * traces:min((j + 1) * traces, self.data.shape[1])])
-        for var, val in oned_newdata.items():
-            if val is not None:
-                val[j] = np.mean(getattr(self, var)[j * traces:
-                                                    min((j + 1) * traces, self.data.shape[1])])
+    oned_newdata = {key: np.mean(getattr(self, key)[:tnum * traces].reshape((tnum, traces)), axis=1)
+                    if getattr(self, key) is not None else None for key in oned_restack_vars}
     self.tnum = tnum
     self.data = stack
     self.trace_num = np.arange(self.tnum).astype(int) + 1
@@ -486,11 +486,15 @@ def agc(self, window=50, scaling_factor=50):
         The scaling factor. This gets divided by the max amplitude when we rescale the input.
         Default 50.
     """
-    maxamp = np.zeros((self.snum,))
-    # In the for loop, old code indexed used range(window // 2). This did not make sense to me.
-    for i in range(self.snum):
-        maxamp[i] = np.max(np.abs(self.data[max(0, i - window // 2):
-                                            min(i + window // 2, self.snum), :]))
+    if window // 2 < 1:
+        raise ValueError('window must be at least 2 samples')
+    # The max over traces is the same for every window, so take it once, then
+    # use a running max over samples i - window // 2 to i + window // 2 - 1.
+    rowmax = np.max(np.abs(self.data), axis=1)
+    maxamp = maximum_filter1d(rowmax, 2 * (window // 2), mode='nearest').astype(float)
+    # maximum_filter1d does not propagate nans like np.max does
+    nans = maximum_filter1d(np.isnan(rowmax).astype(np.int8), 2 * (window // 2), mode='nearest')
+    maxamp[nans > 0] = np.nan
     maxamp[maxamp == 0] = 1.0e-6
     self.data *= (scaling_factor / np.atleast_2d(maxamp).transpose()).astype(self.data.dtype)
     self.flags.agc = True
@@ -615,14 +619,8 @@ def elev_correct(self, v_avg=1.69e8):
     dz_avg = self.dt * (v_avg / 2.)
     max_samp = int(np.floor(max_diff / dz_avg))
 
-    data_old = self.data.copy()
-    self.data = np.zeros((data_old.shape[0] + max_samp, data_old.shape[1]))
-    self.data[:, :] = np.nan
-
     top_inds = (elev_diffs / dz_avg).astype(int)
-    for i in range(self.data.shape[1]):
-        top_ind = top_inds[i]
-        self.data[top_ind: top_ind + data_old.shape[0], i] = data_old[:, i]
+    self.data = shift_traces(self.data, top_inds, snum_out=self.data.shape[0] + max_samp)
 
     if hasattr(self, 'picks') and self.picks is not None:
         self.picks.crop(-top_inds - 1)
@@ -630,3 +628,62 @@ def elev_correct(self, v_avg=1.69e8):
     self.elevation = np.hstack((np.arange(np.max(self.elev), np.min(self.elev), -dz_avg),
                                 np.min(self.elev) - self.nmo_depth))
     self.flags.elev = 1
+
+
+def shift_traces(data, shifts, snum_out=None):
+    """Shift each trace (column) of a matrix down by its own number of samples.
+
+    This is one gather of whole traces, rather than a loop over traces.
+    Samples that are shifted in from outside the input are NaN, as are traces with
+    a NaN shift. Non-integer shifts are linearly interpolated between samples.
+
+    Parameters
+    ----------
+    data: np.ndarray (snum x tnum)
+        The matrix to shift
+    shifts: np.ndarray (tnum,)
+        Number of samples to move each trace down (negative to move it up)
+    snum_out: int, optional
+        Number of samples in the output. Default is the same as the input.
+
+    Returns
+    -------
+    np.ndarray (snum_out x tnum)
+        The shifted matrix. This is data itself if nothing moves.
+    """
+    snum, tnum = data.shape
+    if snum_out is None:
+        snum_out = snum
+    shifts = np.asarray(shifts, dtype=float)
+    if snum_out == snum and np.all(shifts == 0):
+        return data
+
+    # Output sample i of a trace is (1 - frac) * input[i + k] + frac * input[i + k + 1]
+    good_trace = np.isfinite(shifts)
+    k = np.floor(-np.where(good_trace, shifts, 0.))
+    frac = -np.where(good_trace, shifts, 0.) - k
+    # Anything shifted further than this is all NaN anyway
+    k = np.clip(k, -snum_out, snum).astype(int)
+
+    # Work trace-by-row, padded with NaNs, so that each output trace is a
+    # contiguous window of its padded input trace
+    pad_top = max(0, -np.min(k))
+    pad_bottom = max(0, np.max(k) + snum_out + 1 - snum)
+    padded = np.empty((tnum, pad_top + snum + pad_bottom), dtype=np.result_type(data, np.float64))
+    padded[:, :pad_top] = np.nan
+    padded[:, pad_top + snum:] = np.nan
+    padded[:, pad_top:pad_top + snum] = data.transpose()
+    windows = np.lib.stride_tricks.as_strided(
+        padded, shape=(tnum, padded.shape[1] - snum_out + 1, snum_out),
+        strides=(padded.strides[0], padded.strides[1], padded.strides[1]), writeable=False)
+
+    traces = np.arange(tnum)
+    out = windows[traces, k + pad_top]
+    sub = frac > 0
+    if np.any(sub):
+        step = windows[traces[sub], k[sub] + pad_top + 1]
+        step -= out[sub]
+        step *= frac[sub, None]
+        out[sub] += step
+    out[~good_trace] = np.nan
+    return out.transpose()
@@ -7,6 +7,7 @@
 # Distributed under terms of the GNU GPL3.0 license.
 
 """Methods for saving radar data in different formats."""
+import os.path
 import warnings
 
 from ..gpslib import get_conversion
@@ -28,15 +29,40 @@ try:
 except ImportError:
     SEGY = False
 
+# Try to enable saving to hdf5
+try:
+    import h5py
+    H5 = True
+except ImportError:
+    H5 = False
+
+#: Value of the impdar_type attribute that marks an ImpDAR RadarData h5 file
+H5_TYPE = 'RadarData'
+
 
-def save(self, fn):
+def save(self, fn, format=None, **kwargs):
     """Save the radar data.
 
     Parameters
     ----------
     fn: str
-        Filename. Should have a .mat extension
+        Filename. Should have a .mat, .h5, or .hdf5 extension
+    format: str, optional
+        'mat' or 'h5'. Default is to guess from the extension of fn,
+        using mat unless the extension is .h5 or .hdf5.
+    kwargs:
+        Further arguments to :meth:`save_h5` (e.g. chunk_traces) when saving as h5.
     """
+    if format is None:
+        if os.path.splitext(fn)[1].lower() in ['.h5', '.hdf5']:
+            format = 'h5'
+        else:
+            format = 'mat'
+    if format == 'h5':
+        return self.save_h5(fn, **kwargs)
+    elif format != 'mat':
+        raise ValueError('format must be mat or h5')
+
     mat = {}
 
     for attr in self.attrs_guaranteed:
@@ -56,28 +82,129 @@ def save(self, fn):
         # We want the structure available to prevent read errors from corrupt files
         mat['flags'] = RadarFlags().to_matlab()
 
-    # Make sure not to expand the size of the data due to type conversion
-    if hasattr(self, 'data_dtype') and (
-            self.data_dtype is not None) and (self.data_dtype != mat['data'].dtype):
-        # Be careful of obliterating NaNs
-        # We will use singles instead of ints for this guess
-        if (self.data_dtype in [int, np.int8, np.int16]) and np.any(np.isnan(mat['data'])):
-            print('Warning: new file is float16 rather than ',
-                  self.data_dtype, ' since we now have NaNs')
-            mat['data'] = mat['data'].astype(np.float16)
-        elif (self.data_dtype in [np.int32]) and np.any(np.isnan(mat['data'])):
-            print('Warning: new file is float32 rather than ',
-                  self.data_dtype, ' since we now have NaNs')
-            mat['data'] = mat['data'].astype(np.float32)
-        elif (self.data_dtype in [np.int64]) and np.any(np.isnan(mat['data'])):
-            print('Warning: new file is float64 rather than ',
-                  self.data_dtype, ' since we now have NaNs')
-            mat['data'] = mat['data'].astype(np.float64)
-        else:
-            mat['data'] = mat['data'].astype(self.data_dtype)
+    mat['data'] = _output_data(self, mat['data'])
     savemat(fn, mat)
 
 
+def save_h5(self, fn, chunk_traces=1000, compression='gzip'):
+    """Save the radar data as a chunked, compressed hdf5 file.
+
+    The data matrix is chunked by blocks of traces, and written one chunk at a
+    time, so data that are not in memory (e.g. loaded with lazy=True, or
+    streamed to disk by :func:`process_streaming
+    <impdar.lib.process.process_streaming>`) are never all read at once.
+    Everything else (per-trace vectors, flags, and picks) is stored separately,
+    so it can be read without touching the data by loading with lazy=True.
+
+    Parameters
+    ----------
+    fn: str
+        Filename. Should have a .h5 extension
+    chunk_traces: int, optional
+        Number of traces in each chunk of the data matrix. Default 1000.
+    compression: str, optional
+        h5py compression filter for the data matrix (e.g. 'gzip', 'lzf', or None).
+        Default 'gzip'.
+
+    Raises
+    ------
+    ImportError
+        If h5py cannot be imported.
+    """
+    if not H5:
+        raise ImportError('h5py failed to import, cannot save as h5')
+
+    with h5py.File(fn, 'w') as fout:
+        grp = fout.create_group('dat')
+        grp.attrs['impdar_type'] = H5_TYPE
+        _write_h5_data(self, grp, chunk_traces, compression)
+        for attr in self.attrs_guaranteed + self.attrs_optional + self.stodeep_attrs:
+            # data is in both attrs_guaranteed and stodeep_attrs, and is already written
+            if attr in grp or attr in grp.attrs or not hasattr(self, attr):
+                continue
+            val = getattr(self, attr)
+            if val is None:
+                if attr in self.attrs_guaranteed:
+                    # As for mat, so that the file can be read back
+                    grp.attrs[attr] = 0
+            elif attr in self.stodeep_attrs:
+                chunks = (val.shape[0], max(1, min(chunk_traces, val.shape[1])))
+                grp.create_dataset(attr, data=val, chunks=chunks, compression=compression)
+            elif hasattr(val, 'shape') and len(val.shape) > 0:
+                grp.create_dataset(attr, data=val)
+            else:
+                grp.attrs[attr] = val
+
+        if self.flags is not None:
+            self.flags.write_h5(grp)
+        else:
+            RadarFlags().write_h5(grp)
+
+        if hasattr(self, 'picks') and self.picks is not None:
+            self.picks.write_h5(grp)
+
+
+def _write_h5_data(self, grp, chunk_traces, compression):
+    """Write the data matrix to grp one chunk of traces at a time.
+
+    Data that are not in memory (loaded lazily, or left on disk by
+    process_streaming) are only read a chunk at a time.
+    """
+    if not self._data_is_lazy() and getattr(self, 'data', None) is None:
+        # As for mat, so that the file can be read back
+        grp.attrs['data'] = 0
+        return
+
+    shape = self._data_shape()
+    step = max(1, min(chunk_traces, shape[1]))
+    starts = range(0, shape[1], step)
+    dtype = _output_dtype(self, self._lazy_data.dtype if self._data_is_lazy() else self.data.dtype,
+                          lambda: (self._read_traces(start, start + step) for start in starts))
+    dset = grp.create_dataset('data', shape=shape, dtype=dtype, chunks=(shape[0], step),
+                              compression=compression)
+    for start in starts:
+        dset[:, start:start + step] = self._read_traces(start, start + step).astype(dtype, copy=False)
+
+
+def _output_data(self, data):
+    """Return data in the input dtype, if possible, for saving."""
+    dtype = _output_dtype(self, data.dtype, lambda: [data])
+    if dtype != data.dtype:
+        data = data.astype(dtype)
+    return data
+
+
+def _output_dtype(self, dtype, blocks):
+    """Return the dtype to save data of the given dtype in: the input dtype, if possible.
+
+    Make sure not to expand the size of the data due to type conversion.
+    blocks returns an iterator over the data, which is only used to look for NaNs.
+    """
+    if not hasattr(self, 'data_dtype') or (
+            self.data_dtype is None) or (self.data_dtype == dtype):
+        return dtype
+    # Be careful of obliterating NaNs
+    # We will use singles instead of ints for this guess
+    if (self.data_dtype in [int, np.int8, np.int16]) and _any_nan(blocks()):
+        print('Warning: new file is float16 rather than ',
+              self.data_dtype, ' since we now have NaNs')
+        return np.dtype(np.float16)
+    elif (self.data_dtype in [np.int32]) and _any_nan(blocks()):
+        print('Warning: new file is float32 rather than ',
+              self.data_dtype, ' since we now have NaNs')
+        return np.dtype(np.float32)
+    elif (self.data_dtype in [np.int64]) and _any_nan(blocks()):
+        print('Warning: new file is float64 rather than ',
+              self.data_dtype, ' since we now have NaNs')
+        return np.dtype(np.float64)
+    return np.dtype(self.data_dtype)
+
+
+def _any_nan(blocks):
+    """Check blocks of data for NaNs."""
+    return any(np.any(np.isnan(block)) for block in blocks)
+
+
 def save_as_segy(self, fn):
     """Save as a (non standard-compliant) SEGY file that can be used with, e.g., SeisUNIX.
 
@@ -19,6 +19,13 @@ from ..RadarFlags import RadarFlags
 from ..ImpdarError import ImpdarError
 from ..Picks import Picks
 from .. import gpslib
+from ._RadarDataProcessing import shift_traces
+
+try:
+    import h5py
+    H5 = True
+except ImportError:
+    H5 = False
 
 STODEEP_ATTRS = ['data', 'migdata', 'interp_data', 'nmo_data', 'filtdata', 'hfilt_data']
 
@@ -28,7 +35,10 @@ class RadarData(object):
 
     We keep track of processing steps with the flags attribute.
     This base version's __init__ takes a filename of a .mat file in the old
-    StODeep format to load.
+    StODeep format, or an .h5 file written by :meth:`save_h5`, to load.
+    With lazy=True, the data matrix of an .h5 file is only read when the data
+    attribute is first used, so that picks, flags, and per-trace
+    vectors can be used without reading the data.
     """
 
     #: Attributes that every RadarData object should have.
@@ -113,14 +123,14 @@ class RadarData(object):
     from ._RadarDataProcessing import reverse, nmo, crop, hcrop, restack, \
         rangegain, agc, constant_space, elev_correct, \
         constant_sample_depth_spacing, traveltime_to_depth
-    from ._RadarDataSaving import save, save_as_segy, output_shp, output_csv, \
-        _get_pick_targ_info, output_ogr
+    from ._RadarDataSaving import save, save_h5, save_as_segy, output_shp, \
+        output_csv, _get_pick_targ_info, output_ogr
     from ._RadarDataFiltering import adaptivehfilt, horizontalfilt, highpass, \
         winavg_hfilt, hfilt, vertical_band_pass, denoise, migrate, \
         horizontal_band_pass, lowpass
 
     # Now make some load/save methods that will work with the matlab format
-    def __init__(self, fn_mat):
+    def __init__(self, fn_mat, lazy=False):
         if fn_mat is None:
             # Store this for possible later filename modification
             self.fn = fn_mat
@@ -203,6 +213,10 @@ class RadarData(object):
             self.data_dtype = None
             return
 
+        if _is_impdar_h5(fn_mat):
+            self._load_h5(fn_mat, lazy=lazy)
+            return
+
         mat = loadmat(fn_mat)
         for attr in self.attrs_guaranteed:
             # Exceptional case for 'data' variable because there are alternative names
@@ -242,6 +256,65 @@ class RadarData(object):
 
         self.check_attrs()
 
+    def _load_h5(self, fn_h5, lazy=False):
+        """Load from an h5 file written by save_h5.
+
+        If lazy, the data matrix is not read until the data attribute is used.
+        """
+        with h5py.File(fn_h5, 'r') as fin:
+            grp = fin['dat']
+            for attr in self.attrs_optional:
+                setattr(self, attr, None)
+            for attr, val in grp.attrs.items():
+                if attr == 'impdar_type':
+                    continue
+                if isinstance(val, bytes):
+                    val = val.decode()
+                setattr(self, attr, val)
+            for attr in grp.keys():
+                if attr in ['flags', 'picks'] or (lazy and attr == 'data'):
+                    continue
+                setattr(self, attr, grp[attr][()])
+            self.data_dtype = grp['data'].dtype
+
+            self.flags = RadarFlags()
+            self.flags.read_h5(grp)
+            self.picks = Picks(self)
+            if 'picks' in grp:
+                self.picks.read_h5(grp)
+
+        self.fn = fn_h5
+        if lazy:
+            self._lazy_data = _LazyH5Data(fn_h5)
+        self.check_attrs()
+
+    def __getattr__(self, attr):
+        # Only called when normal lookup fails, i.e. for data not yet read from a lazy source
+        if attr == 'data' and '_lazy_data' in self.__dict__:
+            self.data = self.__dict__.pop('_lazy_data').read()
+            return self.data
+        raise AttributeError('{:s} object has no attribute {:s}'.format(
+            type(self).__name__, attr))
+
+    def _data_is_lazy(self):
+        """Return True if the data have not been read from their lazy source yet."""
+        return 'data' not in self.__dict__ and '_lazy_data' in self.__dict__
+
+    def _data_shape(self):
+        """Return the shape of the data, without reading data that are not loaded."""
+        if self._data_is_lazy():
+            return self._lazy_data.shape
+        return self.data.shape
+
+    def _read_traces(self, start=None, end=None):
+        """Return an in-memory copy of traces start:end.
+
+        Data that are not loaded yet are only read for these traces.
+        """
+        if self._data_is_lazy():
+            return self._lazy_data.read(start, end)
+        return np.array(self.data[:, start:end])
+
     def _parse_stodeepdata(self, mat, data_attrs=STODEEP_ATTRS):
         """Set data attribute in a prioritized order."""
         data_dict = {}
@@ -281,6 +354,9 @@ class RadarData(object):
         """
         # fn is required but defined separately
         for attr in self.attrs_guaranteed + ['fn']:
+            if attr == 'data' and self._data_is_lazy():
+                # Checking would read the data, so we only check the shape below
+                continue
             if not hasattr(self, attr):
                 raise ImpdarError('{:s} is missing. \
                     It appears that this is an ill-defined \
@@ -298,7 +374,7 @@ class RadarData(object):
 
         # Do some shape checks, but we need to be careful since
         # variable-surface will screw this up
-        if (self.data.shape != (self.snum, self.tnum)) and (self.elev is None):
+        if (self._data_shape() != (self.snum, self.tnum)) and (self.elev is None):
             raise ImpdarError('The data shape does not match \
                               the snum and tnum values!!!')
 
@@ -326,7 +402,10 @@ class RadarData(object):
                     raise ImpdarError('{:s} needs length tnum {:d}'.format(attr, self.tnum))
 
         if not hasattr(self, 'data_dtype') or self.data_dtype is None:
-            self.data_dtype = self.data.dtype
+            if self._data_is_lazy():
+                self.data_dtype = self._lazy_data.dtype
+            else:
+                self.data_dtype = self.data.dtype
         return
 
     def get_projected_coords(self, t_srs=None):
@@ -343,12 +422,8 @@ class RadarData(object):
         else:
             transform, self.t_srs = gpslib.get_utm_conversion(np.nanmean(self.lat), np.nanmean(self.long))
 
-        pts = np.array(transform(np.vstack((self.long, self.lat)).transpose()))
-
-        self.x_coord, self.y_coord = pts[:, 0], pts[:, 1]
-        self.dist = np.zeros((len(self.y_coord), ))
-        self.dist[1:] = np.cumsum(np.sqrt(np.diff(self.x_coord) ** 2.0
-            + np.diff(self.y_coord) ** 2.0)) / 1000.0
+        self.x_coord, self.y_coord = gpslib.transform_points(transform, self.long, self.lat)
+        self.dist = gpslib.along_track_distance(self.x_coord, self.y_coord)
 
     def get_ll(self, s_srs):
         """Convert to projected coordinates
@@ -361,8 +436,7 @@ class RadarData(object):
         """
         transform, self.t_srs = gpslib.get_rev_conversion(t_srs=s_srs)
 
-        pts = np.array(transform(np.vstack((self.x_coord, self.y_coord)).transpose()))
-        self.long, self.lat = pts[:, 0], pts[:, 1]
+        self.long, self.lat = gpslib.transform_points(transform, self.x_coord, self.y_coord)
 
     @property
     def datetime(self):
@@ -371,3 +445,26 @@ class RadarData(object):
                          datetime.timedelta(days=int(dd)) +
                          datetime.timedelta(days=dd % 1)
                          for dd in self.decday], dtype=np.datetime64)
+
+
+def _is_impdar_h5(fn):
+    """Check whether a file is an h5 file written by RadarData.save_h5."""
+    if not H5 or not h5py.is_hdf5(fn):
+        return False
+    with h5py.File(fn, 'r') as fin:
+        return 'dat' in fin and fin['dat'].attrs.get('impdar_type') == 'RadarData'
+
+
+class _LazyH5Data(object):
+    """The data matrix of an h5 file written by RadarData.save_h5, read when needed."""
+
+    def __init__(self, fn_h5):
+        self.fn = fn_h5
+        with h5py.File(fn_h5, 'r') as fin:
+            self.shape = fin['dat']['data'].shape
+            self.dtype = fin['dat']['data'].dtype
+
+    def read(self, start=None, end=None):
+        """Read traces start:end (by default, all of them) into memory."""
+        with h5py.File(self.fn, 'r') as fin:
+            return fin['dat']['data'][:, start:end]
@@ -39,6 +39,9 @@ class RadarFlags():
         (2) The constant spacing (m)
     mig: 2x1 :class: String
         None if no migration done, mtype if migration done.
+    recipe: str
+        JSON list of the steps applied with a :mod:`recipe <impdar.lib.recipe>`.
+        Empty if none.
     """
 
     def __init__(self):
@@ -55,6 +58,7 @@ class RadarFlags():
         self.mig = 'none'
         self.elev = 0
         self.elevation = 0
+        self.recipe = ''
         self.attrs = ['batch', 'bpass', 'hfilt', 'rgain', 'agc', 'restack',
                       'reverse', 'crop', 'nmo', 'interp', 'mig', 'elev']
         self.attr_dims = [None, 3, 2, None, None, None, None, 3, 2, 2, None,
@@ -72,6 +76,7 @@ class RadarFlags():
         outmat = {att: getattr(self, att) for att in self.attrs}
         for attr in self.bool_attrs:
             outmat[attr] = 1 if outmat[attr] else 0
+        outmat['recipe'] = self.recipe
         return outmat
 
     def from_matlab(self, matlab_struct):
@@ -96,3 +101,39 @@ class RadarFlags():
             setattr(self,
                     attr,
                     True if matlab_struct[attr][0][0][0] == 1 else 0)
+
+        # Older files do not have a recipe, and empty strings do not survive the round trip
+        try:
+            self.recipe = str(matlab_struct['recipe'][0][0][0])
+        except (KeyError, ValueError, IndexError):
+            self.recipe = ''
+
+    def write_h5(self, grp):
+        """Write to a subgroup in an hdf5 file.
+
+        Parameters
+        ----------
+        grp: h5py.Group
+            The group to which the flags subgroup is written
+        """
+        subgrp = grp.create_group('flags')
+        for attr, val in self.to_matlab().items():
+            subgrp.attrs[attr] = val
+
+    def read_h5(self, grp):
+        """Read from the flags subgroup of an hdf5 file.
+
+        Parameters
+        ----------
+        grp: h5py.Group
+            The group containing the flags subgroup
+        """
+        subgrp = grp['flags']
+        for attr, val in subgrp.attrs.items():
+            if isinstance(val, bytes):
+                val = val.decode()
+            elif isinstance(val, np.generic):
+                val = val.item()
+            setattr(self, attr, val)
+        for attr in self.bool_attrs:
+            setattr(self, attr, getattr(self, attr) == 1)
@@ -15,6 +15,9 @@ directly. Use RadarGPS class, which has an __init__ method, instead.
 Additional methods in this library are used to read the filetypes from StoDeep.
 These can then be used to redo the GPS info on another object
 """
+import io
+from functools import lru_cache
+
 import numpy as np
 try:
     import osr
@@ -27,6 +30,7 @@ except ImportError:
         conversions_enabled = False
 
 from scipy.interpolate import interp1d
+from scipy.signal import fftconvolve
 
 if conversions_enabled:
     def get_utm_conversion(lat, lon):
@@ -40,9 +44,11 @@ if conversions_enabled:
             else:
                 return True
 
-        utm_zone = utm_getZone(lon)
-        is_northern = utm_isNorthern(lat)
+        return _utm_conversion(utm_getZone(lon), utm_isNorthern(lat))
 
+    @lru_cache(maxsize=None)
+    def _utm_conversion(utm_zone, is_northern):
+        """Build the transform to a UTM zone. Cached, since this is slow."""
         utm_cs = osr.SpatialReference()
         utm_cs.SetWellKnownGeogCS('WGS84')
         utm_cs.SetUTM(utm_zone, is_northern)
@@ -63,6 +69,7 @@ if conversions_enabled:
         transform_WGS84_To_UTM = osr.CoordinateTransformation(wgs84_cs, utm_cs)
         return transform_WGS84_To_UTM.TransformPoints, utm_cs.ExportToPrettyWkt()
 
+    @lru_cache(maxsize=None)
     def get_conversion(t_srs):
         out_cs = osr.SpatialReference()
         out_cs.SetFromUserInput(t_srs)
@@ -81,6 +88,7 @@ if conversions_enabled:
         transform_WGS84_To_srs = osr.CoordinateTransformation(wgs84_cs, out_cs)
         return transform_WGS84_To_srs.TransformPoints, out_cs.ExportToPrettyWkt()
 
+    @lru_cache(maxsize=None)
     def get_rev_conversion(t_srs):
         out_cs = osr.SpatialReference()
         out_cs.SetFromUserInput(t_srs)
@@ -121,6 +129,25 @@ def hhmmss2dec(times):
     return (h + m / 60.0 + s / 3600.0) / 24.0
 
 
+def transform_points(transform, x, y):
+    """Apply a transform from get_conversion (etc.) to arrays of coordinates.
+
+    Returns
+    -------
+    x, y: np.ndarray
+        The transformed coordinates
+    """
+    pts = np.array(transform(np.ascontiguousarray(np.column_stack((x, y)), dtype=float)))
+    return pts[:, 0], pts[:, 1]
+
+
+def along_track_distance(x, y):
+    """Cumulative distance, in km, along a track of projected coordinates."""
+    dist = np.zeros((len(x), ))
+    dist[1:] = np.cumsum(np.hypot(np.diff(x), np.diff(y))) / 1000.0
+    return dist
+
+
 class nmea_info:
     """Container for general information about lat, lon, etc.
 
@@ -149,6 +176,7 @@ class nmea_info:
     geo_offset = None
     times = None
     scans = None
+    projected = False
 
     def get_all(self):
         """Populate all the values from the input data."""
@@ -218,18 +246,17 @@ class nmea_info:
             self.glat()
         if self.x is None:
             self.glon()
-        if conversions_enabled:
+        if conversions_enabled and not self.projected:
             self.get_utm()
 
-        self.dist = np.zeros((len(self.y), ))
-        self.dist[1:] = np.cumsum(np.sqrt(np.diff(self.x) ** 2.0 + np.diff(self.y) ** 2.0)) / 1000.0
+        self.dist = along_track_distance(self.x, self.y)
 
     def get_utm(self):
         """Transform lat and lon to utm coords in a nice way."""
         transform, _ = get_utm_conversion(np.nanmean(self.lat),
                                           np.nanmean(self.lon))
-        pts = np.array(transform(np.vstack((self.lon, self.lat)).transpose()))
-        self.x, self.y = pts[:, 0], pts[:, 1]
+        self.x, self.y = transform_points(transform, self.lon, self.lat)
+        self.projected = True
 
     @property
     def dectime(self):
@@ -241,6 +268,9 @@ def nmea_all_info(list_of_sentences):
     """
     Return an object with the nmea info from a given list of sentences.
 
+    The sentences are parsed in bulk with np.loadtxt rather than field by
+    field, so long files do not need a python call per value.
+
     Parameters
     ----------
     list_of_sentences : list of strs
@@ -256,37 +286,58 @@ def nmea_all_info(list_of_sentences):
     np.ndarray
         An array of the useful information in the NMEA sentences.
     """
-    def _gga_sentence_split(sentence):
-        all = sentence.split(',')
-        if len(all) > 5:
-            # We can have corrupted lines--just ignore these and continue
-            try:
-                numbers = list(map(lambda x: float(x) if x != '' else np.nan, all[1:3] + [1] + [all[4]] + [1] + all[6:10] + [all[11]]))
-                if all[3] == 'S':
-                    numbers[2] = -1
-                if all[5] == 'W':
-                    numbers[4] = -1
-            except (ValueError, IndexError):
-                numbers = [np.nan] * 10
-        elif len(all) > 2:
-            try:
-                numbers = list(map(lambda x: float(x) if x != '' else np.nan, all[1:3] + [1]))
-                if all[3] == 'S':
-                    numbers[2] = -1
-            except (ValueError, IndexError):
-                numbers = [np.nan] * 10
-        else:
-            numbers = [np.nan] * 10
-        return numbers
-
-    if np.all([sentence.split(',')[0] == '$GPGGA' for sentence in list_of_sentences]):
-        data = nmea_info()
-        data.all_data = np.array([_gga_sentence_split(sentence)
-                                  for sentence in list_of_sentences])
-        return data
-    else:
+    if not all(sentence.split(',', 1)[0] == '$GPGGA' for sentence in list_of_sentences):
         raise ValueError('I can only do gga sentences right now')
 
+    all_data = np.full((len(list_of_sentences), 10), np.nan)
+    n_fields = np.array([sentence.count(',') + 1 for sentence in list_of_sentences],
+                        dtype=int)
+
+    # Complete sentences. We can have corrupted lines--these are left as nans
+    full = np.flatnonzero(n_fields > 11)
+    if len(full) > 0:
+        all_data[full, :] = _gga_columns([list_of_sentences[i] for i in full],
+                                         (1, 2, 3, 4, 5, 6, 7, 8, 9, 11))
+
+    # Sentences cut off after the latitude just give time and latitude
+    part = np.flatnonzero((n_fields > 3) & (n_fields < 6))
+    if len(part) > 0:
+        all_data[part, :3] = _gga_columns([list_of_sentences[i] for i in part], (1, 2, 3))
+
+    data = nmea_info()
+    data.all_data = all_data
+    return data
+
+
+def _gga_columns(sentences, fields):
+    """Read the given fields of some GGA sentences into an array.
+
+    Blank fields are nan, and the hemisphere fields (3 and 5) become -1 for
+    S or W and 1 otherwise. Sentences with a corrupted field are all nan.
+    """
+    text = '\n'.join([sentence.rstrip('\r\n') for sentence in sentences])
+    text = text.replace(',,', ',nan,').replace(',,', ',nan,')
+    hemi = [i for i, field in enumerate(fields) if field in (3, 5)]
+    numeric = [i for i, field in enumerate(fields) if field not in (3, 5)]
+
+    out = np.empty((len(sentences), len(fields)))
+    try:
+        out[:, numeric] = np.loadtxt(io.StringIO(text), delimiter=',', comments=None, ndmin=2,
+                                     usecols=[fields[i] for i in numeric])
+        negative = np.array(['S' if fields[i] == 3 else 'W' for i in hemi])
+        out[:, hemi] = np.where(np.loadtxt(io.StringIO(text), delimiter=',', comments=None,
+                                           ndmin=2, usecols=[fields[i] for i in hemi],
+                                           dtype=str) == negative, -1., 1.)
+    except ValueError:
+        # Something is corrupted, so split in half until we find it
+        if len(sentences) == 1:
+            out[:, :] = np.nan
+        else:
+            half = len(sentences) // 2
+            out[:half, :] = _gga_columns(sentences[:half], fields)
+            out[half:, :] = _gga_columns(sentences[half:], fields)
+    return out
+
 
 class RadarGPS(nmea_info):
     """
@@ -374,9 +425,9 @@ def kinematic_gps_control(dats, lat, lon, elev, decday, offset=0.0,
     guess_offset: bool, optional
         If true, ImpDAR will attempt to find the offset between the GPS and
         Radar times using the cross-correlation between
-        the x coordinates in the two datasets. If the guess at the offset is
-        nonzero, we look at 1000 offsets within 10% of
-        the offset. Else we look at +/- 0.001 days
+        the lat and lon in the two datasets. If the guess at the offset is
+        nonzero, we look for offsets within 10% of
+        the offset. Else we look at +/- 0.1 days
 
     """
     if extrapolate:
@@ -396,33 +447,17 @@ def kinematic_gps_control(dats, lat, lon, elev, decday, offset=0.0,
         for j, dat in enumerate(dats):
             decday_interp = dat.decday.copy()
             if old_gps_gaps:
-                for i,dday in enumerate(decday_interp):
-                    if np.min(abs(dday-decday))>1./(24*3600.):
-                        decday_interp[i] = np.nan
+                decday_interp = _gps_gaps(decday_interp, decday)
                 dat.lat[dat.lat == 0.] = np.nan
                 dat.long[dat.long == 0.] = np.nan
                 if np.all(np.isnan(decday_interp)):
                     raise ValueError("Too much time offset")
-            for i in range(5):
-                if (min(lon % 360) - max(dat.long % 360)) > 0. or (min(dat.long % 360) - max(lon % 360)) > 0.:
-                    raise ValueError('No overlap in longitudes')
-
-                if offsets[j] != 0.0:
-                    search_vals = np.linspace(-0.1 * abs(offsets[j]),
-                                              0.1 * abs(offsets[j]),1001)
-                else:
-                    search_vals = np.linspace(-0.1, 0.1, 5001)
-
-                cc_coeffs = np.zeros_like(search_vals)
-                for i_search,inc_offset in enumerate(search_vals):
-                    lat_interp = interp1d(decday + inc_offset + offsets[j], lat, kind='linear', fill_value=fill_value)(decday_interp)
-                    long_interp = interp1d(decday + inc_offset + offsets[j], lon%360, kind='linear', fill_value=fill_value)(decday_interp)
-                    idxs_lat = ~np.isnan(lat_interp) & ~np.isnan(dat.lat)
-                    idxs_long = ~np.isnan(long_interp) & ~np.isnan(dat.long)
-                    cc_coeffs[i_search] = np.corrcoef(lat_interp[idxs_lat], dat.lat[idxs_lat])[0, 1] + \
-                                 np.corrcoef(long_interp[idxs_long], dat.long[idxs_long] % 360)[0, 1]
-                offsets[j] += search_vals[np.argmax(cc_coeffs)]
-                print('Maximum correlation at offset: {:f}'.format(offsets[j]))
+            if (min(lon % 360) - max(dat.long % 360)) > 0. or (min(dat.long % 360) - max(lon % 360)) > 0.:
+                raise ValueError('No overlap in longitudes')
+
+            offsets[j] += _guess_offset(decday_interp, dat.lat, dat.long, decday, lat, lon,
+                                        offsets[j])
+            print('Maximum correlation at offset: {:f}'.format(offsets[j]))
 
     for j, dat in enumerate(dats):
         decday_interp = dat.decday.copy()
@@ -439,9 +474,7 @@ def kinematic_gps_control(dats, lat, lon, elev, decday, offset=0.0,
                             fill_value=fill_value)
         if old_gps_gaps:
             # need to redo this, since otherwise we are going to have some out of bounds errors
-            for i,dday in enumerate(decday_interp):
-                if np.min(abs(dday-decday))>1./(24*3600.):
-                    decday_interp[i] = np.nan
+            decday_interp = _gps_gaps(decday_interp, decday)
 
             lat_interp = lat_interpolator(decday_interp)
             long_interp = long_interpolator(decday_interp)
@@ -460,6 +493,107 @@ def kinematic_gps_control(dats, lat, lon, elev, decday, offset=0.0,
             dat.get_projected_coords()
 
 
+def _gps_gaps(radar_decday, decday):
+    """Set radar times more than a second from any GPS time to nan."""
+    gps_times = np.sort(decday[~np.isnan(decday)])
+    ind = np.clip(np.searchsorted(gps_times, radar_decday), 1, len(gps_times) - 1)
+    with np.errstate(invalid='ignore'):
+        nearest = np.minimum(np.abs(radar_decday - gps_times[ind - 1]),
+                             np.abs(radar_decday - gps_times[ind]))
+        radar_decday = radar_decday.copy()
+        radar_decday[nearest > 1. / (24 * 3600.)] = np.nan
+    return radar_decday
+
+
+def _guess_offset(radar_decday, radar_lat, radar_lon, decday, lat, lon, offset,
+                  max_grid=2 ** 22):
+    """Find the change in offset that best lines up the GPS and radar positions.
+
+    Both tracks are resampled onto one uniform time grid, and the correlation
+    of latitude and of longitude is found for every lag at once with FFTs.
+    We search lags within 10% of the offset, or within 0.1 days if the offset
+    is zero, and refine the best lag to a fraction of a grid step with a
+    parabola.
+    """
+    if offset != 0.0:
+        max_lag = 0.1 * abs(offset)
+    else:
+        max_lag = 0.1
+
+    good = ~np.isnan(radar_decday)
+    order = np.argsort(radar_decday[good])
+    times = radar_decday[good][order]
+    gps_good = ~np.isnan(decday)
+    gps_order = np.argsort(decday[gps_good])
+    gps_times = decday[gps_good][gps_order] + offset
+
+    # Step at the radar sampling, or finer if that would not resolve the lags,
+    # but coarser if the grid would be enormous
+    step = max_lag / 100.
+    if len(times) > 1 and np.median(np.diff(times)) > 0.:
+        step = min(np.median(np.diff(times)), step)
+    step = max(step, (times[-1] - times[0] + 2. * max_lag) / max_grid)
+    n_lag = int(max_lag / step)
+    n_radar = int((times[-1] - times[0]) / step) + 1
+    grid = times[0] + step * np.arange(-n_lag, n_radar + n_lag)
+
+    corrs = []
+    for radar_vals, gps_vals in [(radar_lat, lat), (radar_lon % 360, lon % 360)]:
+        radar_grid = np.interp(grid[n_lag:n_lag + n_radar], times, radar_vals[good][order])
+        gps_grid = np.interp(grid, gps_times, gps_vals[gps_good][gps_order],
+                             left=np.nan, right=np.nan)
+        corrs.append(_lagged_correlation(gps_grid, radar_grid))
+    corrs = np.array(corrs)
+
+    no_overlap = np.all(np.isnan(corrs), axis=0)
+    if np.all(no_overlap):
+        raise ValueError('No overlap between the GPS and radar times')
+    score = np.nansum(corrs, axis=0)
+    score[no_overlap] = -np.inf
+    best = np.argmax(score)
+
+    # Refine with a parabola through the peak and its neighbors
+    frac = 0.
+    if 0 < best < len(score) - 1 and np.all(np.isfinite(score[best - 1:best + 2])):
+        curve = score[best - 1] - 2. * score[best] + score[best + 1]
+        if curve < 0.:
+            frac = 0.5 * (score[best - 1] - score[best + 1]) / curve
+    return (n_lag - best - frac) * step
+
+
+def _lagged_correlation(long_series, short_series):
+    """Pearson correlation of short_series with every window of long_series.
+
+    Nans are left out of each correlation, and windows that overlap fewer
+    than half of the valid points in short_series give nan.
+    """
+    long_mask = ~np.isnan(long_series)
+    short_mask = ~np.isnan(short_series)
+    if not np.any(long_mask) or not np.any(short_mask):
+        return np.full((len(long_series) - len(short_series) + 1,), np.nan)
+    long_vals = np.where(long_mask, long_series - np.nanmean(long_series), 0.)
+    short_vals = np.where(short_mask, short_series - np.nanmean(short_series), 0.)
+    long_mask = long_mask.astype(float)
+    short_mask = short_mask.astype(float)
+
+    def xcorr(long_part, short_part):
+        return fftconvolve(long_part, short_part[::-1], mode='valid')
+
+    count = np.round(xcorr(long_mask, short_mask))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sum_long = xcorr(long_vals, short_mask)
+        sum_short = xcorr(long_mask, short_vals)
+        var_long = xcorr(long_vals ** 2, short_mask) - sum_long ** 2 / count
+        var_short = xcorr(long_mask, short_vals ** 2) - sum_short ** 2 / count
+        cov = xcorr(long_vals, short_vals) - sum_long * sum_short / count
+
+        # FFT roundoff can make the variance of a constant series slightly nonzero
+        tol = 1.0e-10 * np.max(np.abs(long_vals)) ** 2 * np.max(np.abs(short_vals)) ** 2 * count ** 2
+        corr = cov / np.sqrt(var_long * var_short)
+        corr[(var_long * var_short <= tol) | (count < max(3, np.sum(short_mask) / 2.))] = np.nan
+    return np.clip(corr, -1., 1.)
+
+
 def kinematic_gps_mat(dats, mat_fn, offset=0.0, extrapolate=False,
                       guess_offset=False, old_gps_gaps=False):
     """Use a matlab file with gps info to redo radar GPS.
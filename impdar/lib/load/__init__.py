@@ -16,6 +16,7 @@ from . import load_mcords  # needs to be imported first and alone due to opaque
 from . import load_gssi, load_pulse_ekko, load_gprMax, load_olaf, load_segy, load_UoA
 from . import load_delores, load_osu, load_stomat, load_ramac, load_bsi, load_tek, load_apres_profile
 from ..RadarData import RadarData
+from ..ImpdarError import ImpdarError
 
 # This should be updated as new functionality arrives
 # executables that accept multiple ftypes should use this
@@ -25,7 +26,7 @@ FILETYPE_OPTIONS = ['mat', 'pe', 'gssi', 'stomat', 'gprMax', 'gecko', 'segy', 'm
                     'ramac', 'tek', 'apres']
 
 
-def load(filetype, fns_in, channel=1, t_srs=None, s_srs=None, *args, **kwargs):
+def load(filetype, fns_in, channel=1, t_srs=None, s_srs=None, *args, workers=1, **kwargs):
     """Load a list of files of a certain type
 
     Parameters
@@ -36,17 +37,38 @@ def load(filetype, fns_in, channel=1, t_srs=None, s_srs=None, *args, **kwargs):
         List of files to load
     channel: Receiver channel that the data were recorded on
         This is primarily for the St. Olaf HF data
+    workers: int, optional
+        Load this many files at once, each in a separate process (see
+        :func:`~impdar.lib.process.run_parallel`). Ignored for gecko and osu,
+        which merge their files, and for lazy or memory-mapped loading, since
+        those data would be copied back from the workers. Default 1.
 
     Returns
     -------
     RadarDataList: list of ~impdar.RadarData (or its subclasses)
-        Objects with relevant radar information
+        Objects with relevant radar information, in the order of fns
     """
     if not isinstance(fns_in, (list, tuple)):
         fns_in = [fns_in]
 
+    if (workers is not None and workers > 1 and len(fns_in) > 1
+            and filetype not in ['gecko', 'osu'] and not kwargs.get('lazy', False)
+            and not kwargs.get('mmap', False)):
+        from ..process import run_parallel
+        results = []
+        failed = run_parallel(_load_file, fns_in, workers, filetype, channel, t_srs, s_srs, args,
+                              kwargs, results=results)
+        if len(failed) > 0:
+            raise ImpdarError('Failed to load {:d} of {:d} files: {:s}'.format(
+                len(failed), len(fns_in), ', '.join(failed)))
+        return [dat for dats in results for dat in dats]
+
     if filetype == 'gssi':
-        dat = [load_gssi.load_gssi(fn) for fn in fns_in]
+        if 'mmap' in kwargs:
+            mmap = kwargs['mmap']
+        else:
+            mmap = False
+        dat = [load_gssi.load_gssi(fn, mmap=mmap) for fn in fns_in]
     elif filetype == 'pe':
         dat = []
         for fn in fns_in:
@@ -74,7 +96,12 @@ def load(filetype, fns_in, channel=1, t_srs=None, s_srs=None, *args, **kwargs):
                 except IOError:
                     print('Could not load ', fn, 'as a Pulse Ekko file.')
     elif filetype == 'mat':
-        dat = [RadarData(fn) for fn in fns_in]
+        # Native h5 files are detected automatically; lazy is only used for them
+        if 'lazy' in kwargs:
+            lazy = kwargs['lazy']
+        else:
+            lazy = False
+        dat = [RadarData(fn, lazy=lazy) for fn in fns_in]
     elif filetype == 'stomat':
         dat = [load_stomat.load_stomat(fn, **kwargs) for fn in fns_in]
     elif filetype == 'gprMax':
@@ -156,7 +183,15 @@ def load(filetype, fns_in, channel=1, t_srs=None, s_srs=None, *args, **kwargs):
     return dat
 
 
-def load_and_exit(filetype, fns_in, channel=1, t_srs=None, s_srs=None, o=None, *args, **kwargs):
+def _load_file(fn, filetype, channel, t_srs, s_srs, args, kwargs):
+    """Load a single file, for use with workers."""
+    dat = load(filetype, fn, channel, t_srs, s_srs, *args, **kwargs)
+    print('Loaded', fn)
+    return dat
+
+
+def load_and_exit(filetype, fns_in, channel=1, t_srs=None, s_srs=None, o=None, *args, workers=1,
+                  **kwargs):
     """Load a list of files of a certain type, save them as StODeep mat files, exit
 
     Parameters
@@ -178,6 +213,9 @@ def load_and_exit(filetype, fns_in, channel=1, t_srs=None, s_srs=None, o=None, *
         This is primarily for the St. Olaf HF data
     t_srs: str, optional
         Convert to this coordinate system. Requires GDAL.
+    workers: int, optional
+        Load and save this many files at once, each in a separate process.
+        Ignored for gecko and osu. Default 1.
     """
     if not isinstance(fns_in, (list, tuple)):
         fns_in = [fns_in]
@@ -192,9 +230,22 @@ def load_and_exit(filetype, fns_in, channel=1, t_srs=None, s_srs=None, o=None, *
         if (len(fns_in) > 1) and (o is not None) and (not os.path.isdir(o)):
             raise FileNotFoundError('The output directory does not exist')
 
-        for fn_i in fns_in:
-            rd_list = load(filetype, fn_i, channel=channel, t_srs=t_srs, s_srs=s_srs, *args, **kwargs)
-            _save(rd_list, outpath=o)
+        if workers is None or workers <= 1:
+            for fn_i in fns_in:
+                rd_list = load(filetype, fn_i, channel=channel, t_srs=t_srs, s_srs=s_srs, *args, **kwargs)
+                _save(rd_list, outpath=o)
+        else:
+            from ..process import run_parallel
+            failed = run_parallel(_load_and_save, fns_in, workers, filetype, channel, t_srs, s_srs, o,
+                                  args, kwargs)
+            if len(failed) > 0:
+                raise ImpdarError('Failed to load {:d} of {:d} files: {:s}'.format(
+                    len(failed), len(fns_in), ', '.join(failed)))
+
+
+def _load_and_save(fn, filetype, channel, t_srs, s_srs, o, args, kwargs):
+    """Load and save a single file, for use with workers."""
+    _save(_load_file(fn, filetype, channel, t_srs, s_srs, args, kwargs), outpath=o)
 
 
 def _save(rd_list, outpath=None):
@@ -32,6 +32,78 @@ def _xmlGetVal(xml, name):
         return None
 
 
+def _xmlGetVals(xmls, name):
+    """Look up a value in each of a list of XML fragments, as floats.
+
+    All the fragments are searched with one regex pass. Missing values, or
+    values that are not numbers, are nan.
+    """
+    text = '\0'.join(xmls)
+    starts = np.cumsum([0] + [len(xml) + 1 for xml in xmls[:-1]])
+    matches = list(re.finditer(r'<Name>{0}</Name>[\r]?\n<Val>([^\0]*?)</Val'.format(
+        name.replace(' ', r'\s')), text, flags=re.IGNORECASE))
+
+    vals = np.full((len(xmls),), np.nan)
+    if len(matches) > 0:
+        # keep the first match in each fragment
+        frag = np.searchsorted(starts, [m.start() for m in matches], side='right') - 1
+        frag, first = np.unique(frag, return_index=True)
+        strs = [matches[i].group(1) for i in first]
+        try:
+            vals[frag] = np.array(strs, dtype=float)
+        except ValueError:
+            # Values that are not numbers (e.g. in traces without a GPS fix) are nan
+            vals[frag] = [_float_or_nan(val) for val in strs]
+    return vals
+
+
+def _float_or_nan(val):
+    """Convert to float, with nan for anything that is not a number."""
+    try:
+        return float(val)
+    except ValueError:
+        return np.nan
+
+
+def _read_chunks(echogram, raw_file, out):
+    """Read a chunked echogram by gathering its chunks from the raw file.
+
+    BSI files store every sample of an echogram as its own chunk, so reading
+    through HDF5 is dominated by looking up the chunks one at a time. Instead,
+    we get all the chunk locations with one chunk_iter call and copy the bytes
+    out of a memmap of the file.
+
+    Returns
+    -------
+    bool
+        False if this dataset (or this version of h5py) does not allow it,
+        in which case out is untouched.
+    """
+    if (echogram.chunks is None or len(echogram.shape) != 1 or not hasattr(echogram.id, 'chunk_iter')
+            or echogram.id.get_create_plist().get_nfilters() != 0):
+        return False
+    chunk_len = echogram.chunks[0]
+    chunk_bytes = chunk_len * echogram.dtype.itemsize
+    chunks = []
+    try:
+        # list.append returns None, which keeps the iteration going
+        echogram.id.chunk_iter(chunks.append)
+    except (NotImplementedError, RuntimeError):
+        return False
+    starts = [chunk.chunk_offset[0] for chunk in chunks]
+    offsets = [chunk.byte_offset for chunk in chunks]
+    if len(starts) * chunk_len < echogram.shape[0]:
+        # unwritten chunks would need the fill value
+        return False
+
+    inds = (np.array(offsets)[:, None] + np.arange(chunk_bytes)[None, :]).flatten()
+    vals = raw_file[inds].view(echogram.dtype).reshape(-1, chunk_len)
+    samples = np.array(starts)[:, None] + np.arange(chunk_len)[None, :]
+    in_bounds = samples < echogram.shape[0]
+    out[samples[in_bounds]] = vals[in_bounds]
+    return True
+
+
 def _dm2dec(dms):
     """Convert the degree - decimal minute GGA to a decimal."""
     return ((dms - dms % 100) / 100 + (dms % 100) / 60)
@@ -76,13 +148,6 @@ def load_bsi(fn_h5, XIPR=True, channel=0., line=None, nans=None, *args, **kwargs
             # We need this for logical file naming later on
             h5_data.fn = os.path.splitext(fn_h5)[0] + dset_name + '.h5'
             h5_data.tnum = len(list(dset.keys()))
-            h5_data.snum = len(
-                dset['location_0']['datacapture_0']['echogram_0'])
-            lat = np.zeros((h5_data.tnum,))
-            lon = np.zeros((h5_data.tnum,))
-            h5_data.elev = np.zeros((h5_data.tnum,))
-            time = np.zeros((h5_data.tnum,))
-            h5_data.data = np.zeros((h5_data.snum, h5_data.tnum))
 
             ch = '0'
             h5_data.chan = 0
@@ -91,7 +156,11 @@ def load_bsi(fn_h5, XIPR=True, channel=0., line=None, nans=None, *args, **kwargs
                     ch = '1'
                     h5_data.chan = 1
 
-            if 'DigitizerMetaData_xml' in dset['location_0']['datacapture_'+ch]['echogram_'+ch].attrs:
+            # Look up every echogram once
+            echograms = [dset['location_{:d}/datacapture_{:s}/echogram_{:s}'.format(
+                location_num, ch, ch)] for location_num in range(h5_data.tnum)]
+
+            if 'DigitizerMetaData_xml' in echograms[0].attrs:
                 # OLD VARIABLE NAMES FOR BSI (Pre-2023)
                 dig_meta_str = 'DigitizerMetaData_xml'
                 gps_cluster_str = 'GPSData_xml'
@@ -114,52 +183,44 @@ def load_bsi(fn_h5, XIPR=True, channel=0., line=None, nans=None, *args, **kwargs
                 gps_timestamp_str = 'GPS_timestamp_UTC'
                 alt_asl = 'Alt_ASL_m'
 
-            if type(dset['location_0']['datacapture_'+ch]['echogram_'+ch].attrs[dig_meta_str]) == str:
-                digitizer_data = dset['location_0']['datacapture_'+ch][
-                    'echogram_'+ch].attrs[dig_meta_str]
+            if type(echograms[0].attrs[dig_meta_str]) == str:
+                digitizer_data = echograms[0].attrs[dig_meta_str]
             else:
-                digitizer_data = dset['location_0']['datacapture_'+ch][
-                    'echogram_'+ch].attrs[dig_meta_str].decode('utf-8')
-            for location_num in range(h5_data.tnum):
-                # apparently settings can change mid-line
-                nsamps = dset['location_{:d}'.format(location_num)]['datacapture_'+ch]['echogram_'+ch].shape[0]
-                if nsamps > h5_data.snum:
-                    h5_data.data = np.vstack((h5_data.data, np.zeros((nsamps - h5_data.snum, h5_data.tnum))))
-                    h5_data.snum = nsamps
-                h5_data.data[:, location_num] = dset[
-                    'location_{:d}'.format(location_num)][
-                        'datacapture_'+ch]['echogram_'+ch]
-                if type(dset['location_{:d}'.format(location_num)][
-                    'datacapture_'+ch]['echogram_'+ch].attrs[
-                        gps_cluster_str]) == str:
-                    gps_data = dset['location_{:d}'.format(location_num)][
-                        'datacapture_'+ch]['echogram_'+ch].attrs[
-                            gps_cluster_str]
-                else:
-                    gps_data = dset['location_{:d}'.format(location_num)][
-                        'datacapture_'+ch]['echogram_'+ch].attrs[
-                            gps_cluster_str].decode('utf-8')
-                if (float(_xmlGetVal(gps_data, gps_fix_str)) > 0) and (
-                        float(_xmlGetVal(gps_data, gps_message_str)) > 0):
-                    for lname, sign in [('Lat', 1), ('Lat_N', 1), ('Lat_S', -1)]:
-                        if _xmlGetVal(gps_data, lname) is not None:
-                            lat[location_num] = sign * float(_xmlGetVal(gps_data, lname))
-                            break
-                    else:
-                        lat[location_num] = np.nan
-                    for lname, sign in [('Long', 1), ('Long_ E', 1), ('Long_ W', -1)]:
-                        if _xmlGetVal(gps_data, lname) is not None:
-                            lon[location_num] = sign * float(_xmlGetVal(gps_data, lname))
-                            break
-                    else:
-                        lon[location_num] = np.nan
-                    time[location_num] = float(_xmlGetVal(gps_data, gps_timestamp_str))
-                    h5_data.elev[location_num] = float(_xmlGetVal(gps_data, alt_asl))
-                else:
-                    lat[location_num] = np.nan
-                    lon[location_num] = np.nan
-                    time[location_num] = np.nan
-                    h5_data.elev[location_num] = np.nan
+                digitizer_data = echograms[0].attrs[dig_meta_str].decode('utf-8')
+
+            # apparently settings can change mid-line, so size for the longest trace.
+            # Read trace by trace into the rows of a transposed array so that
+            # each read is contiguous
+            nsamps = [echogram.shape[0] for echogram in echograms]
+            h5_data.snum = max(nsamps)
+            data_t = np.zeros((h5_data.tnum, h5_data.snum))
+            raw_file = np.memmap(fn_h5, dtype=np.uint8, mode='r')
+            gps_xml = []
+            for location_num, echogram in enumerate(echograms):
+                if not _read_chunks(echogram, raw_file, data_t[location_num, :nsamps[location_num]]):
+                    echogram.read_direct(data_t, dest_sel=np.s_[location_num, :nsamps[location_num]])
+                gps_data = echogram.attrs[gps_cluster_str]
+                if type(gps_data) != str:
+                    gps_data = gps_data.decode('utf-8')
+                gps_xml.append(gps_data)
+            h5_data.data = data_t.transpose()
+            del raw_file
+
+            with np.errstate(invalid='ignore'):
+                good_gps = (_xmlGetVals(gps_xml, gps_fix_str) > 0) & (
+                    _xmlGetVals(gps_xml, gps_message_str) > 0)
+            lat = np.full((h5_data.tnum,), np.nan)
+            for lname, sign in [('Lat_S', -1), ('Lat_N', 1), ('Lat', 1)]:
+                vals = _xmlGetVals(gps_xml, lname)
+                lat[~np.isnan(vals)] = sign * vals[~np.isnan(vals)]
+            lon = np.full((h5_data.tnum,), np.nan)
+            for lname, sign in [('Long_ W', -1), ('Long_ E', 1), ('Long', 1)]:
+                vals = _xmlGetVals(gps_xml, lname)
+                lon[~np.isnan(vals)] = sign * vals[~np.isnan(vals)]
+            lat[~good_gps] = np.nan
+            lon[~good_gps] = np.nan
+            time = np.where(good_gps, _xmlGetVals(gps_xml, gps_timestamp_str), np.nan)
+            h5_data.elev = np.where(good_gps, _xmlGetVals(gps_xml, alt_asl), np.nan)
             ##error removed that was throwing off time vector - emma 4.2024
             h5_data.dt = 1.0 / float(
                 _xmlGetVal(digitizer_data, sample_rate_str))
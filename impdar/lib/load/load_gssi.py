@@ -89,67 +89,99 @@ def _get_dzg_data(fn_dzg, trace_nums):
         lines = f_in.readlines()
     # We have to be careful with this to permit other NMEA strings to have been recorded
     # and to be sure that the indices line up
-    all_gga_inds = [i for i, line in enumerate(lines) if '$GPGGA' == line.split(',')[0]]
-
-    # Get the corresponding GSSI trace numbers
-    all_gssis_inds = np.array([i for i, line in enumerate(lines) if line.split(',')[0] == '$GSSIS'])
-    gssis_inds = []
-    gga_inds = []
-    for i, lineind in enumerate(all_gga_inds):
-        if i == 0:
-            prevind = 0
-        else:
-            prevind = all_gga_inds[i - 1]
-        rel_inds = all_gssis_inds[np.logical_and(all_gssis_inds < lineind, all_gssis_inds > prevind)]
-        if len(rel_inds) > 0:
-            try:
-                # we can still have bad GSSI strings
-                if float(lines[np.max(rel_inds)].split(',')[1]).is_integer():
-                    gssis_inds.append(np.max(rel_inds))
-                    gga_inds.append(lineind)
-            except ValueError:
-                continue
-
-    # we may have some records without GGA, so check if this is the case;
-    # we keep track of the offset if so
-    gssis_inds_keep = []
-    offset_ind = 0
-    for i, j in enumerate(gssis_inds[:-1]):
-        if (gga_inds[i + offset_ind] > j and gga_inds[i + offset_ind] < gssis_inds[i + 1]):
-            gssis_inds_keep.append(j)
-        else:
-            offset_ind -= 1
-    if gga_inds[-1] > gssis_inds[-1]:
-        gssis_inds_keep.append(gssis_inds[-1])
-
-    scans = np.array(list(map(lambda x: int(x.split(',')[1]),
-                              [line for i, line in enumerate(lines) if i in gssis_inds_keep])))
-    data = RadarGPS([line for i, line in enumerate(lines) if i in gga_inds], scans, trace_nums)
+    sentence_types = np.array([line.split(',', 1)[0] for line in lines])
+    all_gga_inds = np.flatnonzero(sentence_types == '$GPGGA')
+    all_gssis_inds = np.flatnonzero(sentence_types == '$GSSIS')
+
+    # Each GGA goes with the last GSSIS since the previous GGA
+    last_gssis = np.searchsorted(all_gssis_inds, all_gga_inds) - 1
+    prev_gga = np.hstack(([0], all_gga_inds[:-1]))
+    has_gssis = last_gssis >= 0
+    has_gssis[has_gssis] = all_gssis_inds[last_gssis[has_gssis]] > prev_gga[has_gssis]
+    gga_inds = all_gga_inds[has_gssis]
+    gssis_inds = all_gssis_inds[last_gssis[has_gssis]]
+
+    # we can still have bad GSSI strings
+    scans = np.full((len(gssis_inds),), np.nan)
+    for i, lineind in enumerate(gssis_inds):
+        try:
+            scans[i] = float(lines[lineind].split(',')[1])
+        except (ValueError, IndexError):
+            continue
+    good_scans = np.mod(scans, 1) == 0
+
+    data = RadarGPS([lines[i] for i in gga_inds[good_scans]], scans[good_scans].astype(int),
+                    trace_nums)
     return data
 
 
-def load_gssi(fn_dzt, *args, **kwargs):
+def _read_dzt_data(fn_dzt, snum, np_dtype, header_len, mmap=False):
+    """Read the samples after the header straight into an (snum x tnum) array.
+
+    The samples are stored trace by trace, so the reshape is in Fortran order
+    and does not copy. With mmap the file is mapped read-only, and nothing is
+    read until the map is used.
+    """
+    n_vals = (os.path.getsize(fn_dzt) - header_len) // np.dtype(np_dtype).itemsize
+    if mmap:
+        data = np.memmap(fn_dzt, dtype=np_dtype, mode='r', offset=header_len, shape=(n_vals,))
+    else:
+        data = np.fromfile(fn_dzt, dtype=np_dtype, count=n_vals, offset=header_len)
+    return data.reshape((snum, -1), order='F')
+
+
+def _fix_first_samples(data):
+    """Replace the first two samples of each trace, which hold no signal, with the third."""
+    data[0, :] = data[2, :]
+    data[1, :] = data[2, :]
+
+
+class _MappedDZTData(object):
+    """The samples of a .DZT file, mapped from disk and only read when needed."""
+
+    def __init__(self, data):
+        self._data = data
+        self.shape = data.shape
+        self.dtype = data.dtype
+
+    def read(self, start=None, end=None):
+        """Read traces start:end (by default, all of them) into memory."""
+        data = np.array(self._data[:, start:end])
+        _fix_first_samples(data)
+        return data
+
+
+def load_gssi(fn_dzt, *args, mmap=False, **kwargs):
     """Return a RadarData object with the information from a gssi file
 
     This reader is has many commented-out liens to read everything from the GSSI header.
     I left this in there the in the hopes that it will be useful to somebody,
     but ImpDAR does not use all this information
+
+    Parameters
+    ----------
+    fn_dzt: str
+        The .DZT file to read
+    mmap: bool, optional
+        Map the file rather than reading the data. The data are read into
+        memory when the data attribute is first used, but
+        :func:`process_streaming <impdar.lib.process.process_streaming>` and
+        :meth:`save_h5 <impdar.lib.RadarData.RadarData.save_h5>` only read
+        them block by block. The data are the same either way. Default False.
     """
     dzt_data = RadarData(None)
     dzt_data.fn = fn_dzt
     with open(fn_dzt, 'rb') as fid:
-        lines = fid.read()
+        lines = fid.read(1024)
     # tag = struct.unpack('<H', lines[0:2])[0]
     # data = struct.unpack('<H', lines[2:4])[0]
     dzt_data.snum = struct.unpack('<H', lines[4:6])[0]
     bits = struct.unpack('<H', lines[6:8])[0]
     n_bytes = bits // 8
     if bits == 32:
-        us_dattype = 'I'
-        np_dtype = np.int32
+        np_dtype = '<i4'
     elif bits == 16:
-        us_dattype = 'H'
-        np_dtype = np.int16
+        np_dtype = '<i2'
     # if bits == 32:
     #     s_dattype = 'i'
     # elif bits == 16:
@@ -197,23 +229,21 @@ def load_gssi(fn_dzt, *args, **kwargs):
     #               lines[130 + bytes * Gain + ntext:130 + bytes * Gain + ntext + nproc])[0]
     # else:
     #     processing = ''
-    try:
-        header_len = 32768*n_bytes  # TODO: David originally had this as 36*4096, we still need to figure out when it changes
-        try:
-            data = np.array(struct.unpack('<{:d}'.format((len(lines) - header_len) // n_bytes) + us_dattype, lines[header_len:])).astype(np_dtype).reshape((dzt_data.snum, -1), order='F')
-        except OverflowError:
-            # This is needed on Windows for some reason--I think if OS is 32 bit?
-            data = np.array(struct.unpack('<{:d}'.format((len(lines) - header_len) // n_bytes) + us_dattype, lines[header_len:])).astype(np.int64).reshape((dzt_data.snum, -1), order='F')
-    except IndexError:
-        header_len = 512*n_bytes
-        data = np.array(struct.unpack('<{:d}'.format((len(lines) - header_len) // n_bytes) + us_dattype, lines[header_len:])).astype(np_dtype).reshape((dzt_data.snum, -1), order='F')
-    data[0, :] = data[2, :]
-    data[1, :] = data[2, :]
+    header_len = 32768 * n_bytes  # TODO: David originally had this as 36*4096, we still need to figure out when it changes
+    if os.path.getsize(fn_dzt) <= header_len:
+        header_len = 512 * n_bytes
+    data = _read_dzt_data(fn_dzt, dzt_data.snum, np_dtype, header_len, mmap=mmap)
     # data = data + dzt_data.trig
-    dzt_data.data = data
+    if mmap:
+        # The first samples are fixed as the traces are read
+        del dzt_data.data
+        dzt_data._lazy_data = _MappedDZTData(data)
+    else:
+        _fix_first_samples(data)
+        dzt_data.data = data
 
-    dzt_data.tnum = dzt_data.data.shape[1]
-    dzt_data.trace_num = np.arange(dzt_data.data.shape[1]) + 1
+    dzt_data.tnum = data.shape[1]
+    dzt_data.trace_num = np.arange(dzt_data.tnum) + 1
     dzt_data.trig_level = 0.
     dzt_data.trig = struct.unpack('<h', lines[8:10])[0] * np.ones(dzt_data.tnum)
 
@@ -242,14 +272,14 @@ def load_gssi(fn_dzt, *args, **kwargs):
                                         np.diff(dzt_data.dist)))
 
     else:
-        dzt_data.lat = np.zeros((dzt_data.data.shape[1],))
-        dzt_data.long = np.zeros((dzt_data.data.shape[1],))
-        dzt_data.x_coord = np.zeros((dzt_data.data.shape[1],))
-        dzt_data.y_coord = np.zeros((dzt_data.data.shape[1],))
-        dzt_data.dist = np.zeros((dzt_data.data.shape[1],))
-        dzt_data.elev = np.zeros((dzt_data.data.shape[1],))
-        dzt_data.decday = np.arange(dzt_data.data.shape[1])
-        dzt_data.trace_int = np.ones((dzt_data.data.shape[1],))
+        dzt_data.lat = np.zeros((dzt_data.tnum,))
+        dzt_data.long = np.zeros((dzt_data.tnum,))
+        dzt_data.x_coord = np.zeros((dzt_data.tnum,))
+        dzt_data.y_coord = np.zeros((dzt_data.tnum,))
+        dzt_data.dist = np.zeros((dzt_data.tnum,))
+        dzt_data.elev = np.zeros((dzt_data.tnum,))
+        dzt_data.decday = np.arange(dzt_data.tnum)
+        dzt_data.trace_int = np.ones((dzt_data.tnum,))
 
     dzt_data.check_attrs()
     return dzt_data
@@ -202,13 +202,15 @@ class Channel:
 class ChannelData:
     """Full data for radar channel."""
 
-    def __init__(self, lines, sinfo):
-        """Read in binary data.
+    def __init__(self, headers, data, sinfo):
+        """Unpack the decoded trace records.
 
         Parameters
         ----------
-        lines: bytes
-            the binary data
+        headers: np.ndarray
+            Structured array with the headers of this channel's records
+        data: np.ndarray
+            (traces x samples) data of this channel's records
         sinfo: SInfo
             information needed to make sense of the binary data
         """
@@ -217,115 +219,110 @@ class ChannelData:
                                      (sinfo.post_trigger_depth)
                                      ) * 1. / sinfo.samp_freq
 
-        # I am going to preallocate because I think it should be possible
-        # This is not actually true since we could have comments
-        self.n_trace = np.zeros((sinfo.tnum, ))
-        self.time = np.zeros((sinfo.tnum, ))
-        self.trace_interval = np.zeros((sinfo.tnum, ))
-        self.trigger_level = np.zeros((sinfo.tnum, ))
-        self.lat = np.zeros((sinfo.tnum, ))
-        self.long = np.zeros((sinfo.tnum, ))
-        self.altitude = np.zeros((sinfo.tnum, ))
-        self.gps_resolution = np.zeros((sinfo.tnum, ))
-        self.data = np.zeros((sinfo.snum, sinfo.tnum))
-
-        # These will often be empty, but leave here so we don't have missing attributes
-        self.odometer = np.zeros((sinfo.tnum, ))
-        self.pressure = np.zeros((sinfo.tnum, ))
-
-    def read_trace(self, lines, sinfo, n_trc):
-        """Ingest binary trace information
-
-        Parameters
-        ----------
-        lines: bytes
-            The binary data
-        sinfo: SInfo
-            The overall collection info
-        n_trc: int
-            The trace under consideration
-        """
-        n_header_type = struct.unpack('<B', lines[sinfo.offset: sinfo.offset + 1])[0]
-
-        # I'm rolling with a separate offset counter so i can work on guessing at tnum
-        offset = 2
-
         # Trace number in file set
-        self.n_trace[n_trc] = struct.unpack('<i', lines[sinfo.offset + offset:
-                                                        sinfo.offset + offset + 4])[0]
-        offset += 4
-
+        self.n_trace = headers['n_trace'].astype(float)
         # Decimal day from 1 Jan 1970.
-        n_time = struct.unpack('<d', lines[sinfo.offset + offset:sinfo.offset + offset + 8])[0]
-        offset += 8
         # We add an offset to 1 Jan 1970 to get MATLAB date numbers
-        self.time[n_trc] = n_time + datetime.date.toordinal(datetime.date(1970, 1, 1)) + 366.
-
-        # Stacks/trace unless record mode is stacks, when it is
-        # time/trace
-        self.trace_interval[n_trc] = struct.unpack('<f', lines[sinfo.offset + offset:
-                                                               sinfo.offset + offset + 4])[0]
-        offset += 4
-
+        self.time = headers['time'] + datetime.date.toordinal(datetime.date(1970, 1, 1)) + 366.
+        # Stacks/trace unless record mode is stacks, when it is time/trace
+        self.trace_interval = headers['trace_interval'].astype(float)
         # Trigger level in percentage of input range in mV
-        self.trigger_level[n_trc] = struct.unpack('<H', lines[sinfo.offset + offset:
-                                                              sinfo.offset + offset + 2])[0]
-        offset += 2
+        self.trigger_level = headers['trigger_level'].astype(float)
+        self.lat = headers['lat'].astype(float)
+        self.long = headers['long'].astype(float)
+        self.altitude = headers['altitude'].astype(float)
+        self.gps_resolution = headers['gps_resolution'].astype(float)
+        self.data = data.transpose().astype(float)
 
+        # These will often be empty, but leave here so we don't have missing attributes
         if sinfo.version < 3.21:
-            # Odometer readings (0 if no Odometer is used)
-            self.odometer[n_trc] = struct.unpack('<f', lines[sinfo.offset + offset:
-                                                             sinfo.offset + offset + 4])[0]
-            offset += 4
-
-            # Pressure gauge (0 if no pressure gauge is used)
-            self.pressure[n_trc] = struct.unpack('<f', lines[sinfo.offset + offset:
-                                                             sinfo.offset + offset + 4])[0]
-            offset += 4
-
-        # GPS Latitude
-        self.lat[n_trc] = struct.unpack('<d', lines[sinfo.offset + offset:
-                                                    sinfo.offset + offset + 8])[0]
-        offset += 8
-
-        # GPS longitude
-        self.long[n_trc] = struct.unpack('<d', lines[sinfo.offset + offset:
-                                                     sinfo.offset + offset + 8])[0]
-        offset += 8
-
-        # GPS altitude
-        self.altitude[n_trc] = struct.unpack('<f', lines[sinfo.offset + offset:
-                                                         sinfo.offset + offset + 4])[0]
-        offset += 4
-
-        # GPS accuracy
-        self.gps_resolution[n_trc] = struct.unpack('<f', lines[sinfo.offset + offset:
-                                                               sinfo.offset + offset + 4])[0]
-        offset += 4
-
-        # Read and toss last blank bytes
-        # (Only needed for pre 3.6 version)
-        if sinfo.version < 3.6:
-            if sinfo.version < 3.2:
-                offset += 12
-            else:
-                offset += 14
-
-        # If it is actual radar data, not a comment or marker
+            self.odometer = headers['odometer'].astype(float)
+            self.pressure = headers['pressure'].astype(float)
+        else:
+            self.odometer = np.zeros((len(headers), ))
+            self.pressure = np.zeros((len(headers), ))
+
+
+def _trace_header_fields(version):
+    """The layout of the header at the start of each trace record."""
+    fields = [('header_type', 'u1'), ('blank1', 'u1'), ('n_trace', '<i4'), ('time', '<f8'),
+              ('trace_interval', '<f4'), ('trigger_level', '<u2')]
+    if version < 3.21:
+        # Odometer and pressure gauge readings (0 if not used)
+        fields += [('odometer', '<f4'), ('pressure', '<f4')]
+    fields += [('lat', '<f8'), ('long', '<f8'), ('altitude', '<f4'), ('gps_resolution', '<f4')]
+    # Blank bytes at the end (Only needed for pre 3.6 version)
+    if version < 3.2:
+        fields.append(('blank2', 'V12'))
+    elif version < 3.6:
+        fields.append(('blank2', 'V14'))
+    return fields
+
+
+def _read_records(lines, sinfo):
+    """Decode all the trace records in a file at once.
+
+    Records are radar data (header type 0), markers (type 1), or comments,
+    interleaved by channel.
+
+    Parameters
+    ----------
+    lines: bytes
+        The binary data
+    sinfo: SInfo
+        The overall collection info
+
+    Returns
+    -------
+    headers: np.ndarray
+        Structured array with the header of every record
+    data: np.ndarray
+        (records x snum) samples of every record, zero for markers and comments
+    """
+    head = np.dtype(_trace_header_fields(sinfo.version))
+    rec_len = head.itemsize + 2 * sinfo.snum
+
+    # Usually every record is radar data, so they all have the same length
+    n_rec = max((len(lines) - sinfo.offset) // rec_len, 0)
+    types = np.frombuffer(lines, dtype=np.uint8, count=n_rec * rec_len,
+                          offset=min(sinfo.offset, len(lines)))[::rec_len]
+    if np.all(types == 0) and len(lines) - sinfo.offset - n_rec * rec_len < head.itemsize:
+        starts = sinfo.offset + rec_len * np.arange(n_rec)
+    else:
+        starts, types = _walk_records(lines, sinfo.offset, head.itemsize, rec_len)
+
+    raw = np.frombuffer(lines, dtype=np.uint8)
+    headers = raw[starts[:, None] + np.arange(head.itemsize)[None, :]].view(head)[:, 0]
+
+    # Copy the samples a run of adjacent radar records at a time
+    data = np.zeros((len(starts), sinfo.snum), dtype=np.int16)
+    is_data = np.flatnonzero(types == 0)
+    for run in np.split(is_data, np.flatnonzero(np.diff(starts[is_data]) != rec_len) + 1):
+        if len(run) > 0:
+            data[run] = np.ndarray((len(run), sinfo.snum), dtype='<i2', buffer=lines,
+                                   offset=starts[run[0]] + head.itemsize, strides=(rec_len, 2))
+    return headers, data
+
+
+def _walk_records(lines, offset, head_len, rec_len):
+    """Find the start and type of each record when they are not all radar data."""
+    starts = []
+    types = []
+    while offset + head_len <= len(lines):
+        n_header_type = lines[offset]
         if n_header_type == 0:
-            # Read the trace data
-            newdata = struct.unpack('<{:d}h'.format(sinfo.snum),
-                                    lines[sinfo.offset + offset:
-                                          sinfo.offset + offset + 2 * sinfo.snum])
-            offset += 2 * sinfo.snum
-            # Store data
-            # Total number of data points
-            self.data[:, n_trc] = newdata
+            length = rec_len
         elif n_header_type == 1:
-            # Toss marker information
-            offset += 38
-
-        sinfo.offset += offset
+            # Marker information
+            length = head_len + 38
+        else:
+            length = head_len
+        if offset + length > len(lines):
+            break
+        starts.append(offset)
+        types.append(n_header_type)
+        offset += length
+    return np.array(starts, dtype=int), np.array(types, dtype=int)
 
 
 def load_olaf(fns_olaf, channel=1):
@@ -347,19 +344,15 @@ def load_olaf(fns_olaf, channel=1):
 
         # Header information
         sinfo.append(SInfo(lines))
-
-        # Data is stored per trace. Make a container
-        s_i = [ChannelData(lines, sinfo[i]) for j in range(sinfo[i].n_channels)]
-
-        # Read trace-by-trace, channel-by-channel
-        for n_trc in range(sinfo[i].tnum):
-            try:
-                for s_j in s_i:
-                    s_j.read_trace(lines, sinfo[i], n_trc)
-            except:
-                continue
-
-        stacks.append(s_i[channel - 1])
+        if channel > sinfo[i].n_channels:
+            raise ValueError('{:s} only has {:d} channels'.format(fn_i, sinfo[i].n_channels))
+
+        # Data is stored trace-by-trace, channel-by-channel. Drop any incomplete trace at the end
+        headers, data = _read_records(lines, sinfo[i])
+        sinfo[i].tnum = len(headers) // sinfo[i].n_channels
+        n_rec = sinfo[i].tnum * sinfo[i].n_channels
+        stacks.append(ChannelData(headers[channel - 1:n_rec:sinfo[i].n_channels],
+                                  data[channel - 1:n_rec:sinfo[i].n_channels], sinfo[i]))
 
     # I don't know if we actually want to do this, but the filenaming scheme is wacky and this
     # will make any logical collection look good
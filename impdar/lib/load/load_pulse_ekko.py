@@ -16,7 +16,6 @@ Read Pulse Ekko data.
 """
 
 import os.path
-import struct
 import datetime
 import numpy as np
 
@@ -28,52 +27,42 @@ from ..RadarFlags import RadarFlags
 class TraceHeaders:
     """Class used internally to handle pulse-ekko headers."""
 
-    def __init__(self, tnum):
-        """Create a container for all the trace headers."""
-        self.header_index = 0
-        self.trace_numbers = np.zeros((1, tnum))
-        self.positions = np.zeros((1, tnum))
-        self.points_per_trace = np.zeros((1, tnum))
-        self.topography = np.zeros((1, tnum))
-        self.bytes_per_point = np.zeros((1, tnum))
-        self.n_stackes = np.zeros((1, tnum))
-        self.time_window = np.zeros((1, tnum))
-        self.pos = np.zeros((3, tnum))
-        self.receive = np.zeros((3, tnum))
-        self.transmit = np.zeros((3, tnum))
-        self.tz_adjustment = np.zeros((1, tnum))
-        self.zero_flag = np.zeros((1, tnum))
-        self.time_of_day = np.zeros((1, tnum))
-        self.comment_flag = np.zeros((1, tnum))
-        self.comment = ['' for i in range(tnum)]
-
-    def get_header(self, offset, f_lines):
-        """Get the header information for a single trace."""
-        header = struct.unpack('<25f', f_lines[offset: offset + 25 * 4])
-        comment = struct.unpack('<28c',
-                                f_lines[offset + 25 * 4: offset + 25 * 4 + 28])
-        self.trace_numbers[0, self.header_index] = header[0]
-        self.positions[0, self.header_index] = header[1]
-        self.points_per_trace[0, self.header_index] = header[2]
-        self.topography[0, self.header_index] = header[3]
-        self.bytes_per_point[0, self.header_index] = header[5]
-        self.n_stackes[0, self.header_index] = header[7]
-        self.time_window[0, self.header_index] = header[8]
-        self.pos[0, self.header_index] = header[9]
-        self.pos[1, self.header_index] = header[11]
-        self.pos[2, self.header_index] = header[13]
-        self.receive[0, self.header_index] = header[14]
-        self.receive[1, self.header_index] = header[15]
-        self.receive[2, self.header_index] = header[16]
-        self.transmit[0, self.header_index] = header[17]
-        self.transmit[1, self.header_index] = header[18]
-        self.transmit[2, self.header_index] = header[19]
-        self.tz_adjustment[0, self.header_index] = header[20]
-        self.zero_flag[0, self.header_index] = header[21]
-        self.time_of_day[0, self.header_index] = header[23]
-        self.comment_flag[0, self.header_index] = header[24]
-        self.comment[self.header_index] = str(comment[0])
-        self.header_index += 1
+    def __init__(self, headers, comments):
+        """Wrap the headers of all the traces.
+
+        The attributes are views into the header array, so nothing is copied.
+
+        Parameters
+        ----------
+        headers: np.ndarray
+            (tnum x 25) header values of every trace
+        comments: np.ndarray
+            The 28-byte comment of every trace
+        """
+        self.trace_numbers = headers[None, :, 0]
+        self.positions = headers[None, :, 1]
+        self.points_per_trace = headers[None, :, 2]
+        self.topography = headers[None, :, 3]
+        self.bytes_per_point = headers[None, :, 5]
+        self.n_stackes = headers[None, :, 7]
+        self.time_window = headers[None, :, 8]
+        self.pos = headers[:, 9:14:2].transpose()
+        self.receive = headers[:, 14:17].transpose()
+        self.transmit = headers[:, 17:20].transpose()
+        self.tz_adjustment = headers[None, :, 20]
+        self.zero_flag = headers[None, :, 21]
+        self.time_of_day = headers[None, :, 23]
+        self.comment_flag = headers[None, :, 24]
+        self.comment = comments
+
+
+def _trace_dtype(version, snum):
+    """The layout of one trace record in a .DT1 file."""
+    if version == '1.0':
+        sample = '<i2'
+    else:
+        sample = '<f4'
+    return np.dtype([('header', '<f4', (25, )), ('comment', 'S28'), ('data', sample, (snum, ))])
 
 
 def _get_gps_data(fn_gps, trace_nums):
@@ -209,30 +198,18 @@ def load_pe(fn_dt1, *args, **kwargs):
 
         day_offset = datetime.datetime(doy[0], doy[1], doy[2], 0, 0, 0)
 
-    if pe_data.version == '1.0':
-        pe_data.data = np.zeros((pe_data.snum, pe_data.tnum), dtype=np.int16)
-    else:
-        pe_data.data = np.zeros((pe_data.snum, pe_data.tnum), dtype=np.float32)
-
-    pe_data.traceheaders = TraceHeaders(pe_data.tnum)
     with open(true_fn, 'rb') as fin:
         lines = fin.read()
 
-    offset = 0
-    for i in range(pe_data.tnum):
-        pe_data.traceheaders.get_header(offset, lines)
-        offset += 25 * 4 + 28
-        if pe_data.version == '1.0':
-            trace = struct.unpack('<{:d}h'.format(pe_data.snum),
-                                  lines[offset: offset + pe_data.snum * 2])
-            offset += pe_data.snum * 2
-        else:
-            fmt = '<%df' % (len(lines[offset: offset + pe_data.snum * 4]) // 4)
-            trace = struct.unpack(fmt, lines[offset:offset + pe_data.snum * 4])
-            offset += pe_data.snum * 4
+    # Every trace has the same length, so we can view the whole file at once
+    traces = np.frombuffer(lines, dtype=_trace_dtype(pe_data.version, pe_data.snum),
+                           count=pe_data.tnum)
+    pe_data.traceheaders = TraceHeaders(traces['header'], traces['comment'])
 
-        trace -= np.nanmean(trace[:100])
-        pe_data.data[:, i] = trace.copy()
+    # Remove the mean of the first 100 samples from each trace
+    data = traces['data']
+    data = data - np.nanmean(data[:, :100], axis=1, dtype=np.float64)[:, None]
+    pe_data.data = np.ascontiguousarray(data.transpose(), dtype=traces['data'].dtype)
 
     # known vars that are not really set
     pe_data.chan = 1
@@ -273,7 +250,7 @@ def load_pe(fn_dt1, *args, **kwargs):
         pe_data.elev = np.zeros((pe_data.data.shape[1],))
         pe_data.trace_int = np.ones((pe_data.data.shape[1],))
 
-        seconds_of_day = pe_data.traceheaders.time_of_day.flatten()
+        seconds_of_day = pe_data.traceheaders.time_of_day.flatten().astype(float)
         pe_data.decday = day_offset.toordinal() + 366. + seconds_of_day/60./60./24.
 
     pe_data.check_attrs()
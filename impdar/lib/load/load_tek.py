@@ -20,15 +20,82 @@ from ..RadarData import RadarData
 from ..RadarFlags import RadarFlags
 
 
-def fread(fid, nelements, dtype):
-    """Equivalent to Matlab fread function"""
-    if dtype is str:
-        dt = np.uint8  # WARNING: assuming 8-bit ASCII for str!
-    else:
-        dt = dtype
-    data_array = np.fromfile(fid, dt, nelements)
-    data_array.shape = (nelements, 1)
-    return data_array
+# Each record is this header followed by `length` unsigned 16-bit samples
+TEK_HEADER = np.dtype([('decday', '<f4'), ('wheel_count', '<u2'), ('pressure', '<i2'),
+                       ('yinc', '<f4'), ('xinc', '<f4'), ('averages', '<u2'), ('length', '<u2')])
+
+
+def _record_starts(lines):
+    """Find where each complete record in a TEK file starts.
+
+    A truncated record at the end of the file is dropped.
+
+    Parameters
+    ----------
+    lines: bytes
+        The contents of the file
+
+    Returns
+    -------
+    starts: np.ndarray
+        Byte offset of each record
+    """
+    head_len = TEK_HEADER.itemsize
+    len_offset = TEK_HEADER.fields['length'][1]
+    if len(lines) < head_len:
+        return np.zeros((0, ), dtype=int)
+
+    # Usually every record has the same length, which we can check all at once
+    rec_len = head_len + 2 * int.from_bytes(lines[len_offset:len_offset + 2], 'little')
+    n_rec = len(lines) // rec_len
+    lengths = np.ndarray((n_rec, ), dtype='<u2', buffer=lines, offset=len_offset,
+                         strides=(rec_len, ))
+    if n_rec > 0 and np.all(lengths == lengths[0]) and len(lines) - n_rec * rec_len < head_len:
+        return rec_len * np.arange(n_rec)
+
+    starts = []
+    offset = 0
+    while offset + head_len <= len(lines):
+        length = int.from_bytes(lines[offset + len_offset:offset + len_offset + 2], 'little')
+        if offset + head_len + 2 * length > len(lines):
+            break
+        starts.append(offset)
+        offset += head_len + 2 * length
+    return np.array(starts, dtype=int)
+
+
+def _read_records(lines):
+    """Read all the records in a TEK file at once.
+
+    Records shorter than the longest are padded with the midpoint value, 512.
+
+    Parameters
+    ----------
+    lines: bytes
+        The contents of the file
+
+    Returns
+    -------
+    headers: np.ndarray
+        Structured array with the header of every record
+    data: np.ndarray
+        (records x samples) raw data
+    """
+    starts = _record_starts(lines)
+    raw = np.frombuffer(lines, dtype=np.uint8)
+    headers = raw[starts[:, None] + np.arange(TEK_HEADER.itemsize)[None, :]].view(TEK_HEADER)[:, 0]
+
+    snum = np.max(headers['length']) if len(headers) > 0 else 0
+    data = np.full((len(headers), snum), 512, dtype=np.ushort)
+    # Copy runs of adjacent records with the same length using strided views
+    breaks = np.flatnonzero(np.diff(headers['length'].astype(int)) != 0) + 1
+    for run in np.split(np.arange(len(headers)), breaks):
+        if len(run) > 0:
+            length = headers['length'][run[0]]
+            data[run, :length] = np.ndarray((len(run), length), dtype='<u2', buffer=lines,
+                                            offset=starts[run[0]] + TEK_HEADER.itemsize,
+                                            strides=(TEK_HEADER.itemsize + 2 * length, 2))
+    return headers, data
 
 
 def load_tek(fn_tek, magnets_per_wheel=1, wheel_diameter=0.5, trigger_level=0.1, trigger_sample=None,
@@ -40,33 +107,14 @@ def load_tek(fn_tek, magnets_per_wheel=1, wheel_diameter=0.5, trigger_level=0.1,
     tek_data = RadarData(None)
     tek_data.fn = fn_tek
 
-    # Initialize empty arrays
-    tek_data.decday = np.array([]).astype(np.float32)
-    wheel_count = np.array([]).astype(np.ushort)
-    tek_data.pressure = np.array([]).astype(np.short)
-    yinc = np.array([]).astype(np.float32)
-    xinc = np.array([]).astype(np.float32)
-    averages = np.array([]).astype(np.ushort)
-    length = np.array([]).astype(np.ushort)
-    tek_data.data = np.empty((0,1000)).astype(np.ushort)
-
-    # Open file to read in the data
-    fid = open(fn_tek,'rb')
-    more_lines=True
-    while more_lines:
-        try:
-            tek_data.decday = np.append(tek_data.decday,fread(fid, 1, np.float32))
-            wheel_count = np.append(wheel_count,fread(fid, 1, np.ushort))
-            tek_data.pressure = np.append(tek_data.pressure,fread(fid, 1, np.short))
-            yinc = np.append(yinc,fread(fid, 1, np.float32))
-            xinc = np.append(xinc,fread(fid, 1, np.float32))
-            averages = np.append(averages,fread(fid, 1, np.ushort))
-            length = np.append(length,fread(fid, 1, np.ushort))
-            tek_data.data = np.append(tek_data.data,
-                            np.transpose(fread(fid, length[-1], np.ushort)),axis=0)
-        except:
-            more_lines=False
-    fid.close()
+    # Read all the records at once
+    with open(fn_tek, 'rb') as fid:
+        headers, data = _read_records(fid.read())
+    tek_data.decday = headers['decday'].astype(np.float32)
+    wheel_count = headers['wheel_count'].astype(np.ushort)
+    tek_data.pressure = headers['pressure'].astype(np.short)
+    xinc = headers['xinc'].astype(np.float32)
+    tek_data.data = data
 
     # Transpose and normalize data around zero
     tek_data.data = np.transpose(tek_data.data)
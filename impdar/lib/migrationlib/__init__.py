@@ -11,7 +11,7 @@ Migration is a bit messy in order not to be too slow. This should collect the di
 """
 
 from .mig_su import migrationSeisUnix
-from .mig_python import migrationStolt, migrationPhaseShift, migrationTimeWavenumber
+from .mig_python import migrationStolt, migrationPhaseShift, migrationTimeWavenumber, migrationKirchhoffTable
 
 try:
     from .mig_cython import migrationKirchhoff
@@ -17,7 +17,7 @@ import time
 # cdefine the signature of our c function
 # Need this so that the function is recognized
 cdef extern from "mig_cython.h":
-    void mig_kirch_loop (double * migdata, int tnum, int snum, double * dist, double * zs, double * zs2, double * tt_sec, double vel, double * gradD, double max_travel_time, int nearfield)
+    void mig_kirch_loop (double * migdata, int tnum, int snum, double * dist, double * zs, double * zs2, double * tt_sec, double vel, double * gradD, double max_travel_time, int nearfield, double max_offset, double min_costheta, int n_threads) nogil
 
 
 def migrationKirchhoffLoop(np.ndarray[double, ndim=2, mode="c"] migdata not None,
@@ -30,24 +30,41 @@ def migrationKirchhoffLoop(np.ndarray[double, ndim=2, mode="c"] migdata not None
                           float vel,
                           np.ndarray[double, ndim=2, mode="c"] gradD not None,
                           float max_travel_time,
-                          bint nearfield
+                          bint nearfield,
+                          double max_offset=np.inf,
+                          double min_costheta=0.,
+                          int n_threads=0
                           ):
-    """I am not sure if this wrapper is needed, but I think it gives us type checking so I'm leaving it"""
-    mig_kirch_loop(<double*> np.PyArray_DATA(migdata),
-                   tnum,
-                   snum,
-                   <double*> np.PyArray_DATA(dist),
-                   <double*> np.PyArray_DATA(zs),
-                   <double*> np.PyArray_DATA(zs2),
-                   <double*> np.PyArray_DATA(tt_sec),
-                   vel,
-                   <double*> np.PyArray_DATA(gradD),
-                   max_travel_time,
-                   int(nearfield)
-                   )
-
-
-def migrationKirchhoff(dat, vel=1.69e8, nearfield=False):
+    """I am not sure if this wrapper is needed, but I think it gives us type checking so I'm leaving it
+
+    The GIL is released for the loop, which runs on n_threads (all available if < 1) when compiled with OpenMP.
+    """
+    cdef double * migdata_ptr = <double*> np.PyArray_DATA(migdata)
+    cdef double * dist_ptr = <double*> np.PyArray_DATA(dist)
+    cdef double * zs_ptr = <double*> np.PyArray_DATA(zs)
+    cdef double * zs2_ptr = <double*> np.PyArray_DATA(zs2)
+    cdef double * tt_sec_ptr = <double*> np.PyArray_DATA(tt_sec)
+    cdef double * gradD_ptr = <double*> np.PyArray_DATA(gradD)
+    cdef int c_nearfield = int(nearfield)
+    with nogil:
+        mig_kirch_loop(migdata_ptr,
+                       tnum,
+                       snum,
+                       dist_ptr,
+                       zs_ptr,
+                       zs2_ptr,
+                       tt_sec_ptr,
+                       vel,
+                       gradD_ptr,
+                       max_travel_time,
+                       c_nearfield,
+                       max_offset,
+                       min_costheta,
+                       n_threads
+                       )
+
+
+def migrationKirchhoff(dat, vel=1.69e8, nearfield=False, n_threads=None, aperture=None, max_angle=None):
     """Kirchhoff Migration (Berkhout 1980; Schneider 1978; Berryhill 1979)
 
     This migration method uses an integral solution to the scalar wave equation Yilmaz (2001) eqn 4.5.
@@ -64,6 +81,12 @@ def migrationKirchhoff(dat, vel=1.69e8, nearfield=False):
     dat: data as a class in the ImpDAR format
     vel: wave velocity, default is for ice
     nearfield: boolean to indicate whether or not to use the nearfield term in summation
+    n_threads: number of threads over which to split the output traces.
+        Default (None) uses all available cores. Only has an effect if compiled with OpenMP.
+    aperture: maximum horizontal distance (m) from the output trace to include in the summation.
+        Default (None) is unlimited.
+    max_angle: maximum angle (degrees) from vertical of rays to include in the summation.
+        Default (None) is unlimited.
 
     Output
     ---------
@@ -99,7 +122,10 @@ def migrationKirchhoff(dat, vel=1.69e8, nearfield=False):
                           vel,
                           np.ascontiguousarray(gradD, dtype=np.float64),
                           max_travel_time,
-                          nearfield
+                          nearfield,
+                          max_offset=np.inf if aperture is None else aperture,
+                          min_costheta=0. if max_angle is None else np.cos(np.radians(max_angle)),
+                          n_threads=0 if n_threads is None else int(n_threads)
                           )
     dat.data = migdata.copy()
     # print the total time
@@ -8,39 +8,80 @@
 #include "mig_cython.h"
 #include <math.h>
 #include <stdio.h>
-#include <time.h> 
+#include <time.h>
 #include <signal.h>
 #include <stdlib.h>
 #include <Python.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
-/*  Migrate data into migdata */
-void mig_kirch_loop (double * migdata, int tnum, int snum, double * dist, double * zs, double * zs2, double * tt_sec, double vel, double * gradD, double max_travel_time, int nearfield){
-    int i, j, k, l;
-    double min, m;
-    double costheta;
-    double integral;
-    double r;
-    int Didx;
-    int lmin_prev, rmin_prev;
-    clock_t iter_start, this_time;
-    float time_remaining, el_t;
+/* Wall-clock time in seconds. clock() sums cpu time over all threads,
+ * so it is useless for estimating time remaining in parallel */
+static double wall_time(void){
+#ifdef _OPENMP
+    return omp_get_wtime();
+#else
+    return (double) time(NULL);
+#endif
+}
+
+/* Report progress with the GIL held, since the caller released it */
+static void report_progress(int done, int tnum, double start){
+    PyGILState_STATE gstate;
+    double el_t;
+    gstate = PyGILState_Ensure();
+    if (done % 100 == 0){
+        el_t = wall_time() - start;
+        PySys_WriteStdout("trace %d\nEst. time remaining: %4.2f sec", done, (tnum - done) * el_t / done);
+    }else{
+        PySys_WriteStdout(".");
+    }
+    PyGILState_Release(gstate);
+}
+
+/*  Migrate data into migdata
+ *  This may be called without the GIL. n_threads < 1 lets OpenMP decide.
+ *  The summation is limited to traces within max_offset (m) of the output trace
+ *  and to rays with cos(angle from vertical) >= min_costheta. */
+void mig_kirch_loop (double * migdata, int tnum, int snum, double * dist, double * zs, double * zs2, double * tt_sec, double vel, double * gradD, double max_travel_time, int nearfield, double max_offset, double min_costheta, int n_threads){
+    int j;
+    int traces_done = 0;
+    double iter_start;
+    PyGILState_STATE gstate;
     setbuf(stdout, NULL);
+    gstate = PyGILState_Ensure();
     PySys_WriteStdout("Beginning migration");
+    PyGILState_Release(gstate);
 
-    iter_start = clock();
+#ifdef _OPENMP
+    if (n_threads < 1){
+        n_threads = omp_get_max_threads();
+    }
+#endif
+
+    iter_start = wall_time();
     /* You can flip the loop order, but I think this is marginally faster
      * based on c row-major ordering. Could be wrong though... */
 
-    /* Loop through every point in the image (trace and sample) 
-     * to look for a hyperbola propagating away from that point */
+    /* Loop through every point in the image (trace and sample)
+     * to look for a hyperbola propagating away from that point.
+     * Every output trace is independent, so this is the loop we split
+     * between threads. Later traces are not cheaper, so the schedule
+     * is dynamic to handle the shorter hyperbolae near the edges */
+#ifdef _OPENMP
+    #pragma omp parallel for schedule(dynamic, 8) num_threads(n_threads)
+#endif
     for(j=0;j<tnum;j++){
-        if (j % 100 == 0){
-            if (j > 0){
-                PySys_WriteStdout("trace %d", j);
-            }
-        }else if (j % 10 == 0){
-            PySys_WriteStdout(".");
-        }
+        int i, k, l;
+        int Didx = 0;
+        int lmin_prev, rmin_prev;
+        int done;
+        double min, m, dx;
+        double costheta;
+        double integral;
+        double r, t;
+
         for(i=0;i<snum;i++){
             integral = 0.0;
             rmin_prev = i;
@@ -51,19 +92,21 @@ void mig_kirch_loop (double * migdata, int tnum, int snum, double * dist, double
             /* Do left and right separately so we know when to break
             * the break lets us skip a lot of iterations for long profiles */
             for(k=j + 1;k<tnum;k++){
-                /* r is the distance from the surface to 
+                /* r is the distance from the surface to
                  * this point along the hyperbola */
-                r = sqrt(pow(dist[k] - dist[j], 2.) + zs2[i]);
+                dx = dist[k] - dist[j];
+                r = sqrt(dx * dx + zs2[i]);
+                t = 2. * r / vel;
                 /* We do not get closer as we go, so we can break the loop
-                 * if we are far away */
-                if(2. * r / vel > max_travel_time){
+                 * if we are far away. The same holds for the aperture. */
+                if(t > max_travel_time || fabs(dx) > max_offset || zs[i] < min_costheta * r){
                      break;
                 }
                 min = max_travel_time;
                 /* The new min should not be smaller than the previous rmin
                 * since otherwise the hyperbola would be inverted (smiles) */
                 for(l=rmin_prev;l<snum;l++){
-                    m = fabs(tt_sec[l] - 2. * r / vel);
+                    m = fabs(tt_sec[l] - t);
                     if(m < min){
                         min = m;
                         Didx = l;
@@ -75,13 +118,15 @@ void mig_kirch_loop (double * migdata, int tnum, int snum, double * dist, double
             }
 
             for(k=j;k>=0;k--){
-                r = sqrt(pow(dist[k] - dist[j], 2.) + zs2[i]);
-                if(2. * r / vel > max_travel_time){
+                dx = dist[k] - dist[j];
+                r = sqrt(dx * dx + zs2[i]);
+                t = 2. * r / vel;
+                if(t > max_travel_time || fabs(dx) > max_offset || zs[i] < min_costheta * r){
                      break;
                 }
                 min = max_travel_time;
                 for(l=lmin_prev;l<snum;l++){
-                    m = fabs(tt_sec[l] - 2. * r / vel);
+                    m = fabs(tt_sec[l] - t);
                     if(m < min){
                         min = m;
                         Didx = l;
@@ -94,14 +139,19 @@ void mig_kirch_loop (double * migdata, int tnum, int snum, double * dist, double
 
             migdata[i * tnum + j] = integral / (2*M_PI);
         }
-        if (j % 100 == 0){
-            if (j > 0){
-                this_time = clock();
-                el_t = (this_time - iter_start) / CLOCKS_PER_SEC;
-                time_remaining = (tnum - j) * el_t / j;
-                PySys_WriteStdout("\nEst. time remaining: %4.2f sec", time_remaining);
+
+        /* Traces finish out of order, so count them rather than using j */
+#ifdef _OPENMP
+        #pragma omp critical (mig_progress)
+#endif
+        {
+            done = ++traces_done;
+            if (done % 10 == 0){
+                report_progress(done, tnum, iter_start);
             }
         }
     }
+    gstate = PyGILState_Ensure();
     PySys_WriteStdout("\n");
+    PyGILState_Release(gstate);
 }
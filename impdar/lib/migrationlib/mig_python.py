@@ -28,11 +28,20 @@ import sys
 
 import numpy as np
 import time
+from concurrent.futures import ThreadPoolExecutor
 from scipy import sparse
-from scipy.interpolate import griddata, interp1d, RectBivariateSpline
+from scipy.interpolate import griddata, interp1d
 
+# Cache of Kirchhoff travel-time tables, see kirchhoffTable
+_KIRCHHOFF_TABLES = {}
+_KIRCHHOFF_TABLES_MAX = 8
+# Cache of phase-shift operators, see phaseShiftOperator
+_PHASE_SHIFT_OPERATORS = {}
+_PHASE_SHIFT_CACHE_BYTES = 2 ** 30
 
-def migrationKirchhoffLoop(data, migdata, tnum, snum, dist, zs, zs2, tt_sec, vel, gradD, max_travel_time, nearfield):
+
+def migrationKirchhoffLoop(data, migdata, tnum, snum, dist, zs, zs2, tt_sec, vel, gradD, max_travel_time, nearfield,
+                           max_offset=np.inf, min_costheta=0.):
     # Loop through every point in the image (trace and sample)
     # to look for a hyperbola propagating away from that point
     print('Migrating trace number:')
@@ -49,18 +58,20 @@ def migrationKirchhoffLoop(data, migdata, tnum, snum, dist, zs, zs2, tt_sec, vel
             Didx = np.argmin(np.abs(np.atleast_2d(tt_sec).transpose() - 2. * rs / vel), axis=0)
             # integrate the farfield term
             gradDhyp = gradD[Didx, np.arange(len(Didx))]
-            gradDhyp[2. * rs / vel > max_travel_time] = 0.    # zero points that are outside of the domain
+            # zero points that are outside of the domain or the aperture
+            outside = (2. * rs / vel > max_travel_time) | (np.abs(dist - dist[xi]) > max_offset) | (zs[ti] < min_costheta * rs)
+            gradDhyp[outside] = 0.
             integral = np.nansum(gradDhyp * costheta / vel)  # TODO: Yilmaz eqn 4.5 has an extra r in this weight factor???
             # integrate the nearfield term
             if nearfield:
                 Dhyp = data[Didx, np.arange(len(Didx))]
-                Dhyp[2. * rs / vel > max_travel_time] = 0.    # zero points that are outside of the domain
+                Dhyp[outside] = 0.
                 integral += np.nansum(Dhyp * costheta / rs**2.)
             # sum the integrals and output
             migdata[ti, xi] = 1. / (2. * np.pi) * integral
 
 
-def migrationKirchhoff(dat, vel=1.69e8, nearfield=False):
+def migrationKirchhoff(dat, vel=1.69e8, nearfield=False, n_threads=None, aperture=None, max_angle=None):
     """Kirchhoff Migration (Berkhout 1980; Schneider 1978; Berryhill 1979)
 
     This migration method uses an integral solution to the scalar wave equation Yilmaz (2001) eqn 4.5.
@@ -77,6 +88,11 @@ def migrationKirchhoff(dat, vel=1.69e8, nearfield=False):
     dat: data as a class in the ImpDAR format
     vel: wave velocity, default is for ice
     nearfield: boolean to indicate whether or not to use the nearfield term in summation
+    n_threads: ignored here, kept so that the call matches the compiled version
+    aperture: maximum horizontal distance (m) from the output trace to include in the summation.
+        Default (None) is unlimited.
+    max_angle: maximum angle (degrees) from vertical of rays to include in the summation.
+        Default (None) is unlimited.
 
     Output
     ---------
@@ -112,7 +128,9 @@ def migrationKirchhoff(dat, vel=1.69e8, nearfield=False):
                           vel,
                           np.ascontiguousarray(gradD, dtype=np.float64),
                           max_travel_time,
-                          nearfield
+                          nearfield,
+                          max_offset=np.inf if aperture is None else aperture,
+                          min_costheta=0. if max_angle is None else np.cos(np.radians(max_angle))
                           )
 
     dat.data = migdata.copy()
@@ -123,6 +141,80 @@ def migrationKirchhoff(dat, vel=1.69e8, nearfield=False):
     return dat
 
 
+def migrationKirchhoffTable(dat, vel=1.69e8, nearfield=False, aperture=None, max_angle=None):
+    """Kirchhoff Migration using a precomputed travel-time table
+
+    This is the same diffraction summation as migrationKirchhoff, but for data with constant trace
+    spacing (i.e. after constant_space). In that case the hyperbola for an output point only
+    depends on the sample and on the offset, in traces, to the input trace. We look up the
+    travel-time indices and weights for every offset once (see kirchhoffTable), then sum
+    each offset over all traces at once.
+
+    Parameters
+    ---------
+    dat: data as a class in the ImpDAR format
+    vel: wave velocity, default is for ice
+    nearfield: boolean to indicate whether or not to use the nearfield term in summation
+    aperture: maximum horizontal distance (m) from the output trace to include in the summation.
+        Default (None) is unlimited.
+    max_angle: maximum angle (degrees) from vertical of rays to include in the summation.
+        Default (None) is unlimited.
+
+    Output
+    ---------
+    dat: data as a class in the ImpDAR format (with dat.data now being migrated data)
+
+    """
+
+    print('Kirchhoff Migration (diffraction summation, tabled) of %.0fx%.0f matrix' % (dat.snum, dat.tnum))
+    # check that the arrays are compatible
+    _check_data_shape(dat)
+    # start the timer
+    start = time.time()
+
+    dist = np.asarray(dat.dist, dtype=np.float64) * 1.0e3
+    if dat.tnum > 1:
+        spacing = np.diff(dist)
+        trace_spacing = np.mean(spacing)
+        if trace_spacing <= 0 or not np.allclose(spacing, trace_spacing, rtol=1.0e-3):
+            raise ValueError('Tabled Kirchhoff migration needs constant trace spacing, try constant_space first')
+    else:
+        trace_spacing = 1.
+
+    tt_sec = dat.travel_time / 1.0e6
+    # Calculate the time derivative of the input data
+    gradD = np.gradient(dat.data.astype(np.float64), tt_sec, axis=0)
+    if nearfield:
+        data = dat.data.astype(np.float64)
+
+    Didx, weight, nearweight = kirchhoffTable(trace_spacing, vel, tt_sec, aperture=aperture,
+                                              max_angle=max_angle, max_offsets=dat.tnum - 1)
+
+    migdata = np.zeros((dat.snum, dat.tnum), dtype=np.float64)
+    for offset in range(Didx.shape[0]):
+        # only the samples where this offset is inside the domain
+        rows = np.flatnonzero(weight[offset])
+        if len(rows) == 0:
+            continue
+        sidx = Didx[offset, rows]
+        w = weight[offset, rows, None]
+        # traces to the right of the output trace
+        if offset > 0:
+            migdata[rows, :dat.tnum - offset] += w * gradD[sidx, offset:]
+            if nearfield:
+                migdata[rows, :dat.tnum - offset] += nearweight[offset, rows, None] * data[sidx, offset:]
+        # traces to the left, including the output trace itself
+        migdata[rows, offset:] += w * gradD[sidx, :dat.tnum - offset]
+        if nearfield:
+            migdata[rows, offset:] += nearweight[offset, rows, None] * data[sidx, :dat.tnum - offset]
+
+    dat.data = migdata / (2. * np.pi)
+    # print the total time
+    print('Kirchhoff Migration of %.0fx%.0f matrix complete in %.2f seconds'
+          % (dat.snum, dat.tnum, time.time() - start))
+    return dat
+
+
 def migrationStolt(dat,vel=1.68e8,htaper=100,vtaper=1000):
     """Stolt Migration (Stolt, 1978, Geophysics)
 
@@ -153,8 +245,7 @@ def migrationStolt(dat,vel=1.68e8,htaper=100,vtaper=1000):
     v = np.minimum(np.arange(dat.snum),np.arange(dat.snum)[::-1])/vtaper
     h[h>1.] = 1.
     v[v>1.] = 1.
-    H,V = np.meshgrid(h,v)
-    dat.data = (dat.data*H*V).astype(dat.data.dtype)
+    dat.data = (dat.data*h[None, :]*v[:, None]).astype(dat.data.dtype)
     # 2D Forward Fourier Transform to get data in frequency-wavenumber space, FK = D(kx,z=0,ws)
     FK = np.fft.rfft2(dat.data, axes=(1, 0))
     # get the temporal frequencies
@@ -166,36 +257,14 @@ def migrationStolt(dat,vel=1.68e8,htaper=100,vtaper=1000):
     else:
         trace_int = dat.trace_int
     kx = 2.*np.pi*np.fft.fftfreq(dat.tnum, d=np.mean(trace_int))
-    # interpolate from frequency (ws) into wavenumber (kz)
-    print(kx.shape, ws.shape, FK.real.shape)
-    interp_real = RectBivariateSpline(np.fft.fftshift(kx), ws, np.fft.fftshift(FK.real, axes=[1]).T, kx=1, ky=1)
-    interp_imag = RectBivariateSpline(np.fft.fftshift(kx), ws, np.fft.fftshift(FK.imag, axes=[1]).T, kx=1, ky=1)
-
     # interpolation will move from frequency-wavenumber to wavenumber-wavenumber, KK = D(kx,kz,t=0)
-    KK = np.zeros_like(FK)
-    print('Interpolating from temporal frequency (ws) to vertical wavenumber (kz):')
-    print('Interpolating:')
-    # for all temporal frequencies
-    for zj in range(dat.snum // 2):
-        kzj = ws[zj]*2./vel
-        if zj%100 == 0:
-            print(int(ws[zj]/1e6/2/np.pi), 'MHz, ', end='')
-            sys.stdout.flush()
-        # for all horizontal wavenumbers
-        for xi in range(len(kx)):
-            kxi = kx[xi]
-            # migration conversion to wavenumber (Yilmaz equation C.53)
-            wsj = vel/2.*np.sqrt(kzj**2.+kxi**2.)
-            # get the interpolated FFT values, real and imaginary, S(kx,kz,t=0)
-            KK[zj,xi] = interp_real(kxi,wsj)[0, 0] + 1j*interp_imag(kxi,wsj)[0, 0]
+    print('Interpolating from temporal frequency (ws) to vertical wavenumber (kz)')
+    KK = stoltInterp(FK, ws, kx, vel)
     # all vertical wavenumbers
     kz = ws*2./vel
-    # grid wavenumbers for scaling calculation
-    kX,kZ = np.meshgrid(kx,kz)
     # scaling for obliquity factor (Yilmaz equation C.56)
     with np.errstate(invalid='ignore'):
-        scaling = kZ/np.sqrt(kX**2.+kZ**2.)
-    KK *= scaling
+        KK *= kz[:, None] / np.sqrt(kx[None, :] ** 2. + kz[:, None] ** 2.)
     # the DC frequency should be 0.
     KK[0,0] = 0.+0j
     # 2D Inverse Fourier Transform to get back to distance spce, D(x,z,t=0)
@@ -208,7 +277,7 @@ def migrationStolt(dat,vel=1.68e8,htaper=100,vtaper=1000):
     return dat
 
 
-def migrationPhaseShift(dat,vel=1.69e8,vel_fn=None,htaper=100,vtaper=1000, **genfromtxt_kwargs):
+def migrationPhaseShift(dat,vel=1.69e8,vel_fn=None,htaper=100,vtaper=1000,n_threads=None, **genfromtxt_kwargs):
     """
 
     Phase-Shift Migration
@@ -236,6 +305,8 @@ def migrationPhaseShift(dat,vel=1.69e8,vel_fn=None,htaper=100,vtaper=1000, **gen
         If uniform velocity (i.e. vel=constant) input constant
         If layered velocity (i.e. vel=v(z)) input array with shape (#vel-points, 2) (i.e. no x-values)
     vel_fn: filename for layered velocity input, .txt file with columns for v, x, z
+    n_threads: number of threads over which to split the frequencies for constant or layered velocity.
+        Default (None) uses one.
 
     Output
     ---------
@@ -254,8 +325,7 @@ def migrationPhaseShift(dat,vel=1.69e8,vel_fn=None,htaper=100,vtaper=1000, **gen
     v = np.minimum(np.arange(dat.snum),np.arange(dat.snum)[::-1])/vtaper
     h[h>1.] = 1.
     v[v>1.] = 1.
-    H,V = np.meshgrid(h,v)
-    dat.data *= H*V
+    dat.data *= h[None, :]*v[:, None]
     # pad the array with zeros up to the next power of 2 for discrete fft
     nt = 2**(np.ceil(np.log(dat.snum)/np.log(2))).astype(int)
     # get frequencies and wavenumbers
@@ -277,7 +347,7 @@ def migrationPhaseShift(dat,vel=1.69e8,vel_fn=None,htaper=100,vtaper=1000, **gen
             raise TypeError('File %s was given for input velocity array, but cannot be loaded. Please reformat to txt file.'%vel_fn)
     vmig = getVelocityProfile(dat,vel)
     # Migration by phase shift, frequency-wavenumber (FKx) to time-wavenumber (TKx)
-    TK = phaseShift(dat, vmig, vel, kx, ws, FK)
+    TK = phaseShift(dat, vmig, vel, kx, ws, FK, n_threads=n_threads)
     # Transform from time-wavenumber (TKx) to time-space (TX) domain to get migrated section
     dat.data = np.fft.ifft(TK).real
     # print the total time
@@ -358,7 +428,7 @@ def migrationTimeWavenumber(dat,vel=1.69e8,vel_fn=None,htaper=100,vtaper=1000):
 # Supporting functions
 # -----------------------------------------------------------------------------
 
-def phaseShift(dat, vmig, vels_in, kx, ws, FK):
+def phaseShift(dat, vmig, vels_in, kx, ws, FK, n_threads=None):
     """
 
     Phase-Shift migration to get from frequency-wavenumber (FKx) space to time-wavenumber (TKx) space.
@@ -382,6 +452,8 @@ def phaseShift(dat, vmig, vels_in, kx, ws, FK):
     kx: horizontal wavenumbers
     ws: temporal frequencies
     FK: 2-D array of the data image in frequency-wavenumber space (FKx)
+    n_threads: number of threads over which to split the frequencies, for constant or layered velocity.
+        Default (None) uses one.
 
     Output
     ---------
@@ -392,49 +464,43 @@ def phaseShift(dat, vmig, vels_in, kx, ws, FK):
     # initialize the time-wavenumber array to be filled with complex values
     TK = np.zeros((dat.snum,len(kx)))+0j
 
-    # Uniform velocity case, vmig=constant
-    if not hasattr(vmig,"__len__"):
-        print('Constant velocity %s m/usec'%(vmig/1e6))
-        # iterate through all frequencies
-        print('Frequency: ',end='')
-        sys.stdout.flush()
-
-        print('Frequency: ')
-        for iw in range(len(ws)):
-            w = ws[iw]
-            if w == 0.0:
-                w = 1e-10/dat.dt
-            if iw%100 == 0:
-                print(int(w/1e6/(2.*np.pi)),'MHz',', ',end='')
-                sys.stdout.flush()
-            # remove frequencies outside of the domain
-            vkx2 = (vmig*kx/2.)**2.
-            ik = np.argwhere(vkx2 < w**2.)
-            FFK = FK[iw,ik]
-            # get the phase for shift
-            phase = (-w*dat.dt*np.sqrt(1.0 - vkx2[ik]/w**2.)).real
-            cp = np.conj(np.cos(phase)+1j*np.sin(phase))
-            # Accumulate output image (time-wavenumber space) summed over all frequencies
-            for itau in range(dat.snum):
-                 FFK *= cp
-                 TK[itau,ik] += FFK
-
-    else:
-        if not hasattr(vmig, 'shape'):
-            raise ValueError('vmig needs to be an array or float')
-        # Layered and/or lateral velocity case, vmig=v(x,z)
-        if len(vmig) != dat.snum:
-            raise ValueError('Interpolated velocity profile is not the length of the number of samples in a trace.')
-        if hasattr(vmig[0], "__len__"):
-            print('2-D velocity structure, Fourier Finite-Difference Migration')
-            # Finite Difference Stencil
-            stencil = Sp_Matr(dat.tnum,-2,1,1)
-            FFX_last = 0.
+    if hasattr(vmig, "__len__") and not hasattr(vmig, 'shape'):
+        raise ValueError('vmig needs to be an array or float')
+    if hasattr(vmig, "__len__") and len(vmig) != dat.snum:
+        raise ValueError('Interpolated velocity profile is not the length of the number of samples in a trace.')
+
+    if not hasattr(vmig, "__len__") or not hasattr(vmig[0], "__len__"):
+        # Uniform velocity case, vmig=constant, or layered velocity case, vmig=v(z)
+        if not hasattr(vmig, "__len__"):
+            print('Constant velocity %s m/usec'%(vmig/1e6))
+            vmig = vmig * np.ones((dat.snum, ))
+            # evanescent waves are removed entirely
+            min_coss = np.zeros((dat.snum, ))
         else:
             print('1-D velocity structure, Gazdag Migration')
             print('Velocities (m/s): %.2e',vels_in[:,0])
             print('Depths (m):',vels_in[:,1])
             print(r'Travel Times ($\mu$ sec):',dat.travel_time)
+            # zero if outside domain
+            min_coss = (dat.travel_time / 1.0e6 / dat.travel_time[-1] / 1e6) ** 2.
+        # Each frequency is independent, so split them into blocks
+        if n_threads is None or n_threads < 2:
+            TK[:] = _phaseShiftLayered(dat.dt, vmig, min_coss, kx, ws, FK)
+        else:
+            blocks = np.array_split(np.arange(len(ws)), n_threads)
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                futures = [executor.submit(_phaseShiftLayered, dat.dt, vmig, min_coss, kx,
+                                           ws[block[0]:block[-1] + 1], FK[block[0]:block[-1] + 1])
+                           for block in blocks if len(block) > 0]
+                for future in futures:
+                    TK += future.result()
+
+    else:
+        # Lateral velocity case, vmig=v(x,z)
+        print('2-D velocity structure, Fourier Finite-Difference Migration')
+        # Finite Difference Stencil
+        stencil = Sp_Matr(dat.tnum,-2,1,1)
+        FFX_last = 0.
         # iterate through all output travel times
         for itau in range(dat.snum):
             tau = dat.travel_time[itau] / 1.0e6
@@ -493,6 +559,169 @@ def phaseShift(dat, vmig, vels_in, kx, ws, FK):
     return TK
 
 
+def _phaseShiftLayered(dt, vmig, min_coss, kx, ws, FK):
+    """Phase-shift all frequencies in FK down through a v(z) profile, summing each step"""
+    TK = np.zeros((len(vmig), len(kx))) + 0j
+    FFK = FK.copy()
+    v_current = None
+    for itau in range(len(vmig)):
+        # Layers generally span many steps, so only get a new operator when the velocity changes
+        if vmig[itau] != v_current:
+            v_current = vmig[itau]
+            cshift, coss = phaseShiftOperator(v_current, dt, ws, kx)
+        FFK *= cshift
+        # zero if outside domain
+        FFK[coss <= min_coss[itau]] = 0.0 + 0j
+        # sum over all frequencies
+        TK[itau] = np.sum(FFK, axis=0)
+    return TK
+
+
+def phaseShiftOperator(vel, dt, ws, kx):
+    """
+
+    Phase-shift operator to step down one sample in a layer of constant velocity.
+
+    Operators are cached, so layers with the same velocity, in this profile or
+    any other with the same sampling and trace spacing, are only computed once.
+
+    Parameters
+    ---------
+    vel: migration velocity (m/s) of the layer
+    dt: sample interval (s)
+    ws: 1-D array of temporal frequencies
+    kx: 1-D array of horizontal wavenumbers
+
+    Output
+    ---------
+    cshift: 2-D complex array, (ws, kx), to multiply the wavefield by for one step
+    coss: 2-D array, (ws, kx), of the cosine squared of the propagation angle.
+        Waves are evanescent where this is not positive.
+
+    """
+    key = (float(vel), float(dt), len(ws), hash(ws.tobytes()), len(kx), hash(kx.tobytes()))
+    if key in _PHASE_SHIFT_OPERATORS:
+        return _PHASE_SHIFT_OPERATORS[key]
+
+    w = ws.copy()
+    w[w == 0.0] = 1.0e-10 / dt
+    # cosine squared
+    coss = 1.0 - (0.5 * vel * kx[None, :] / w[:, None]) ** 2.
+    # calculate phase for shift, which is zero for evanescent waves
+    phase = (-w[:, None] * dt * np.sqrt(coss + 0j)).real
+    cshift = np.conj(np.cos(phase) + 1j * np.sin(phase))
+
+    size = cshift.nbytes + coss.nbytes
+    if size <= _PHASE_SHIFT_CACHE_BYTES:
+        while sum(c.nbytes + cs.nbytes for c, cs in _PHASE_SHIFT_OPERATORS.values()) + size > _PHASE_SHIFT_CACHE_BYTES:
+            _PHASE_SHIFT_OPERATORS.pop(next(iter(_PHASE_SHIFT_OPERATORS)))
+        _PHASE_SHIFT_OPERATORS[key] = (cshift, coss)
+    return cshift, coss
+
+
+def stoltInterp(FK, ws, kx, vel, chunksize=1024):
+    """
+
+    Interpolate from temporal frequency (ws) to vertical wavenumber (kz) for Stolt migration.
+
+    Each kx column is linearly interpolated along ws, for all vertical wavenumbers at once,
+    (Yilmaz equation C.53). Values beyond the highest frequency take the value at that frequency.
+
+    Parameters
+    ---------
+    FK: 2-D complex array of the data image in frequency-wavenumber space (ws, kx)
+    ws: 1-D array of the (evenly spaced, non-negative) temporal frequencies
+    kx: 1-D array of the horizontal wavenumbers
+    vel: wave velocity (m/s)
+    chunksize: number of kx columns to do at a time, to limit memory use
+
+    Output
+    ---------
+    KK: 2-D complex array of the data image in wavenumber-wavenumber space (kz, kx).
+        The highest frequency row is left as zero.
+
+    """
+    KK = np.zeros_like(FK)
+    nw = len(ws)
+    if nw < 2:
+        return KK
+    dw = ws[1] - ws[0]
+    kz = ws[:nw - 1] * 2. / vel
+    for start in range(0, len(kx), chunksize):
+        cols = np.arange(start, min(start + chunksize, len(kx)))
+        # migration conversion to wavenumber (Yilmaz equation C.53)
+        wsj = vel / 2. * np.sqrt(kz[:, None] ** 2. + kx[None, cols] ** 2.)
+        # fractional index into the evenly spaced frequencies
+        fidx = np.clip((wsj - ws[0]) / dw, 0., nw - 1.)
+        i0 = np.minimum(np.floor(fidx).astype(int), nw - 2)
+        frac = fidx - i0
+        KK[:len(kz), cols] = FK[i0, cols] * (1. - frac) + FK[i0 + 1, cols] * frac
+    return KK
+
+
+def kirchhoffTable(trace_spacing, vel, tt_sec, aperture=None, max_angle=None, max_offsets=None):
+    """
+
+    Travel-time indices and weights of Kirchhoff diffraction hyperbolae for constant trace spacing.
+
+    Tables only depend on the trace spacing, velocity, and sampling, so they are cached and
+    reused for any other profile with the same geometry.
+
+    Parameters
+    ---------
+    trace_spacing: constant distance between traces (m)
+    vel: wave velocity (m/s)
+    tt_sec: 1-D array of the two-way travel time of each sample (s)
+    aperture: maximum horizontal distance (m) to include. Default (None) is unlimited.
+    max_angle: maximum angle (degrees) from vertical of rays to include. Default (None) is unlimited.
+    max_offsets: largest offset (in traces) needed, generally tnum - 1. Default (None) is unlimited.
+
+    Output
+    ---------
+    Didx: 2-D integer array, (offsets, samples), of the closest sample to the hyperbola
+    weight: 2-D array, (offsets, samples), of the farfield obliquity weight costheta / vel.
+        Zero outside the domain or the aperture.
+    nearweight: 2-D array, (offsets, samples), of the nearfield weight costheta / r**2.
+        Zero outside the domain or the aperture.
+
+    """
+    tt_sec = np.ascontiguousarray(tt_sec, dtype=np.float64)
+    key = (float(trace_spacing), float(vel), tt_sec.tobytes(), aperture, max_angle, max_offsets)
+    if key in _KIRCHHOFF_TABLES:
+        return _KIRCHHOFF_TABLES[key]
+
+    max_travel_time = np.max(tt_sec)
+    zs = vel * tt_sec / 2.0
+    min_costheta = 0. if max_angle is None else np.cos(np.radians(max_angle))
+    max_offset = np.inf if aperture is None else aperture
+
+    # No hyperbola reaches further than the deepest sample
+    noff = int(np.floor(min(vel * max_travel_time / 2., max_offset) / trace_spacing)) + 1
+    if max_offsets is not None:
+        noff = min(noff, max_offsets + 1)
+
+    xs = np.arange(noff)[:, None] * trace_spacing
+    rs = np.sqrt(xs ** 2. + zs[None, :] ** 2.)
+    ts = 2. * rs / vel
+    # closest sample, taking the earlier one when equidistant
+    Didx = np.clip(np.searchsorted(tt_sec, ts), 1, len(tt_sec) - 1)
+    Didx -= (ts - tt_sec[Didx - 1]) <= (tt_sec[Didx] - ts)
+
+    inside = (ts <= max_travel_time) & (xs <= max_offset) & (zs[None, :] >= min_costheta * rs)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        costheta = zs[None, :] / rs
+        weight = np.where(inside, costheta / vel, 0.)
+        nearweight = np.where(inside, costheta / rs ** 2., 0.)
+    # the apex of the hyperbola at the surface is undefined
+    weight[~np.isfinite(weight)] = 0.
+    nearweight[~np.isfinite(nearweight)] = 0.
+
+    if len(_KIRCHHOFF_TABLES) >= _KIRCHHOFF_TABLES_MAX:
+        _KIRCHHOFF_TABLES.pop(next(iter(_KIRCHHOFF_TABLES)))
+    _KIRCHHOFF_TABLES[key] = (Didx, weight, nearweight)
+    return Didx, weight, nearweight
+
+
 def fourierFiniteDiff(dat, vs, w, FFX, FFX_last, stencil, alpha=0.5,beta=0.25):
     """
 
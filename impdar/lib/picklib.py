@@ -8,6 +8,12 @@
 
 """Functions that are a for the mechanics of picking, not for the display."""
 
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+
 import numpy as np
 from scipy.spatial import cKDTree as KDTree
 
@@ -40,15 +46,11 @@ def pick(traces, snum_start, snum_end, pickparams):
         packet, time (deprecated, all nans), and power. Size 5xtnum
     """
     # This is similar to stp_pickloop
-    picks_out = np.zeros((5, traces.shape[1]))
     dmid = _midpoint(traces.shape[1], snum_start, snum_end)
-    for i in range(traces.shape[1]):
-        pickpacket = packet_pick(traces[:, i], pickparams, dmid[i])
-        picks_out[:, i] = pickpacket
-    return picks_out
+    return packet_pick_traces(traces, pickparams, dmid)
 
 
-def auto_pick(dat,snums,tnums):
+def auto_pick(dat, snums, tnums, workers=None):
     """Automatically pick any number of reflectors.
 
     Parameters
@@ -59,6 +61,10 @@ def auto_pick(dat,snums,tnums):
         Sample indices from which the picks will start.
     tnums: array_like
         Trace indices from which the picks will start.
+    workers: int, optional
+        Track the reflectors in this many processes at once. The processes
+        share a read-only, memory-mapped copy of the data.
+        Default is to track them one after another in this process.
 
     Returns
     -------
@@ -71,25 +77,133 @@ def auto_pick(dat,snums,tnums):
     if len(snums) != len(tnums):
         raise ValueError('Snum and tnum must be of equal length')
 
-    picks_out = np.empty((len(snums),5,dat.tnum))
+    if workers is not None and workers > 1 and len(snums) > 1:
+        return _auto_pick_parallel(dat, snums, tnums, workers)
 
+    picks_out = np.empty((len(snums), 5, dat.tnum))
     for i in range(len(snums)):
-        j = int(tnums[i])
-        t_start = int(tnums[i])
-        dmid = snums[i]
-        for n in range(dat.tnum):
-            pp = packet_pick(dat.data[:,j],dat.picks.pickparams,dmid)
-            picks_out[i,:,j] = pp
-            if j <= t_start and j > 0:
-                dmid = (pp[0]+pp[2])//2
-                j -= 1
-            elif j == 0:
-                dmid = (picks_out[i,0,t_start]+picks_out[i,2,t_start])//2
-                j = t_start + 1
-            elif j > t_start:
-                dmid = (pp[0]+pp[2])//2
-                j += 1
+        picks_out[i] = _track_layer(dat.data, dat.picks.pickparams, snums[i], tnums[i])
+    return picks_out
+
 
+def _track_layer(data, pickparams, snum, tnum):
+    """Pick one reflector across all traces, starting from a single point."""
+    picks_out = np.empty((5, data.shape[1]))
+    t_start = int(tnum)
+    # walk left from the starting trace to the first trace, then restart
+    # from the starting trace and walk right to the last trace
+    left = np.arange(t_start, -1, -1)
+    picks_out[:, left] = _track(data, pickparams, snum, left)
+    right = np.arange(t_start + 1, data.shape[1])
+    if len(right) > 0:
+        dmid = (picks_out[0, t_start] + picks_out[2, t_start]) // 2
+        picks_out[:, right] = _track(data, pickparams, dmid, right)
+    return picks_out
+
+
+def _auto_pick_parallel(dat, snums, tnums, workers):
+    """Track each reflector as a separate job in a pool of processes."""
+    # The workers need the window sizes and polarity, not the whole RadarData
+    pickparams = copy(dat.picks.pickparams)
+    pickparams.radardata = None
+
+    # Write the data once, and let every process map the same file
+    fd, fn_data = tempfile.mkstemp(suffix='.npy')
+    os.close(fd)
+    try:
+        shared = np.lib.format.open_memmap(fn_data, mode='w+', dtype=dat.data.dtype,
+                                           shape=dat.data.shape)
+        shared[:] = dat.data
+        shared.flush()
+        del shared
+
+        picks_out = np.empty((len(snums), 5, dat.tnum))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_shared_data,
+                                 initargs=(fn_data, )) as executor:
+            futures = [executor.submit(_track_shared_layer, pickparams, snum, tnum)
+                       for snum, tnum in zip(snums, tnums)]
+            for i, future in enumerate(futures):
+                picks_out[i] = future.result()
+    finally:
+        os.remove(fn_data)
+    return picks_out
+
+
+_SHARED_DATA = {}
+
+
+def _open_shared_data(fn_data):
+    """Map the data in a worker process, once for all its jobs."""
+    _SHARED_DATA['data'] = np.load(fn_data, mmap_mode='r')
+
+
+def _track_shared_layer(pickparams, snum, tnum):
+    """Pick one reflector from the data mapped in this worker process."""
+    return _track_layer(_SHARED_DATA['data'], pickparams, snum, tnum)
+
+
+def _track(data, pickparams, midpoint, tnums, min_chunk=8, max_chunk=4096):
+    """Follow a reflector through the traces tnums, in order.
+
+    Each pick is centered on the middle of the last packet, so the picks
+    depend on one another. Rather than picking trace by trace, we guess the
+    midpoints for a chunk of traces and pick them all at once, then re-pick
+    the traces whose guess did not match the pick before. The picks rarely
+    depend on small changes in midpoint, so we keep everything up to the
+    first pick that changed. Where the reflector is too rough for guessing to
+    pay off, we go back to picking trace by trace for a while.
+    The result is identical to picking one trace at a time.
+    """
+    picks_out = np.empty((5, len(tnums)))
+    guess = np.full(len(tnums), midpoint, dtype=float)
+    start = 0
+    chunk = min_chunk
+    n_single = 0
+    backoff = 0
+    while start < len(tnums):
+        if n_single > 0:
+            stop = min(start + n_single, len(tnums))
+            for i in range(start, stop):
+                picks_out[:, i] = packet_pick(data[:, tnums[i]], pickparams, guess[i])
+                guess[i + 1:i + 2] = (picks_out[0, i] + picks_out[2, i]) // 2
+            n_single = 0
+        else:
+            stop = min(start + chunk, len(tnums))
+            try:
+                pp = packet_pick_traces(data, pickparams, guess[start:stop], tnums=tnums[start:stop])
+                # The midpoints we should have used, if all the picks before were right
+                mids = np.hstack((guess[start:start + 1], ((pp[0] + pp[2]) // 2)[:-1]))
+                redo = np.flatnonzero(mids != guess[start:stop])
+                true_pp = pp.copy()
+                true_pp[:, redo] = packet_pick_traces(data, pickparams, mids[redo],
+                                                      tnums=tnums[start:stop][redo])
+            except ValueError:
+                # A bad guess may have run off the trace; only a real pick should raise
+                n_single = 1
+                continue
+
+            # Keep everything up to and including the first pick that changed
+            wrong = np.flatnonzero(np.any(true_pp[:3] != pp[:3], axis=0))
+            if len(wrong) > 0:
+                stop = start + wrong[0] + 1
+            picks_out[:, start:stop] = true_pp[:, :stop - start]
+
+            # Take bigger steps while the guesses are working, and back off if they are not
+            if len(wrong) == 0:
+                chunk = min(2 * chunk, max_chunk)
+                backoff = 0
+            else:
+                chunk = max(2 * (stop - start), min_chunk)
+                if stop - start < min_chunk:
+                    backoff = min(max(2 * backoff, min_chunk), max_chunk)
+                    n_single = backoff
+
+        # Guess that the reflector keeps the slope it had over the picks we just made
+        last_mid = (picks_out[0, stop - 1] + picks_out[2, stop - 1]) // 2
+        slope = (last_mid - guess[start]) / (stop - start)
+        ahead = guess[stop:stop + 2 * max(chunk, n_single)]
+        ahead[:] = last_mid + slope * np.arange(len(ahead))
+        start = stop
     return picks_out
 
 
@@ -199,6 +313,91 @@ def packet_pick(trace, pickparams, midpoint):
     return [tpeak + topsnum, cpeak + topsnum, bpeak + topsnum, np.nan, power]
 
 
+def packet_pick_traces(data, pickparams, midpoints, tnums=None):
+    """Do the picking of many traces at once.
+
+    This gives the same picks as calling packet_pick on each trace, but all
+    windows that lie fully inside the trace are picked together.
+
+    Parameters
+    ----------
+    data: 2d numpy.ndarray
+        snum x tnum matrix containing the traces
+    pickparams: impdar.lib.PickParameters.PickParameters
+        The information about picking that we need for determining window
+        size and polarity
+    midpoints: numpy.ndarray
+        The guesses at the index of each pick
+    tnums: numpy.ndarray, optional
+        The trace (column of data) for each midpoint.
+        Default is one midpoint per trace of data.
+
+    Returns
+    -------
+    numpy.ndarray
+        5 x len(midpoints). Top of packet, middle of packet, bottom of packet,
+        nan, and power.
+    """
+    midpoints = np.asarray(midpoints, dtype=float)
+    if tnums is None:
+        tnums = np.arange(data.shape[1])
+    tnums = np.asarray(tnums, dtype=int)
+    plength, FWW, scst = int(pickparams.plength), int(pickparams.FWW), int(pickparams.scst)
+
+    # Check if we are taking a bad slice
+    if plength < scst + FWW:
+        raise ValueError('Your choice of frequency is too high, \
+                         making the pick window sub-pixel in size')
+    if len(range(plength)[scst:scst + FWW]) == 0:
+        raise ValueError('Your choice of frequency (too low) is causing the\
+                         pick window to be too large')
+
+    topsnum = np.trunc(midpoints - plength / 2.)
+    inside = (topsnum >= 0) & (np.trunc(midpoints + plength / 2.) <= data.shape[0])
+    if np.all(inside):
+        return _packet_pick_inside(data, pickparams, topsnum.astype(int), tnums)
+
+    # Windows that run off the trace are left to packet_pick, which knows what to do
+    picks_out = np.empty((5, len(midpoints)))
+    for i in np.flatnonzero(~inside):
+        picks_out[:, i] = packet_pick(data[:, tnums[i]], pickparams, midpoints[i])
+    if np.any(inside):
+        picks_out[:, inside] = _packet_pick_inside(data, pickparams,
+                                                   topsnum[inside].astype(int), tnums[inside])
+    return picks_out
+
+
+def _packet_pick_inside(data, pickparams, top, tnums):
+    """Pick packets starting at sample top of traces tnums, all inside the data."""
+    plength, FWW, scst = int(pickparams.plength), int(pickparams.FWW), int(pickparams.scst)
+
+    # All the packets, as a (number of packets) x plength matrix
+    powerpackets = data[top[:, None] + np.arange(plength)[None, :], tnums[:, None]]
+    polpackets = powerpackets * pickparams.pol
+    rows = np.arange(len(top))
+
+    # Find the center peak
+    cpeak = np.argmax(polpackets[:, scst + 1:scst + FWW + 1], axis=1) + scst + 1
+
+    # Find a peak with opposite polarity higher up.
+    # Near the top, the window is padded by repeating the first sample;
+    # since argmin takes the first minimum this is the same as a shorter window.
+    search = np.clip(cpeak[:, None] + np.arange(-FWW, 0)[None, :], 0, plength - 1)
+    tpeak = search[rows, np.argmin(polpackets[rows[:, None], search], axis=1)]
+
+    # Find a peak with opposite polarity lower down.
+    # Near the bottom, the window is padded by repeating the last sample.
+    search = np.clip(cpeak[:, None] + np.arange(1, FWW + 1)[None, :], 0, plength - 1)
+    bpeak = search[rows, np.argmin(polpackets[rows[:, None], search], axis=1)]
+
+    # Mean power between the surrounding peaks
+    cum_power = np.zeros((len(top), plength + 1))
+    cum_power[:, 1:] = np.cumsum(powerpackets ** 2., axis=1)
+    power = (cum_power[rows, bpeak + 1] - cum_power[rows, tpeak]) / (bpeak - tpeak + 1)
+
+    return np.vstack((tpeak + top, cpeak + top, bpeak + top, np.full(len(top), np.nan), power))
+
+
 def get_intersection(data_main, data_cross, multiple_int=True, return_nans=False,
                      cutoff=10.0):
     """Find the intersection of two radar datasets.
@@ -296,3 +495,124 @@ def get_intersection(data_main, data_cross, multiple_int=True, return_nans=False
                 out_sns[i] = np.nan
 
     return out_tnums, out_sns
+
+
+def get_crossovers(dats, cutoff=10.0, cache_fn=None):
+    """Find the crossovers between every pair of profiles in a survey.
+
+    Each profile gets a single KDTree over its trace coordinates, and we only
+    compare profiles whose bounding boxes come within the cutoff of one
+    another, so a whole grid of lines can be searched at once rather than
+    calling get_intersection on every pair.
+    Every run of neighboring traces within the cutoff counts as one
+    crossover, located at the closest pair of traces,
+    so a pair of profiles can cross more than once.
+
+    Parameters
+    ----------
+    dats: list of impdar.lib.RadarData.RadarData
+        The profiles. They need x_coord and y_coord.
+    cutoff: float, optional
+        The maximum distance between traces at a crossover. Default 10.
+    cache_fn: str, optional
+        A .npz file in which to cache the crossover locations.
+        If it exists and was made with the same coordinates and cutoff,
+        we read the locations from it rather than searching again;
+        otherwise the search results are written to it.
+        Pick depths are always read from the current picks.
+
+    Returns
+    -------
+    dict
+        Arrays with one entry per crossover: line_a and line_b (indices into
+        dats, line_a < line_b), trace_a and trace_b (0-indexed trace in each
+        line), and dist (the distance between those traces). Also picknums,
+        the sorted pick numbers found in any line, and samp_a and samp_b,
+        (ncrossovers x npicknums) with samp1 of each pick at the crossover
+        (nan if that line does not have the pick).
+    """
+    coords = [np.vstack((np.asarray(dat.x_coord, dtype=float).flatten(),
+                         np.asarray(dat.y_coord, dtype=float).flatten())).transpose()
+              for dat in dats]
+    key = _crossover_key(coords, cutoff)
+
+    out = None
+    if cache_fn is not None and os.path.exists(cache_fn):
+        with np.load(cache_fn) as cache:
+            if str(cache['key']) == key:
+                out = {name: cache[name] for name in
+                       ['line_a', 'line_b', 'trace_a', 'trace_b', 'dist']}
+    if out is None:
+        out = _find_crossovers(coords, cutoff)
+        if cache_fn is not None:
+            np.savez(cache_fn, key=key, **out)
+
+    picknums = sorted(set(num for dat in dats if dat.picks is not None and
+                          dat.picks.picknums is not None and
+                          dat.picks.samp1 is not None
+                          for num in dat.picks.picknums))
+    out['picknums'] = np.array(picknums)
+    for line, trace, name in [(out['line_a'], out['trace_a'], 'samp_a'),
+                              (out['line_b'], out['trace_b'], 'samp_b')]:
+        out[name] = np.full((len(line), len(picknums)), np.nan)
+        for i, dat in enumerate(dats):
+            if dat.picks is None or dat.picks.picknums is None or dat.picks.samp1 is None:
+                continue
+            these = line == i
+            for j, num in enumerate(picknums):
+                row = dat.picks._pick_row(num)
+                if row is not None:
+                    out[name][these, j] = dat.picks.samp1[row, trace[these]]
+    return out
+
+
+def _crossover_key(coords, cutoff):
+    """Fingerprint the inputs to the crossover search for caching."""
+    sha = hashlib.sha1(repr(float(cutoff)).encode())
+    for coord in coords:
+        sha.update(repr(coord.shape).encode())
+        sha.update(np.ascontiguousarray(coord).tobytes())
+    return sha.hexdigest()
+
+
+def _find_crossovers(coords, cutoff):
+    """Search for crossovers between all pairs of lines of coordinates."""
+    finite = [np.all(np.isfinite(coord), axis=1) for coord in coords]
+    trees = [KDTree(coord[good]) if np.any(good) else None
+             for coord, good in zip(coords, finite)]
+    inds = [np.flatnonzero(good) for good in finite]
+
+    # Only search pairs whose bounding boxes are within the cutoff
+    mins = np.array([np.min(coord[good], axis=0) if np.any(good) else [np.inf, np.inf]
+                     for coord, good in zip(coords, finite)])
+    maxs = np.array([np.max(coord[good], axis=0) if np.any(good) else [-np.inf, -np.inf]
+                     for coord, good in zip(coords, finite)])
+    near = np.all((mins[:, None, :] <= maxs[None, :, :] + cutoff) &
+                  (maxs[:, None, :] + cutoff >= mins[None, :, :]), axis=2)
+
+    found = {name: [] for name in ['line_a', 'line_b', 'trace_a', 'trace_b', 'dist']}
+    for line_a, line_b in zip(*np.nonzero(np.triu(near, 1))):
+        pairs = trees[line_a].sparse_distance_matrix(trees[line_b], cutoff,
+                                                     output_type='ndarray')
+        if len(pairs) == 0:
+            continue
+        trace_a = inds[line_a][pairs['i']]
+        trace_b = inds[line_b][pairs['j']]
+
+        # Split into separate crossings wherever line a leaves the cutoff,
+        # and keep the closest pair of traces in each
+        order = np.argsort(trace_a, kind='stable')
+        crossing = np.empty(len(pairs), dtype=int)
+        crossing[order] = np.cumsum(np.hstack(([0], np.diff(trace_a[order]) > 1)))
+        order = np.lexsort((pairs['v'], crossing))
+        closest = order[np.hstack(([0], np.flatnonzero(np.diff(crossing[order])) + 1))]
+
+        found['line_a'].append(np.full(len(closest), line_a))
+        found['line_b'].append(np.full(len(closest), line_b))
+        found['trace_a'].append(trace_a[closest])
+        found['trace_b'].append(trace_b[closest])
+        found['dist'].append(pairs['v'][closest])
+
+    return {name: (np.hstack(vals) if len(vals) > 0 else np.zeros((0,)))
+            .astype(float if name == 'dist' else int)
+            for name, vals in found.items()}
@@ -12,6 +12,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import scipy.signal as signal
 from .load import load
+from .RadarData import shift_traces
 from matplotlib.colors import is_color_like
 
 # define a set of non-gray colors (from Paul Tol)
@@ -240,19 +241,10 @@ def plot_radargram(dat, xdat='tnum', ydat='twtt', x_range=(0, -1),
     if flatten_layer is not None:
         offset, _ = get_offset(dat, flatten_layer)
 
-        # Now construct the data matrix
-        tmp_data = np.zeros_like(dat.data)
-        tmp_data[:, :] = np.nan
-        for j in range(tmp_data.shape[1]):
-            if np.isnan(offset[j]):
-                continue
-            if int(offset[j]) == 0:
-                tmp_data[:, j] = dat.data[:, j]
-            elif offset[j] < 0 and (abs(offset[j]) < dat.snum):
-                tmp_data[:int(offset[j]), j] = dat.data[-int(offset[j]):, j]
-            elif (abs(offset[j]) < dat.snum) and offset[j]:
-                tmp_data[int(offset[j]):, j] = dat.data[:-int(offset[j]), j]
-        im = ax.imshow(norm(tmp_data[:, x_range[0]:x_range[-1]]),
+        # Now construct the data matrix, with only the part we are plotting
+        tmp_data = shift_traces(dat.data[:, x_range[0]:x_range[-1]],
+                                np.trunc(offset[x_range[0]:x_range[-1]]))
+        im = ax.imshow(norm(tmp_data),
                        cmap=cmap,
                        vmin=clims[0],
                        vmax=clims[1],
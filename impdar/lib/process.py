@@ -17,17 +17,34 @@ acts on multiple objects.
 While the ``process`` and ``process_and_exit`` directives can be used, they
 are generally not as useful as the direct calls.
 """
+import os
 import os.path
+import io
+import shutil
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
 import numpy as np
+from scipy.signal import correlate
 
 from .load import load
 from .gpslib import interp as interpdeep
 from .Picks import Picks
+from .ImpdarError import ImpdarError
 
-from copy import deepcopy
+from copy import copy, deepcopy
 
+#: Keyword arguments to load that leave the data on disk, by filetype
+LAZY_LOAD_KWARGS = {'mat': {'lazy': True}, 'gssi': {'mmap': True}}
 
-def process_and_exit(fn, cat=False, filetype='mat', o=None, **kwargs):
+#: Trace-wise attributes that are split into blocks when streaming
+STREAM_TRACE_ATTRS = ['lat', 'long', 'pressure', 'trace_int', 'trig', 'elev',
+                      'x_coord', 'y_coord', 'decday', 'dist', 'trace_num']
+
+
+def process_and_exit(fn, cat=False, filetype='mat', o=None, jobs=1, **kwargs):
     """Perform one or more processing steps, save, and exit.
 
     Parameters
@@ -41,17 +58,19 @@ def process_and_exit(fn, cat=False, filetype='mat', o=None, **kwargs):
         The type of input file. Default is .mat.
     o: str, optional
         An output path
+    jobs: int, optional
+        Process this many files at once, each in a separate process (see
+        :func:`run_parallel`). Ignored if cat. Default 1.
     kwargs:
-        These are the processing arguments for `process`
+        These are the processing arguments for `process`. With a blocksize,
+        and without cat, each file is opened without reading its data where
+        the format allows (h5 files saved by ImpDAR, and gssi), streamed
+        through temporary files next to the output, and saved in the h5
+        format in chunks of blocksize traces, so that it is never all in memory. The
+        output filenames are unchanged, since ImpDAR recognizes its h5 files
+        whatever the extension.
     """
 
-    def _p_and_e(radar_data):
-        processed = process(radar_data, **kwargs)
-        if not processed and not cat:
-            print('No processing steps performed. Not saving!')
-        else:
-            _save(radar_data, outpath=o, cat=cat)
-
     if cat:
         # first we do the quirky one
         # We need to load it all if catting
@@ -61,17 +80,109 @@ def process_and_exit(fn, cat=False, filetype='mat', o=None, **kwargs):
         if bn[-4:] == '_raw':
             bn = bn[:-4]
         radar_data[0].fn = bn + '_cat.mat'
-        return _p_and_e(radar_data)
+        process(radar_data, **kwargs)
+        _save(radar_data, outpath=o, cat=cat)
+    else:
+        # Otherwise, we can do things file by file
+        if (len(fn) > 1) and (o is not None) and (not os.path.isdir(o)):
+            raise FileNotFoundError('The output directory does not exist')
+        if jobs is None or jobs <= 1:
+            for fn_i in fn:
+                _process_file(fn_i, filetype, o, kwargs)
+        else:
+            failed = run_parallel(_process_file, fn, jobs, filetype, o, kwargs)
+            if len(failed) > 0:
+                raise ImpdarError('Failed to process {:d} of {:d} files: {:s}'.format(
+                    len(failed), len(fn), ', '.join(failed)))
+
+
+def _process_file(fn, filetype, o, kwargs):
+    """Load, process, and save a single file."""
+    if kwargs.get('blocksize') is None:
+        radar_data = load(filetype, fn)
+        if not process(radar_data, **kwargs):
+            print('No processing steps performed. Not saving!')
+        else:
+            _save(radar_data, outpath=o)
+        return
+
+    # Keep the data on disk all the way through
+    radar_data = load(filetype, fn, **LAZY_LOAD_KWARGS.get(filetype, {}))
+    if o is None:
+        out_dir = os.path.dirname(os.path.abspath(fn))
+    elif os.path.isdir(o):
+        out_dir = o
     else:
-        # Otherwise, we can do things sequentially
-        for fn_i in fn:
-            radar_data = load(filetype, fn)
-            return _p_and_e(radar_data)
+        out_dir = os.path.dirname(os.path.abspath(o))
+    stream_dir = tempfile.mkdtemp(dir=out_dir)
+    try:
+        if not process(radar_data, stream_dir=stream_dir, **kwargs):
+            print('No processing steps performed. Not saving!')
+        else:
+            _save(radar_data, outpath=o, format='h5', chunk_traces=kwargs['blocksize'])
+    finally:
+        # Let go of the maps before removing their files
+        for dat in radar_data:
+            dat.data = None
+        shutil.rmtree(stream_dir, ignore_errors=True)
+
+
+def run_parallel(worker, fns, jobs, *args, results=None):
+    """Call worker(fn, *args) for each file, using a pool of processes.
+
+    Output from each file is printed in the order of fns, after that file is done.
+    An error on one file is printed and does not stop the others.
+
+    Parameters
+    ----------
+    worker: function
+        Loads, processes, and saves a file. Must be importable (i.e. picklable).
+    fns: list of strs
+        The files to process.
+    jobs: int
+        The number of processes.
+    args:
+        Further arguments to worker
+    results: list, optional
+        If given, what worker returns for each file is appended to this, in the
+        order of fns (None for files that failed). It must be picklable.
+
+    Returns
+    -------
+    failed: list of strs
+        The files that raised an error.
+    """
+    failed = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_run_captured, worker, fn, *args) for fn in fns]
+        for fn, future in zip(fns, futures):
+            try:
+                output, result, error = future.result()
+            except BrokenProcessPool as err:
+                output, result, error = '', None, repr(err)
+            print(output, end='')
+            if error is not None:
+                print('Failed to process {:s}:\n{:s}'.format(fn, error))
+                failed.append(fn)
+            if results is not None:
+                results.append(result)
+    return failed
+
+
+def _run_captured(worker, fn, *args):
+    """Run the worker, returning what it printed, its result, and any traceback."""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            result = worker(fn, *args)
+        except Exception:
+            return output.getvalue(), None, traceback.format_exc()
+    return output.getvalue(), result, None
 
 
 def process(RadarDataList, interp=None, rev=False, vbp=None, hfilt=None,
             ahfilt=None, nmo=None, crop=None, hcrop=None, restack=None,
-            denoise=None, migrate=None, **kwargs):
+            denoise=None, migrate=None, blocksize=None, stream_dir=None, **kwargs):
     """Perform one or more processing steps on a list of RadarData .
 
     Parameters
@@ -92,6 +203,15 @@ def process(RadarDataList, interp=None, rev=False, vbp=None, hfilt=None,
         denoising filter (only wiener for now).
     migrate: string, optional
         Migrates the data.
+    blocksize: int, optional
+        Stream the processing through blocks of this many traces
+        (see :func:`process_streaming`), so that the processing steps only work on
+        one block at a time. Data that are not in memory yet (e.g. loaded with
+        lazy=True or mmap=True) are only read block by block.
+        Not available for interp, rev, hcrop, or migrate. Default None (process in memory).
+    stream_dir: str, optional
+        With blocksize, leave each result on disk, in a .npy file in this
+        directory, rather than reading it into memory. Default None.
 
     Returns
     -------
@@ -100,6 +220,10 @@ def process(RadarDataList, interp=None, rev=False, vbp=None, hfilt=None,
     """
     done_stuff = False
 
+    if blocksize is not None:
+        if interp is not None or rev or hcrop is not None or migrate is not None:
+            raise ValueError('interp, rev, hcrop, and migrate cannot be streamed')
+
     # first some argument checking so we don't crash later
     if crop is not None:
         try:
@@ -135,6 +259,19 @@ def process(RadarDataList, interp=None, rev=False, vbp=None, hfilt=None,
         except (ValueError, TypeError, IndexError):
             raise ValueError('interp must be a target spacing (float) then a gps filename')
 
+    if nmo is not None:
+        if isinstance(nmo, (float, int)):
+            print('One nmo value given. Assuming that this is the separation. \
+                  Uice=1.6')
+            nmo = (nmo, 1.6)
+
+    if blocksize is not None:
+        for dat in RadarDataList:
+            out_fn = None if stream_dir is None else _stream_tempfile(stream_dir)
+            done_stuff = process_streaming(dat, out_fn=out_fn, blocksize=blocksize, restack=restack,
+                                           vbp=vbp, hfilt=hfilt, ahfilt=ahfilt,
+                                           nmo=nmo, denoise=denoise, crop=crop)
+        return done_stuff
 
     if restack is not None:
         for dat in RadarDataList:
@@ -164,10 +301,6 @@ def process(RadarDataList, interp=None, rev=False, vbp=None, hfilt=None,
         done_stuff = True
 
     if nmo is not None:
-        if isinstance(nmo, (float, int)):
-            print('One nmo value given. Assuming that this is the separation. \
-                  Uice=1.6')
-            nmo = (nmo, 1.6)
         for dat in RadarDataList:
             dat.nmo(*nmo)
         done_stuff = True
@@ -197,6 +330,253 @@ def process(RadarDataList, interp=None, rev=False, vbp=None, hfilt=None,
     return True
 
 
+def process_streaming(dat, out_fn=None, blocksize=1000, restack=None, vbp=None,
+                      hfilt=None, ahfilt=None, nmo=None,
+                      denoise=None, crop=None):
+    """Process a profile in blocks of traces, writing the result to disk as we go.
+
+    Each step is a pass through the profile. A block of traces, padded with a
+    halo of neighboring traces for the windowed filters, is read from the
+    output of the previous step, processed with the normal RadarData method,
+    and the interior of the block is written to an on-disk .npy array, so the
+    processing steps themselves only need memory for one block. The input is
+    only read block by block if it is not yet in memory (e.g. loaded with
+    lazy=True or mmap=True), and the result is only left on disk if out_fn is
+    given. Steps run in the same
+    order as in :func:`process`.
+
+    The results match processing the whole profile at once. When restacking,
+    blocks are rounded up to a multiple of the stack, and pretrigger crops
+    need a constant trigger.
+
+    Parameters
+    ----------
+    dat: `~impdar.RadarData`
+        The data to process. The data may be a numpy memmap, or not yet read
+        (e.g. from :func:`load_gssi(mmap=True) <impdar.lib.load.load_gssi.load_gssi>`).
+        It is modified in place.
+    out_fn: str, optional
+        The .npy file for the processed data, to which dat.data ends up mapped.
+        By default, the processed data are read into memory at the end.
+    blocksize: int, optional
+        The number of traces to process at once. Default 1000.
+    restack: int, optional
+        Restack to this (odd) number of traces.
+    vbp: 2-tuple, optional
+        Vertical bandpass between (vbp1, vbp2) MHz.
+    hfilt: 2-tuple, optional
+        Horizontal filter subtracting average trace between (hfilt1, hfilt2).
+    ahfilt: int, optional
+        Adaptively horizontally filter the data with this window size.
+    nmo: 2-tuple, optional
+        Antenna separation and velocity for the normal moveout correction.
+    denoise: 2-tuple, optional
+        Vertical and horizontal window sizes for the wiener filter.
+    crop: 3-tuple, optional
+        Arguments to :func:`crop <impdar.lib.RadarData.RadarData.crop>`.
+
+    Returns
+    -------
+    processed: bool
+        If True, we did something, if False we didn't
+    """
+    blocksize = int(blocksize)
+    if blocksize < 1:
+        raise ValueError('blocksize must be a positive number of traces')
+
+    # Each pass is (name, step, halo, stack), with the step applied to a block of RadarData
+    passes = []
+    if restack is not None:
+        if isinstance(restack, (list, tuple)):
+            restack = restack[0]
+        traces = int(restack)
+        if traces % 2 == 0:
+            print('Only will stack odd numbers of traces. Using {:d}'.format(int(traces + 1)))
+            traces = traces + 1
+        passes.append(('restack', lambda rd: rd.restack(traces), 0, traces))
+    if vbp is not None:
+        passes.append(('vbp', lambda rd: rd.vertical_band_pass(*vbp), 0, 1))
+    if hfilt is not None:
+        passes.append(('hfilt', None, 0, 1))
+    if ahfilt:
+        if isinstance(ahfilt, (list, tuple)):
+            ahfilt = ahfilt[0]
+        window_size = int(ahfilt)
+        passes.append(('ahfilt', lambda rd: rd.adaptivehfilt(window_size=window_size), window_size, 1))
+    if nmo is not None:
+        passes.append(('nmo', lambda rd: rd.nmo(*nmo), 0, 1))
+    if denoise is not None:
+        passes.append(('denoise', None, 0, 1))
+    if crop is not None:
+        if crop[2] == 'pretrig' and isinstance(dat.trig, np.ndarray) and np.any(dat.trig != dat.trig[0]):
+            raise ValueError('Cannot stream a pretrig crop with a variable trigger')
+        passes.append(('crop', lambda rd: rd.crop(*crop), 0, 1))
+
+    if len(passes) == 0:
+        return False
+
+    # Intermediate results go in a directory of our own, which we remove at the end
+    if out_fn is not None:
+        tmpdir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(out_fn)))
+    elif dat.fn is not None:
+        tmpdir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(dat.fn)))
+    else:
+        tmpdir = tempfile.mkdtemp()
+
+    try:
+        for i, (name, step, halo, stack) in enumerate(passes):
+            # These need a first look through the whole profile
+            if name == 'hfilt':
+                step = _stream_hfilt_step(dat, blocksize, *hfilt)
+            elif name == 'denoise':
+                step, halo = _stream_denoise_step(dat, blocksize, *denoise)
+
+            if i == len(passes) - 1 and out_fn is not None:
+                pass_fn = out_fn
+            else:
+                pass_fn = _stream_tempfile(tmpdir)
+            last_fn = getattr(dat.data, 'filename', None) if i > 0 else None
+
+            snum_in = dat.snum
+            _stream_pass(dat, pass_fn, blocksize, step, halo=halo, stack=stack)
+            if dat.picks is not None:
+                if name == 'restack':
+                    dat.picks.restack(stack)
+                elif name == 'crop' and crop[1] == 'top':
+                    dat.picks.crop(snum_in - dat.snum)
+
+            if last_fn is not None:
+                _remove_mapped(last_fn)
+
+        if out_fn is None:
+            # Copy out of the temporary file so that it can be removed
+            dat.data = np.array(dat.data)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return True
+
+
+def _stream_pass(dat, out_fn, blocksize, step, halo=0, stack=1):
+    """Run one processing step through dat in blocks, writing to out_fn."""
+    tnum = dat._data_shape()[1]
+    if stack > 1:
+        blocksize = int(np.ceil(blocksize / stack)) * stack
+    out = None
+    trace_attrs = {}
+    for start in range(0, tnum, blocksize):
+        end = min(start + blocksize, tnum)
+        lims = (max(start - halo, 0), min(end + halo, tnum))
+        block = _stream_block(dat, lims)
+
+        # Only let the methods print for the first block
+        if start == 0:
+            step(block)
+        else:
+            with redirect_stdout(io.StringIO()):
+                step(block)
+
+        keep = slice((start - lims[0]) // stack, (start - lims[0]) // stack + (end - start) // stack)
+        if out is None:
+            first = block
+            out = np.lib.format.open_memmap(out_fn, mode='w+', dtype=block.data.dtype,
+                                            shape=(block.data.shape[0], tnum // stack))
+        out[:, start // stack:start // stack + (end - start) // stack] = block.data[:, keep]
+        for attr in STREAM_TRACE_ATTRS:
+            if isinstance(getattr(block, attr), np.ndarray):
+                trace_attrs.setdefault(attr, []).append(getattr(block, attr)[keep])
+    out.flush()
+
+    for attr in ['snum', 'travel_time', 'nmo_depth', 'flags', 'dt']:
+        setattr(dat, attr, getattr(first, attr))
+    for attr, vals in trace_attrs.items():
+        setattr(dat, attr, np.hstack(vals))
+    if not isinstance(dat.trig, np.ndarray):
+        dat.trig = first.trig
+    dat.data = out
+    dat.tnum = out.shape[1]
+    if stack > 1:
+        dat.trace_num = np.arange(dat.tnum).astype(int) + 1
+
+
+def _stream_block(dat, lims):
+    """Make a RadarData holding the traces lims[0]:lims[1] of dat in memory."""
+    block = copy(dat)
+    block.data = dat._read_traces(*lims)
+    block.tnum = block.data.shape[1]
+    block.flags = deepcopy(dat.flags)
+    block.picks = None
+    for attr in STREAM_TRACE_ATTRS:
+        val = getattr(dat, attr)
+        if isinstance(val, np.ndarray) and val.shape[0] == dat.tnum:
+            setattr(block, attr, val[lims[0]:lims[1]])
+    return block
+
+
+def _stream_hfilt_step(dat, blocksize, ntr1, ntr2):
+    """Find the average trace block by block, and return a step removing it.
+
+    This matches :func:`horizontalfilt <impdar.lib.RadarData.RadarData.horizontalfilt>`.
+    """
+    htr1 = int(max(0, min(ntr1, dat.tnum - 1)))
+    htrn = int(max(htr1 + 1, min(ntr2, dat.tnum)))
+    print('Subtracting mean trace found between {:d} and {:d}'.format(htr1, htrn))
+    avg_trace = np.zeros((dat._data_shape()[0], ))
+    for start in range(htr1, htrn, blocksize):
+        avg_trace += np.sum(dat._read_traces(start, min(start + blocksize, htrn)), axis=-1)
+    avg_trace = avg_trace / (htrn - htr1) * (
+        np.exp(-dat.travel_time.flatten() * 0.05) / np.exp(-dat.travel_time[0] * 0.05))
+
+    def step(block):
+        block.data = block.data - np.atleast_2d(avg_trace).transpose().astype(block.data.dtype)
+        block.flags.hfilt = np.ones((2,))
+    return step
+
+
+def _stream_denoise_step(dat, blocksize, vert_win, hor_win):
+    """Get the noise for the wiener filter block by block, and return a step and its halo.
+
+    The noise is the average local variance, as in scipy.signal.wiener.
+    """
+    halo = hor_win // 2 + 1
+    mysize = (vert_win, hor_win)
+    noise = 0.
+    for start in range(0, dat.tnum, blocksize):
+        end = min(start + blocksize, dat.tnum)
+        lims = (max(start - halo, 0), min(end + halo, dat.tnum))
+        block = dat._read_traces(*lims).astype(float)
+        lmean = correlate(block, np.ones(mysize), 'same') / np.prod(mysize)
+        lvar = correlate(block ** 2, np.ones(mysize), 'same') / np.prod(mysize) - lmean ** 2
+        noise += np.sum(lvar[:, start - lims[0]:end - lims[0]])
+    noise = noise / (dat._data_shape()[0] * dat.tnum)
+
+    def step(block):
+        # We want an error if there is no variance
+        with np.errstate(divide='raise'):
+            try:
+                block.denoise(vert_win, hor_win, noise=noise)
+            except FloatingPointError:
+                raise ValueError('Could not compute variance, specify noise for denoise')
+    return step, halo
+
+
+def _stream_tempfile(tmpdir):
+    """Make an empty temporary .npy file for streamed output."""
+    fid, fn = tempfile.mkstemp(suffix='.npy', dir=tmpdir)
+    os.close(fid)
+    return fn
+
+
+def _remove_mapped(fn):
+    """Remove a file that may still be memory mapped.
+
+    The mapping keeps the data on POSIX systems. Windows will not let us, so we leave it.
+    """
+    try:
+        os.remove(fn)
+    except OSError:
+        pass
+
+
 def concat(radar_data):
     """Concatenate all radar data input.
 
@@ -271,18 +651,18 @@ def concat(radar_data):
     return [out]
 
 
-def _save(rd_list, outpath=True, cat=False):
+def _save(rd_list, outpath=True, cat=False, **kwargs):
     if outpath is not None:
-        if len(rd_list) > 1:
+        if len(rd_list) > 1 or os.path.isdir(outpath):
             for rd in rd_list:
                 bn = os.path.split(os.path.splitext(rd.fn)[0])[1]
                 if bn[-4:] == '_raw':
                     bn = bn[:-4]
                 out_fn = os.path.join(outpath, bn + '_proc.mat')
-                rd.save(out_fn)
+                rd.save(out_fn, **kwargs)
         else:
             out_fn = outpath
-            rd_list[0].save(out_fn)
+            rd_list[0].save(out_fn, **kwargs)
     else:
         for rd in rd_list:
             bn = os.path.splitext(rd.fn)[0]
@@ -292,4 +672,4 @@ def _save(rd_list, outpath=True, cat=False):
                 out_fn = bn + '.mat'
             else:
                 out_fn = bn + '_proc.mat'
-            rd.save(out_fn)
+            rd.save(out_fn, **kwargs)
@@ -0,0 +1,160 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2019 David Lilien <dlilien90@gmail.com>
+#
+# Distributed under terms of the GNU GPL3.0 license.
+
+"""Processing recipes, which apply a list of steps with a single load and save.
+
+A recipe is a JSON or YAML file listing :class:`~impdar.lib.RadarData.RadarData`
+methods and their arguments, in the order that they should be applied. For example,
+
+.. code-block:: yaml
+
+    steps:
+      - vertical_band_pass: [150, 450]
+      - adaptivehfilt: {window_size: 1000}
+        save: true
+      - nmo: {ant_sep: 10}
+      - interp: [1.0, gps.csv]
+      - migrate: {mtype: stolt}
+
+Arguments are given as a list (positional), a mapping (keyword), a single
+value, or nothing. ``interp`` takes the spacing and a GPS file, as for
+``impdar proc -interp``, or the keyword arguments of
+:func:`~impdar.lib.gpslib.interp` (e.g. ``{spacing: 1.0, fn: gps.csv}``). By default, only the fully processed data are saved.
+Adding ``save: true`` (or ``save: name``) to a step also writes the data after
+that step, with the method name (or name) appended to the filename.
+"""
+import os.path
+import json
+
+from .gpslib import interp as interpdeep
+
+try:
+    import yaml
+    YAML = True
+except ImportError:
+    YAML = False
+
+#: RadarData methods that can be used in a recipe. interp is also allowed.
+RECIPE_METHODS = ['reverse', 'nmo', 'crop', 'hcrop', 'restack', 'rangegain', 'agc',
+                  'constant_space', 'elev_correct', 'constant_sample_depth_spacing',
+                  'adaptivehfilt', 'horizontalfilt', 'highpass', 'winavg_hfilt', 'hfilt',
+                  'vertical_band_pass', 'denoise', 'migrate', 'horizontal_band_pass',
+                  'lowpass']
+
+
+def load_recipe(fn):
+    """Read a recipe from a .json, .yml, or .yaml file.
+
+    Parameters
+    ----------
+    fn: str
+        The recipe file
+
+    Returns
+    -------
+    list
+        The steps, as (method, args, save) tuples
+    """
+    ext = os.path.splitext(fn)[1].lower()
+    with open(fn, 'r') as fin:
+        if ext in ['.yml', '.yaml']:
+            if not YAML:
+                raise ImportError('You need pyyaml to read YAML recipes')
+            recipe = yaml.safe_load(fin)
+        elif ext == '.json':
+            recipe = json.load(fin)
+        else:
+            raise ValueError('Recipes must be .json, .yml, or .yaml files')
+    return parse_recipe(recipe)
+
+
+def parse_recipe(recipe):
+    """Check a recipe and put the steps in a standard form.
+
+    Parameters
+    ----------
+    recipe: dict or list
+        A list of steps, or a dictionary with the steps under 'steps'.
+        Each step is a dictionary with one method name as key and its arguments
+        as the value, plus an optional 'save'.
+
+    Returns
+    -------
+    list
+        The steps, as (method, args, save) tuples
+    """
+    if isinstance(recipe, dict):
+        if 'steps' not in recipe:
+            raise ValueError('Recipe must have a list of steps')
+        recipe = recipe['steps']
+    if not isinstance(recipe, (list, tuple)):
+        raise ValueError('Recipe must have a list of steps')
+
+    steps = []
+    for step in recipe:
+        if isinstance(step, str):
+            step = {step: None}
+        if not isinstance(step, dict):
+            raise ValueError('Each step must be a method name and its arguments')
+        step = dict(step)
+        save = step.pop('save', False)
+        if len(step) != 1:
+            raise ValueError('Each step must have exactly one method, not {:s}'.format(
+                ', '.join(step.keys())))
+        method, args = list(step.items())[0]
+        if method not in RECIPE_METHODS + ['interp']:
+            raise ValueError('{:s} cannot be used in a recipe'.format(method))
+        steps.append((method, args, save))
+    return steps
+
+
+def apply_recipe(dat, steps, out_bn=None):
+    """Apply the steps of a recipe to a RadarData object, in memory.
+
+    The steps are added to dat.flags.recipe.
+
+    Parameters
+    ----------
+    dat: `~impdar.lib.RadarData.RadarData`
+        The data to process (modified in place)
+    steps: list
+        Steps from :func:`load_recipe` or :func:`parse_recipe`
+    out_bn: str, optional
+        Filename, without extension, used for any intermediate saves.
+        Default is the filename of dat, without any _raw.
+    """
+    if out_bn is None:
+        out_bn = os.path.splitext(dat.fn)[0]
+        if out_bn[-4:] == '_raw':
+            out_bn = out_bn[:-4]
+
+    if dat.flags.recipe:
+        applied = json.loads(dat.flags.recipe)
+    else:
+        applied = []
+    for method, args, save in steps:
+        if method == 'interp':
+            def func(*args, **kwargs):
+                interpdeep([dat], *args, **kwargs)
+        else:
+            func = getattr(dat, method)
+
+        if args is None:
+            func()
+        elif isinstance(args, dict):
+            func(**args)
+        elif isinstance(args, (list, tuple)):
+            func(*args)
+        else:
+            func(args)
+
+        applied.append({method: args})
+        dat.flags.recipe = json.dumps(applied)
+        if save:
+            dat.save(out_bn + '_' + (save if isinstance(save, str) else method) + '.mat')
+
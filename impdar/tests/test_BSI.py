@@ -12,6 +12,7 @@ Make sure that we can successfully read BSI input files
 
 import os
 import unittest
+import numpy as np
 from impdar.lib.load import load_bsi
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -31,6 +32,22 @@ class TestBSI(unittest.TestCase):
         load_bsi.load_bsi(os.path.join(THIS_DIR, 'input_data', 'bsi_2023.h5'), nans="interp")
         load_bsi.load_bsi(os.path.join(THIS_DIR, 'input_data', 'bsi_2023.h5'), nans="delete")
 
+    def test_xml_vals(self):
+        xmls = ['<Name>Lat_N</Name>\r\n<Val>6050.6</Val>\r\n<Name>GPS Fix valid</Name>\n<Val>1</Val>',
+                '<Name>GPS Fix valid</Name>\n<Val>0</Val>',
+                '<Name>Lat_N</Name>\n<Val>N</Val>\n<Name>Lat_N</Name>\n<Val>12</Val>']
+        self.assertTrue(np.allclose(load_bsi._xmlGetVals(xmls, 'GPS Fix Valid')[:2], [1., 0.]))
+        lat = load_bsi._xmlGetVals(xmls, 'Lat_N')
+        self.assertEqual(lat[0], 6050.6)
+        # Only the first value in each fragment counts
+        self.assertTrue(np.all(np.isnan(lat[1:])))
+        for xml, val in zip(xmls, lat):
+            old_val = load_bsi._xmlGetVal(xml, 'Lat_N')
+            if old_val is None or old_val == 'N':
+                self.assertTrue(np.isnan(val))
+            else:
+                self.assertEqual(float(old_val), val)
+
     @unittest.skipIf(load_bsi.H5, 'h5py is available')
     def test_load_bsi_noh5py(self):
         with self.assertRaises(ImportError):
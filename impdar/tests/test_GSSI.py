@@ -12,6 +12,7 @@ Make sure that we can successfully read gssi input files
 
 import os
 import unittest
+import numpy as np
 from impdar.lib.load import load_gssi
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -39,6 +40,20 @@ class TestGSSI(unittest.TestCase):
         load_gssi.load_gssi(os.path.join(THIS_DIR, 'input_data', 'test_gssi_justdzt.DZT')).save(os.path.join(THIS_DIR, 'input_data', 'test_gssi_justdzt_raw.mat'))
         os.remove(os.path.join(THIS_DIR, 'input_data', 'test_gssi_justdzt_raw.mat'))
 
+    def test_load_mmap(self):
+        fn_dzt = os.path.join(THIS_DIR, 'input_data', 'test_gssi.DZT')
+        dat = load_gssi.load_gssi(fn_dzt)
+        dat_mmap = load_gssi.load_gssi(fn_dzt, mmap=True)
+        # Nothing is read until we ask for it
+        self.assertNotIn('data', dat_mmap.__dict__)
+        self.assertEqual(dat_mmap._data_shape(), dat.data.shape)
+        self.assertTrue(np.all(dat_mmap._read_traces(10, 20) == dat.data[:, 10:20]))
+        self.assertTrue(np.all(dat_mmap.data == dat.data))
+
+        # Modifying the data must not touch the file
+        dat_mmap.data[:, 0] = 0
+        self.assertTrue(np.all(load_gssi.load_gssi(fn_dzt).data == dat.data))
+        self.assertTrue(np.all(load_gssi.load_gssi(fn_dzt, mmap=True).data == dat.data))
 
 if __name__ == '__main__':
     unittest.main()
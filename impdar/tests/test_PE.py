@@ -12,6 +12,7 @@ Make sure that we can successfully read gssi input files
 
 import os
 import unittest
+import numpy as np
 from impdar.lib.load import load_pulse_ekko
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,6 +23,33 @@ class TestPE(unittest.TestCase):
     def test_load_pe(self):
         load_pulse_ekko.load_pe(os.path.join(THIS_DIR, 'input_data', 'test_pe.DT1'))
 
+    def test_load_pe_synthetic(self):
+        tnum, snum = 10, 200
+        with open(os.path.join(THIS_DIR, 'input_data', 'synthetic_pe.HD'), 'w') as fout:
+            fout.write('1234\nData Collected with pulseEKKO 1.5.340\n04/20/2018\n'
+                       'NUMBER OF TRACES   = {:d}\nNUMBER OF PTS/TRC  = {:d}\n'
+                       'TIMEZERO AT POINT  = 20\nTOTAL TIME WINDOW  = 100.000\n'.format(tnum, snum))
+        traces = np.zeros((tnum, ), dtype=load_pulse_ekko._trace_dtype('1.5.340', snum))
+        traces['header'][:, 0] = np.arange(tnum) + 1
+        traces['header'][:, 23] = 3600. * np.arange(tnum)
+        traces['comment'] = b'comment'
+        traces['data'] = np.arange(snum)[None, :] + np.arange(tnum)[:, None]
+        traces.tofile(os.path.join(THIS_DIR, 'input_data', 'synthetic_pe.DT1'))
+
+        pe_data = load_pulse_ekko.load_pe(os.path.join(THIS_DIR, 'input_data', 'synthetic_pe.DT1'))
+        self.assertEqual(pe_data.data.shape, (snum, tnum))
+        self.assertEqual(pe_data.data.dtype, np.float32)
+        # The mean of the first 100 samples is removed from each trace
+        self.assertTrue(np.allclose(pe_data.data, np.arange(snum)[:, None] - 49.5))
+        self.assertTrue(np.all(pe_data.traceheaders.trace_numbers == np.arange(tnum) + 1))
+        self.assertTrue(np.all(pe_data.traceheaders.comment == b'comment'))
+        self.assertTrue(np.allclose(np.diff(pe_data.decday), 1. / 24.))
+
+    def tearDown(self):
+        for ext in ['.HD', '.DT1']:
+            if os.path.exists(os.path.join(THIS_DIR, 'input_data', 'synthetic_pe' + ext)):
+                os.remove(os.path.join(THIS_DIR, 'input_data', 'synthetic_pe' + ext))
+
 
 if __name__ == '__main__':
     unittest.main()
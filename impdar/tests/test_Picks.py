@@ -49,6 +49,64 @@ class TestPickMods(unittest.TestCase):
         data.picks.add_pick(2)
         self.assertTrue(data.picks.samp1.shape == (1, data.tnum))
 
+    def test_add_pick_many(self):
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data.mat'))
+        for i in range(50):
+            data.picks.add_pick(i)
+            data.picks.update_pick(i, np.ones((5, data.tnum)) * i)
+        for attr in ['samp1', 'samp2', 'samp3', 'time', 'power']:
+            self.assertEqual(getattr(data.picks, attr).shape, (50, data.tnum))
+            self.assertTrue(np.all(getattr(data.picks, attr) == np.arange(50)[:, None]))
+        self.assertEqual(data.picks.picknums, list(range(50)))
+
+        # if something replaces the matrices, we should add to the new ones
+        data.hcrop(9, left_or_right='right')
+        data.picks.add_pick(50)
+        self.assertEqual(data.picks.samp1.shape, (51, 8))
+        self.assertTrue(np.all(data.picks.samp1[:50] == np.arange(50)[:, None]))
+        self.assertTrue(np.all(np.isnan(data.picks.samp1[50])))
+        data.picks.samp1 = data.picks.samp1 + 1.
+        data.picks.samp1[-1, :] = 0.
+        data.picks.add_pick(51)
+        self.assertTrue(np.all(data.picks.samp1[:50] == np.arange(1, 51)[:, None]))
+        self.assertTrue(np.all(data.picks.samp1[50] == 0.))
+
+        # renaming a pick with a new list, as in the gui, should not lose track of it
+        picknums = list(data.picks.picknums)
+        picknums[3] = 100
+        data.picks.picknums = picknums
+        data.picks.update_pick(100, np.zeros((5, 8)))
+        self.assertTrue(np.all(data.picks.samp2[3] == 0))
+        data.picks.update_pick(51, np.zeros((5, 8)))
+        with self.assertRaises(ValueError):
+            data.picks.update_pick(3, np.zeros((5, 8)))
+        with self.assertRaises(ValueError):
+            data.picks.add_pick(100)
+
+    def test_add_pick_lookup(self):
+        class ScanCounter(list):
+            scans = 0
+
+            def __contains__(self, item):
+                ScanCounter.scans += 1
+                return list.__contains__(self, item)
+
+            def index(self, *args):
+                ScanCounter.scans += 1
+                return list.index(self, *args)
+
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data.mat'))
+        data.picks.add_pick(0)
+        data.picks.samp1[0, 0] = 1.
+        data.picks.picknums = ScanCounter(data.picks.picknums)
+        # Adding new picks should only use the dictionary
+        for i in range(1, 100):
+            data.picks.add_pick(i)
+            data.picks.samp1[-1, 0] = 1.
+        self.assertEqual(ScanCounter.scans, 0)
+        with self.assertRaises(ValueError):
+            data.picks.add_pick(50)
+
     def test_update_pick(self):
         data = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data.mat'))
         data.picks.add_pick(1)
@@ -67,6 +125,48 @@ class TestPickMods(unittest.TestCase):
         with self.assertRaises(ValueError):
             data.picks.update_pick(0, np.zeros((5, data.tnum)))
 
+    def test_auto_pick_all(self):
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data_picks.mat'))
+        # a flat reflector to follow
+        data.data = np.zeros_like(data.data)
+        data.data[10, :] = 1.
+        data.data[7, :] = -1.
+        data.data[13, :] = -1.
+
+        picknums = data.picks.auto_pick_all([[10, 5], [9, 30]])
+        self.assertEqual(picknums, [6, 7])
+        self.assertEqual(data.picks.picknums, [1, 5, 6, 7])
+        for attr in ['samp1', 'samp2', 'samp3', 'time', 'power']:
+            self.assertEqual(getattr(data.picks, attr).shape, (4, data.tnum))
+        self.assertTrue(np.all(data.picks.samp2[2:, :] == 10))
+        self.assertTrue(np.all(data.picks.samp1[2:, :] == 7))
+        self.assertTrue(np.all(data.picks.samp3[2:, :] == 13))
+        self.assertEqual(len(data.picks.lasttrace.snum), 4)
+
+        # in parallel, we should get the same thing
+        self.assertEqual(data.picks.auto_pick_all([[10, 5], [9, 30]], workers=2, picknums=[10, 11]),
+                         [10, 11])
+        self.assertTrue(np.allclose(data.picks.samp2[-2:, :], data.picks.samp2[2:4, :]))
+        self.assertTrue(np.allclose(data.picks.power[-2:, :], data.picks.power[2:4, :]))
+
+        with self.assertRaises(ValueError):
+            data.picks.auto_pick_all([[10, 5]], picknums=[1])
+        with self.assertRaises(ValueError):
+            data.picks.auto_pick_all([[10, 5], [10, 6]], picknums=[20, 20])
+        with self.assertRaises(ValueError):
+            data.picks.auto_pick_all([[10, 5]], picknums=[20, 21])
+
+        # and starting from nothing
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data.mat'))
+        data.data = np.zeros_like(data.data)
+        data.data[10, :] = 1.
+        data.data[7, :] = -1.
+        data.data[13, :] = -1.
+        data.picks.pickparams.freq_update(600.)
+        data.picks.auto_pick_all([[10, 0]])
+        self.assertEqual(data.picks.picknums, [1])
+        self.assertEqual(data.picks.samp1.shape, (1, data.tnum))
+
     def test_smooth(self):
         # first, no NaNs
         data = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data_picks.mat'))
@@ -11,9 +11,11 @@ Test the basics of RadarData
 """
 import sys
 import os
+import time
 import unittest
 import numpy as np
-from impdar.lib.RadarData import RadarData, _RadarDataProcessing
+from impdar.lib.RadarData import RadarData, _RadarDataProcessing, shift_traces
+from impdar.lib.NoInitRadarData import NoInitRadarData
 from impdar.lib.Picks import Picks
 from impdar.lib.ImpdarError import ImpdarError
 
@@ -25,6 +27,44 @@ else:
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
+def nmotime_loop(travel_time, dt, ant_sep, uice, d_interp=None, u_interp=None):
+    """Sample-by-sample moveout times, as nmo used to calculate them."""
+    nmotime = np.zeros((len(travel_time)))
+    for i, t in enumerate(travel_time):
+        if d_interp is None:
+            u_rms = uice
+        else:
+            d = t / 2. * uice * 1.0e-6
+            d_last = d.copy()
+            j, tol = 0, 0.1 * dt / 2. * uice
+            while abs(d - d_last) > tol or j < 5:
+                d_last = d.copy()
+                u_rms = np.sqrt(np.mean(u_interp[d_interp <= d] ** 2.))
+                d = t / 2. * u_rms * 1.0e-6
+                j += 1
+        tsep_ice = 1e6 * (ant_sep / u_rms)
+        nmotime[i] = np.sqrt((t + tsep_ice) ** 2. - tsep_ice ** 2.)
+    return nmotime
+
+
+def restack_loop(data, traces):
+    """Trace-by-trace restacking, as restack used to do it."""
+    tnum = int(np.floor(data.shape[1] / traces))
+    stack = np.zeros((data.shape[0], tnum))
+    for j in range(tnum):
+        stack[:, j] = np.mean(data[:, j * traces:min((j + 1) * traces, data.shape[1])], axis=1)
+    return stack
+
+
+def agc_maxamp_loop(data, window):
+    """Sample-by-sample agc amplitudes, as agc used to calculate them."""
+    maxamp = np.zeros((data.shape[0],))
+    for i in range(data.shape[0]):
+        maxamp[i] = np.max(np.abs(data[max(0, i - window // 2):min(i + window // 2, data.shape[0]), :]))
+    maxamp[maxamp == 0] = 1.0e-6
+    return maxamp
+
+
 class TestRadarDataLoading(unittest.TestCase):
 
     def test_ReadSucceeds(self):
@@ -171,6 +211,28 @@ class TestRadarDataMethods(unittest.TestCase):
         self.data.agc()
         self.assertTrue(self.data.flags.agc)
 
+        for window in [2, 5, 10, 41]:
+            self.setUp()
+            self.data.data = np.random.rand(self.data.snum, self.data.tnum) - 0.5
+            self.data.data[3, 4] = 0.
+            maxamp = agc_maxamp_loop(self.data.data, window)
+            target = self.data.data * 50. / np.atleast_2d(maxamp).transpose()
+            self.data.agc(window=window)
+            self.assertTrue(np.allclose(self.data.data, target))
+
+        with self.assertRaises(ValueError):
+            self.data.agc(window=1)
+
+    @unittest.skipIf(os.environ.get('IMPDAR_BENCHMARK') is None, 'Set IMPDAR_BENCHMARK to run benchmarks')
+    def test_agc_benchmark(self):
+        data = NoInitRadarData(big=True)
+        data.data = np.random.random((4000, 20000))
+        data.snum, data.tnum = data.data.shape
+        start = time.time()
+        data.agc()
+        print('AGC of 4000x20000 took {:4.1f} seconds'.format(time.time() - start))
+        self.assertLess(time.time() - start, 10.)
+
     def test_rangegain(self):
         self.data.rangegain(1.0)
         self.assertTrue(self.data.flags.rgain)
@@ -213,6 +275,27 @@ class TestRadarDataMethods(unittest.TestCase):
         self.setUp()
         self.data.nmo(0., rho_profile=os.path.join(THIS_DIR, 'input_data', 'rho_profile.txt'))
 
+        # Compare to interpolating the old, sample-by-sample, moveout times
+        for ant_sep in [0., 10.]:
+            for rho_profile in [None, os.path.join(THIS_DIR, 'input_data', 'rho_profile.txt')]:
+                self.setUp()
+                self.data.data = np.random.rand(self.data.snum, self.data.tnum)
+                tt, dt, data = self.data.travel_time, self.data.dt, self.data.data
+                if rho_profile is None:
+                    nmotime = nmotime_loop(tt, dt, ant_sep, 1.69e8)
+                else:
+                    rho = np.genfromtxt(rho_profile, delimiter=',')
+                    d_interp = np.linspace(np.min(rho[:, 0]), np.max(rho[:, 0]), 10 * self.data.snum)
+                    u_interp = 3.0e8 / np.sqrt(np.real(_RadarDataProcessing.firn_permittivity(
+                        np.interp(d_interp, rho[:, 0], rho[:, 1]))))
+                    nmotime = nmotime_loop(tt, dt, ant_sep, 1.69e8, d_interp, u_interp)
+                self.data.nmo(ant_sep, rho_profile=rho_profile)
+                self.assertTrue(np.allclose(self.data.travel_time,
+                                            np.arange(np.min(tt), np.max(nmotime), dt * 1.0e6)))
+                for ti in [0, 17]:
+                    self.assertTrue(np.allclose(
+                        self.data.data[:, ti], np.interp(self.data.travel_time, nmotime, data[:, ti])))
+
         # bad rho profile
         self.setUp()
         with self.assertRaises(Exception):
@@ -226,6 +309,38 @@ class TestRadarDataMethods(unittest.TestCase):
         self.data.restack(4)
         self.assertTrue(self.data.data.shape == (20, 8))
 
+    def test_restack_matches_loop(self):
+        for traces in [1, 3, 7, 39]:
+            self.setUp()
+            self.data.data = np.random.rand(self.data.snum, self.data.tnum)
+            self.data.picks.add_pick(1)
+            self.data.picks.samp2[0, :] = np.random.randint(0, self.data.snum, self.data.tnum)
+            self.data.picks.samp2[0, 1::2] = np.nan
+            target = restack_loop(self.data.data, traces)
+            dist = restack_loop(np.atleast_2d(self.data.dist), traces).flatten()
+            samp2 = self.data.picks.samp2[0, :].copy()
+            self.data.restack(traces)
+            self.assertTrue(np.allclose(self.data.data, target))
+            self.assertTrue(np.allclose(self.data.dist, dist))
+            for j in range(self.data.tnum):
+                picked = samp2[j * traces:(j + 1) * traces]
+                if np.all(np.isnan(picked)):
+                    self.assertTrue(np.isnan(self.data.picks.samp2[0, j]))
+                else:
+                    self.assertEqual(self.data.picks.samp2[0, j], int(np.nanmean(picked)))
+
+    @unittest.skipIf(os.environ.get('IMPDAR_BENCHMARK') is None, 'Set IMPDAR_BENCHMARK to run benchmarks')
+    def test_restack_benchmark(self):
+        data = NoInitRadarData(big=True)
+        data.data = np.random.random((4000, 20000))
+        data.snum, data.tnum = data.data.shape
+        for attr in ['dist', 'lat', 'long', 'decday', 'pressure', 'trig']:
+            setattr(data, attr, np.random.random((data.tnum, )))
+        start = time.time()
+        data.restack(5)
+        print('Restacking 4000x20000 by 5 took {:4.1f} seconds'.format(time.time() - start))
+        self.assertLess(time.time() - start, 10.)
+
     def test_elev_correct(self):
         self.data.elev = np.arange(self.data.data.shape[1]) * 0.002
         with self.assertRaises(ValueError):
@@ -234,6 +349,44 @@ class TestRadarDataMethods(unittest.TestCase):
         self.data.elev_correct(v_avg=2.0e6)
         self.assertTrue(self.data.data.shape == (26, 40))
 
+        # compare to shifting each trace on its own
+        self.setUp()
+        self.data.elev = np.random.rand(self.data.tnum) * 0.05
+        self.data.nmo(0, 2.0e6)
+        data = self.data.data.copy()
+        top_inds = ((np.max(self.data.elev) - self.data.elev) / (self.data.dt * 1.0e6)).astype(int)
+        self.data.elev_correct(v_avg=2.0e6)
+        for i in range(self.data.tnum):
+            self.assertTrue(np.all(np.isnan(self.data.data[:top_inds[i], i])))
+            self.assertTrue(np.all(self.data.data[top_inds[i]:top_inds[i] + data.shape[0], i] == data[:, i]))
+            self.assertTrue(np.all(np.isnan(self.data.data[top_inds[i] + data.shape[0]:, i])))
+
+    def test_shift_traces(self):
+        data = np.random.rand(20, 6)
+        self.assertIs(shift_traces(data, np.zeros((6, ))), data)
+
+        shifted = shift_traces(data, np.array([0, 2, -3, np.nan, 25, -20]))
+        self.assertEqual(shifted.shape, data.shape)
+        self.assertTrue(np.all(shifted[:, 0] == data[:, 0]))
+        self.assertTrue(np.all(np.isnan(shifted[:2, 1])))
+        self.assertTrue(np.all(shifted[2:, 1] == data[:-2, 1]))
+        self.assertTrue(np.all(shifted[:-3, 2] == data[3:, 2]))
+        self.assertTrue(np.all(np.isnan(shifted[-3:, 2])))
+        self.assertTrue(np.all(np.isnan(shifted[:, 3:])))
+
+        # Longer output, and sub-sample shifts interpolate
+        shifted = shift_traces(data, np.array([0.5, -1.25, 1, 0, 0, 0]), snum_out=22)
+        self.assertEqual(shifted.shape, (22, 6))
+        self.assertTrue(np.allclose(shifted[1:20, 0], (data[1:, 0] + data[:-1, 0]) / 2.))
+        self.assertTrue(np.all(np.isnan(shifted[[0, 20, 21], 0])))
+        self.assertTrue(np.allclose(shifted[:18, 1], 0.75 * data[1:-1, 1] + 0.25 * data[2:, 1]))
+        self.assertTrue(np.all(shifted[1:21, 2] == data[:, 2]))
+        self.assertTrue(np.all(shifted[:20, 3] == data[:, 3]))
+
+        # ints become floats so that they can hold NaNs
+        shifted = shift_traces(np.ones((5, 2), dtype=np.int16), [1, 0])
+        self.assertTrue(np.isnan(shifted[0, 0]))
+
     def test_constant_space_real(self):
         # Basic check where there is movement every step
         distlims = (self.data.dist[0], self.data.dist[-1])
@@ -16,6 +16,7 @@ from impdar.lib.NoInitRadarData import NoInitRadarDataFiltering as NoInitRadarDa
 from impdar.lib.RadarData import RadarData
 from impdar.lib import process
 from impdar.lib.ImpdarError import ImpdarError
+from scipy.signal import filtfilt
 if sys.version_info[0] >= 3:
     from unittest.mock import MagicMock, patch
 else:
@@ -35,6 +36,33 @@ def Any(cls):
     return Any()
 
 
+def adaptivehfilt_loop(data, travel_time, window_size):
+    # trace-by-trace reference for the vectorized adaptivehfilt
+    tnum = data.shape[1]
+    avg_trace_scale = np.exp(-travel_time.flatten() * 0.05) / np.exp(-travel_time[0] * 0.05)
+    out = np.zeros_like(data)
+    for i in range(tnum):
+        if i <= window_size // 2:
+            scpacket = data[:, 0:window_size // 2 + i]
+        elif i >= tnum - window_size // 2:
+            scpacket = data[:, tnum - window_size:tnum]
+        else:
+            scpacket = data[:, i - window_size // 2 + 1:i + window_size // 2]
+        out[:, i] = data[:, i] - filtfilt([.25, .25, .25, .25], 1, np.mean(scpacket, axis=-1)) * avg_trace_scale
+    return out
+
+
+def winavg_hfilt_loop(data, exptaper, avg_win):
+    # trace-by-trace reference for the vectorized winavg_hfilt
+    tnum = data.shape[1]
+    out = np.zeros_like(data)
+    for i in range(tnum):
+        range_start = max(i - (avg_win - 1) // 2, 0)
+        range_end = min(i + (avg_win - 1) // 2, tnum)
+        out[:, i] = data[:, i] - np.mean(data[:, range_start:range_end], axis=-1) * exptaper
+    return out
+
+
 class TestAdaptive(unittest.TestCase):
 
     def test_AdaptiveRun(self):
@@ -47,6 +75,16 @@ class TestAdaptive(unittest.TestCase):
         radardata.adaptivehfilt(window_size=radardata.tnum * 2)
         self.assertTrue(np.all(radardata.data <= 1.))
 
+    def test_AdaptiveMatchesLoop(self):
+        radardata = NoInitRadarData()
+        radardata.data = np.random.RandomState(0).randn(*radardata.data.shape)
+        for window_size in [2, 11, 40, radardata.tnum - 1]:
+            data = radardata.data.copy()
+            target = adaptivehfilt_loop(data, radardata.travel_time, window_size)
+            radardata.adaptivehfilt(window_size=window_size)
+            self.assertTrue(np.allclose(radardata.data, target))
+            radardata.data = data
+
 
 class TestHfilt(unittest.TestCase):
 
@@ -189,6 +227,17 @@ class TestWinAvgHfilt(unittest.TestCase):
         radardata.winavg_hfilt(11, taper='pexp', filtdepth=-1)
         self.assertTrue(np.all(radardata.data == radardata.pexp_target_output))
 
+    def test_WinAvgMatchesLoop(self):
+        radardata = NoInitRadarData()
+        radardata.data = np.random.RandomState(0).randn(*radardata.data.shape)
+        exptaper = np.exp(-radardata.travel_time.flatten() * 0.05) / np.exp(-radardata.travel_time[0] * 0.05)
+        for avg_win in [3, 11, 41, radardata.tnum - 1]:
+            data = radardata.data.copy()
+            target = winavg_hfilt_loop(data, exptaper, avg_win)
+            radardata.winavg_hfilt(avg_win, taper='full')
+            self.assertTrue(np.allclose(radardata.data, target))
+            radardata.data = data
+
     def test_WinAvgbadtaper(self):
         radardata = NoInitRadarData()
         with self.assertRaises(ValueError):
@@ -295,7 +344,18 @@ class TestMigrationWrapper(unittest.TestCase):
     def test_wrap_kirchhoff(self, patch_ob):
         radardata = NoInitRadarData()
         radardata.migrate(mtype='kirch', vel=10., nearfield=False)
-        patch_ob.assert_called_with(Any(RadarData), vel=10., nearfield=False)
+        patch_ob.assert_called_with(Any(RadarData), vel=10., nearfield=False, n_threads=None,
+                                    aperture=None, max_angle=None)
+
+        radardata.migrate(mtype='kirch', vel=10., nearfield=False, n_threads=2, aperture=100., max_angle=45.)
+        patch_ob.assert_called_with(Any(RadarData), vel=10., nearfield=False, n_threads=2,
+                                    aperture=100., max_angle=45.)
+
+    @patch('impdar.lib.migrationlib.migrationKirchhoffTable')
+    def test_wrap_kirchhofftable(self, patch_ob):
+        radardata = NoInitRadarData()
+        radardata.migrate(mtype='kirchtab', vel=10., nearfield=True, aperture=100.)
+        patch_ob.assert_called_with(Any(RadarData), vel=10., nearfield=True, aperture=100., max_angle=None)
 
     @patch('impdar.lib.migrationlib.migrationStolt')
     def test_wrap_stolt(self, patch_ob):
@@ -307,7 +367,10 @@ class TestMigrationWrapper(unittest.TestCase):
     def test_wrap_phaseshift(self, patch_ob):
         radardata = NoInitRadarData()
         radardata.migrate(mtype='phsh', vel=1., vel_fn='dummy', htaper=1, vtaper=2)
-        patch_ob.assert_called_with(Any(RadarData), vel=1., vel_fn='dummy', htaper=1, vtaper=2)
+        patch_ob.assert_called_with(Any(RadarData), vel=1., vel_fn='dummy', htaper=1, vtaper=2, n_threads=None)
+
+        radardata.migrate(mtype='phsh', vel=1., vel_fn='dummy', htaper=1, vtaper=2, n_threads=4)
+        patch_ob.assert_called_with(Any(RadarData), vel=1., vel_fn='dummy', htaper=1, vtaper=2, n_threads=4)
 
     @patch('impdar.lib.migrationlib.migrationTimeWavenumber')
     def test_wrap_tk(self, patch_ob):
@@ -15,7 +15,8 @@ import unittest
 import numpy as np
 from impdar.lib.RadarData import RadarData
 from impdar.lib.NoInitRadarData import NoInitRadarData
-from impdar.lib.RadarData._RadarDataSaving import CONVERSIONS_ENABLED
+from impdar.lib.RadarData._RadarDataSaving import CONVERSIONS_ENABLED, H5
+from impdar.lib.load import load
 from impdar.lib.RadarFlags import RadarFlags
 from impdar.lib.Picks import Picks
 
@@ -64,8 +65,69 @@ class TestRadarDataSaving(unittest.TestCase):
         rd.save(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
         RadarData(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
 
+    @unittest.skipIf(not H5, 'No h5py found')
+    def test_WriteReadH5(self):
+        rd = NoInitRadarData()
+        rd.save(os.path.join(THIS_DIR, 'input_data', 'test_out.h5'))
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'test_out.h5'))
+        self.assertTrue(np.all(data.data == rd.data))
+        self.assertTrue(data.picks.samp1 is None)
+
+        rd = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data.mat'))
+        rd.reverse()
+        rd.picks.add_pick(2)
+        rd.picks.samp2[0, :] = 5
+        rd.save(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'), format='h5')
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
+        for attr in rd.attrs_guaranteed + ['dist', 'lat', 'long', 'elev']:
+            self.assertTrue(np.all(getattr(data, attr) == getattr(rd, attr)))
+        self.assertEqual(data.data.dtype, rd.data.dtype)
+        self.assertTrue(data.flags.reverse)
+        self.assertEqual(data.flags.mig, rd.flags.mig)
+        self.assertEqual(data.picks.picknums, [2])
+        self.assertTrue(np.all(data.picks.samp2 == 5))
+        self.assertEqual(data.picks.pickparams.freq, rd.picks.pickparams.freq)
+
+        # Back to mat should also work
+        data.save(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
+        self.assertTrue(data.flags.reverse)
+        self.assertEqual(data.picks.picknums, [2])
+
+        with self.assertRaises(ValueError):
+            rd.save(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'), format='badformat')
+
+    @unittest.skipIf(not H5, 'No h5py found')
+    def test_WriteReadH5MatPicks(self):
+        # Picks from a .mat file carry the object arrays that loadmat makes
+        rd = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data_picks.mat'))
+        rd.save(os.path.join(THIS_DIR, 'input_data', 'test_out.h5'))
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'test_out.h5'))
+        self.assertEqual(data.picks.picknums, rd.picks.picknums)
+        for attr in ['samp1', 'samp2', 'samp3', 'power']:
+            self.assertTrue(np.allclose(getattr(data.picks, attr), getattr(rd.picks, attr), equal_nan=True))
+        self.assertEqual(np.ravel(data.picks.lt.llength)[0], 0)
+
+        # And we can go back to mat
+        data.save(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
+        data = RadarData(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
+        self.assertEqual(data.picks.picknums, rd.picks.picknums)
+        self.assertTrue(np.allclose(data.picks.samp1, rd.picks.samp1, equal_nan=True))
+
+    @unittest.skipIf(not H5, 'No h5py found')
+    def test_ReadLazyH5(self):
+        rd = RadarData(os.path.join(THIS_DIR, 'input_data', 'small_data.mat'))
+        rd.picks.add_pick(1)
+        rd.save_h5(os.path.join(THIS_DIR, 'input_data', 'test_out.h5'), chunk_traces=7)
+        data = load('mat', os.path.join(THIS_DIR, 'input_data', 'test_out.h5'), lazy=True)[0]
+        self.assertFalse('data' in vars(data))
+        self.assertTrue(np.all(data.dist == rd.dist))
+        self.assertEqual(data.picks.picknums, [1])
+        self.assertTrue(np.all(data.data == rd.data))
+        self.assertTrue('data' in vars(data))
+
     def tearDown(self):
-        for fn in ['test_out.mat', 'test.shp', 'test.shx', 'test.prj', 'test.dbf']:
+        for fn in ['test_out.mat', 'test_out.h5', 'test.shp', 'test.shx', 'test.prj', 'test.dbf']:
             if os.path.exists(os.path.join(THIS_DIR, 'input_data', fn)):
                 os.remove(os.path.join(THIS_DIR, 'input_data', fn))
 
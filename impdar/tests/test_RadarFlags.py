@@ -34,6 +34,12 @@ class TestFlags(unittest.TestCase):
         for attr in self.rdf.attrs:
             self.assertTrue(attr in out)
 
+    def test_RecipeConversion(self):
+        self.assertEqual(self.rdf.to_matlab()['recipe'], '')
+        self.rdf.recipe = '[{"reverse": null}]'
+        out = self.rdf.to_matlab()
+        self.assertEqual(out['recipe'], '[{"reverse": null}]')
+
     def test_InputConversion(self):
         
         in_flags_bad_format = {'agc': 0,
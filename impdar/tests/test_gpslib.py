@@ -115,6 +115,39 @@ class TestGPS(unittest.TestCase):
         with self.assertRaises(ValueError):
             gpslib.kinematic_gps_control(dat, np.arange(-1.0, 3.0, 0.1), np.arange(20, 60, 1), np.arange(-1000, 3000, 100), np.arange(-10, 30, 1), guess_offset=True, old_gps_gaps=True)
 
+    def test_kinematic_gps_offset(self):
+        # A wandering track, with the radar clock 30 seconds ahead of the GPS
+        rng = np.random.RandomState(0)
+        decday = 0.3 + np.arange(0., 4. * 3600.) / 86400.
+        lat = -75. + np.cumsum(rng.standard_normal(len(decday))) * 1.0e-5
+        lon = 100. + np.cumsum(rng.standard_normal(len(decday))) * 3.0e-5
+        offset = 30. / 86400.
+
+        dat = NoInitRadarData(big=True)
+        dat.decday = 0.35 + np.arange(0., 1800., 0.2) / 86400.
+        dat.lat = np.interp(dat.decday - offset, decday, lat)
+        dat.long = np.interp(dat.decday - offset, decday, lon)
+        guess = gpslib._guess_offset(dat.decday, dat.lat, dat.long, decday, lat, lon, 0.)
+        self.assertTrue(abs(guess - offset) < 0.1 / 86400.)
+
+        # and starting from a rough guess
+        guess = gpslib._guess_offset(dat.decday, dat.lat, dat.long, decday, lat, lon, 28. / 86400.)
+        self.assertTrue(abs(28. / 86400. + guess - offset) < 0.1 / 86400.)
+
+        with self.assertRaises(ValueError):
+            gpslib._guess_offset(dat.decday + 1., dat.lat, dat.long, decday, lat, lon, 0.)
+
+    def test_gps_gaps(self):
+        decday = np.hstack((np.arange(0., 10.), np.arange(20., 30.))) / 86400.
+        radar_decday = np.arange(-2., 32., 0.5) / 86400.
+        radar_decday[5] = np.nan
+        gaps = gpslib._gps_gaps(radar_decday, decday)
+        for i, dday in enumerate(radar_decday):
+            if np.isnan(dday) or np.min(abs(dday - decday)) > 1. / (24 * 3600.):
+                self.assertTrue(np.isnan(gaps[i]))
+            else:
+                self.assertEqual(gaps[i], dday)
+
     @patch('impdar.lib.gpslib.kinematic_gps_control')
     def test_kinematic_gps_mat(self, mock_kgc):
         dats = [NoInitRadarData(big=True)]
@@ -156,6 +189,28 @@ class TestGPS(unittest.TestCase):
         gpslib.interp(dats, 10.)
         self.assertGreater(len(mock_kgctrl.mock_calls), count)
 
+    def test_nmea_all_info(self):
+        gga = ['$GPGGA,000320,4739.2552,N,12218.5815,W,1,08,0.9,545.4,M,46.9,M,,*46\n',
+               '$GPGGA,000321,4739.2552,S,12218.5815,E,0,00,,,M,,M,,*47\n',
+               '$GPGGA,0003x2,4739.2552,N,12218.5815,W,0,00,,,M,,M,,*44\n',
+               '$GPGGA,000323,4739.2552,N,12218.5815,W,0,00\n',
+               '$GPGGA,000324,4739.2552,S\n',
+               '$GPGGA,000325,4739.2552,N,12218.5815,W,1,08,0.9,545.4,M,46.9,M,,*42']
+        data = gpslib.nmea_all_info(gga).all_data
+        self.assertEqual(data.shape, (6, 10))
+        self.assertTrue(np.allclose(data[0], [320., 4739.2552, 1., 12218.5815, -1., 1., 8., 0.9, 545.4, 46.9]))
+        self.assertTrue(np.allclose(data[1, :7], [321., 4739.2552, -1., 12218.5815, 1., 0., 0.]))
+        self.assertTrue(np.all(np.isnan(data[1, 7:])))
+        # corrupt and truncated sentences are nans
+        self.assertTrue(np.all(np.isnan(data[2])))
+        self.assertTrue(np.all(np.isnan(data[3])))
+        self.assertTrue(np.allclose(data[4, :3], [324., 4739.2552, -1.]))
+        self.assertTrue(np.all(np.isnan(data[4, 3:])))
+        self.assertTrue(np.allclose(data[5], data[0] + [5., 0., 0., 0., 0., 0., 0., 0., 0., 0.]))
+
+        with self.assertRaises(ValueError):
+            gpslib.nmea_all_info(gga + ['$GPRMC,000320,A,4739.2552,N,12218.5815,W,,,,,*46\n'])
+
     @unittest.skipIf(not gpslib.conversions_enabled, 'No gdal')
     def test_conversions(self):
         pts = np.array([[-8., 10.], [-9., 11.], [-10., 12.]])
@@ -168,6 +223,23 @@ class TestGPS(unittest.TestCase):
         proj_pts = conv_sps(pts)
         self.assertTrue(np.all(~np.isnan(proj_pts)))
 
+    def test_along_track_distance(self):
+        self.assertTrue(np.allclose(gpslib.along_track_distance(np.array([0., 3000., 3000.]),
+                                                                np.array([0., 4000., 5000.])),
+                                    [0., 5., 6.]))
+        x, y = gpslib.transform_points(lambda pts: [(pt[0] * 2., pt[1] + 1.) for pt in pts],
+                                       np.arange(3.), np.arange(3.))
+        self.assertTrue(np.allclose(x, [0., 2., 4.]))
+        self.assertTrue(np.allclose(y, [1., 2., 3.]))
+
+    @unittest.skipIf(not gpslib.conversions_enabled, 'No gdal')
+    def test_conversions_cached(self):
+        # Transforms are reused for the same zone or srs
+        self.assertIs(gpslib.get_utm_conversion(-8.0, 10.0), gpslib.get_utm_conversion(-8.5, 10.5))
+        self.assertIsNot(gpslib.get_utm_conversion(-8.0, 10.0), gpslib.get_utm_conversion(8.0, 10.0))
+        self.assertIs(gpslib.get_conversion(t_srs='EPSG:3031'), gpslib.get_conversion(t_srs='EPSG:3031'))
+        self.assertIs(gpslib.get_rev_conversion(t_srs='EPSG:3031'), gpslib.get_rev_conversion(t_srs='EPSG:3031'))
+
     @unittest.skipIf(gpslib.conversions_enabled, 'GDAL found, this is a failure test')
     def test_conversions_off(self):
         # we want to be able to import gpslib but later fail
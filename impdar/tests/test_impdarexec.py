@@ -32,6 +32,13 @@ class TestMain(unittest.TestCase):
         aca, kwca = load_patch.call_args
         self.assertEqual(kwca['fns_in'], ['fn.mat'])
         self.assertEqual(kwca['filetype'], 'mat')
+        self.assertEqual(kwca['workers'], 1)
+
+        impdarexec.sys.argv = ['dummy', 'load', '-j', '4', 'mat', 'fn.mat', 'fn2.mat']
+        impdarexec.main()
+        aca, kwca = load_patch.call_args
+        self.assertEqual(kwca['fns_in'], ['fn.mat', 'fn2.mat'])
+        self.assertEqual(kwca['workers'], 4)
 
         argparse_mock = MagicMock()
         with patch('argparse.ArgumentParser._print_message', argparse_mock):
@@ -47,6 +54,17 @@ class TestMain(unittest.TestCase):
         aca, kwca = process_patch.call_args
         self.assertEqual(kwca['fn'], ['fn.mat'])
         self.assertEqual(kwca['rev'], True)
+        self.assertIsNone(kwca['blocksize'])
+
+        impdarexec.sys.argv = ['dummy', 'proc', '-restack', '3', '-blocksize', '1000', 'fn.mat']
+        impdarexec.main()
+        aca, kwca = process_patch.call_args
+        self.assertEqual(kwca['blocksize'], 1000)
+
+        impdarexec.sys.argv = ['dummy', 'proc', '-rev', '--jobs', '4', 'fn.mat', 'fn2.mat']
+        impdarexec.main()
+        aca, kwca = process_patch.call_args
+        self.assertEqual(kwca['jobs'], 4)
 
     @patch('impdar.bin.impdarexec.plot.plot')
     def test_plot(self, plot_patch):
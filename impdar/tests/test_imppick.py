@@ -115,6 +115,26 @@ class TestMain(unittest.TestCase):
         self.assertTrue(pick_patch.called)
         pick_patch.assert_called_with(load_patch.return_value[0], xdat='dist', ydat='twtt')
 
+    @unittest.skipIf(not QT, 'No Qt')
+    @patch('impdar.bin.imppick.pickgui.InteractivePicker')
+    @patch('impdar.bin.imppick.load.load')
+    def test_autopick_seeds(self, load_patch, pick_patch):
+        load_patch.return_value = [MagicMock()]
+        imppick.sys.argv = ['dummy', 'fn.mat', '--seeds', 'seeds.txt', '--jobs', '4']
+        with patch('impdar.bin.imppick.np.loadtxt') as loadtxt_patch:
+            imppick.main()
+        self.assertTrue(loadtxt_patch.called)
+        load_patch.return_value[0].picks.auto_pick_all.assert_called_with(loadtxt_patch.return_value,
+                                                                         workers=4)
+        load_patch.return_value[0].save.assert_called_with('fn_pick.mat')
+        self.assertFalse(pick_patch.called)
+
+        imppick.sys.argv = ['dummy', 'fn.mat', '--seeds', 'seeds.csv', '-o', 'out.mat']
+        with patch('impdar.bin.imppick.np.loadtxt') as loadtxt_patch:
+            imppick.main()
+        self.assertEqual(loadtxt_patch.call_args[1]['delimiter'], ',')
+        load_patch.return_value[0].save.assert_called_with('out.mat')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,6 +14,7 @@ import os
 import unittest
 from impdar.bin import impproc
 from impdar.lib import NoInitRadarData
+from impdar.lib.RadarData import RadarData
 
 if sys.version_info[0] >= 3:
     from unittest.mock import patch, MagicMock
@@ -115,6 +116,38 @@ class TestMain(unittest.TestCase):
                 impproc.sys.argv = ['dummy', 'ahfilt']
                 impproc.main()
 
+    def test_jobs(self):
+        out_dir = os.path.join(THIS_DIR, 'input_data')
+        impproc.sys.argv = ['dummy', 'rev', '--jobs', '2', '-o', out_dir,
+                            os.path.join(THIS_DIR, 'input_data', 'small_data.mat'),
+                            os.path.join(THIS_DIR, 'input_data', 'data_raw.mat')]
+        impproc.main()
+        for bn in ['small_data_rev.mat', 'data_rev.mat']:
+            self.assertTrue(os.path.exists(os.path.join(out_dir, bn)))
+            os.remove(os.path.join(out_dir, bn))
+
+        # One bad file should not stop the rest
+        impproc.sys.argv = ['dummy', 'rev', '--jobs', '2',
+                            os.path.join(THIS_DIR, 'input_data', 'not_a_file.mat'),
+                            os.path.join(THIS_DIR, 'input_data', 'small_data.mat')]
+        with self.assertRaises(impproc.ImpdarError):
+            impproc.main()
+        self.assertTrue(os.path.exists(os.path.join(out_dir, 'small_data_rev.mat')))
+        os.remove(os.path.join(out_dir, 'small_data_rev.mat'))
+
+    def test_recipe(self):
+        fn_recipe = os.path.join(THIS_DIR, 'input_data', 'test_recipe.json')
+        with open(fn_recipe, 'w') as fout:
+            fout.write('{"steps": [{"reverse": null}, {"restack": 3}]}')
+        impproc.sys.argv = ['dummy', 'recipe', fn_recipe, os.path.join(THIS_DIR, 'input_data', 'small_data.mat')]
+        impproc.main()
+        fn_out = os.path.join(THIS_DIR, 'input_data', 'small_data_proc.mat')
+        self.assertTrue(os.path.exists(fn_out))
+        self.assertEqual(RadarData(fn_out).flags.recipe,
+                         '[{"reverse": null}, {"restack": 3}]')
+        os.remove(fn_out)
+        os.remove(fn_recipe)
+
 
 class TestInputs(unittest.TestCase):
 
@@ -438,7 +471,7 @@ class TestInputs(unittest.TestCase):
         self.assertTrue(migrate_patch.called)
 
         # mtype tests
-        for mtype in ['stolt', 'kirch', 'phsh', 'tk', 'sustolt', 'sumigtk', 'sumigffd']:
+        for mtype in ['stolt', 'kirch', 'kirchtab', 'phsh', 'tk', 'sustolt', 'sumigtk', 'sumigffd']:
             impproc.sys.argv = ['dummy', 'migrate', '--mtype', mtype, 'dummy.mat']
             impproc.main()
             aca, kwca = migrate_patch.call_args
@@ -544,6 +577,23 @@ class TestInputs(unittest.TestCase):
                 impproc.sys.argv = ['dummy', 'migrate', '--verbose', str(worseint), 'dummy.mat']
                 impproc.main()
 
+        impproc.sys.argv = ['dummy', 'migrate', '--aperture', str(goodint), '--max_angle', str(goodint), 'dummy.mat']
+        impproc.main()
+        aca, kwca = migrate_patch.call_args
+        self.assertEqual(kwca['aperture'], goodint)
+        self.assertEqual(kwca['max_angle'], goodint)
+
+        impproc.sys.argv = ['dummy', 'migrate', '--n_threads', str(goodint), 'dummy.mat']
+        impproc.main()
+        aca, kwca = migrate_patch.call_args
+        self.assertEqual(kwca['n_threads'], goodint)
+
+        argparse_mock = MagicMock()
+        with patch('argparse.ArgumentParser._print_message', argparse_mock):
+            with self.assertRaises(SystemExit):
+                impproc.sys.argv = ['dummy', 'migrate', '--n_threads', str(badint), 'dummy.mat']
+                impproc.main()
+
         impproc.sys.argv = ['dummy', 'migrate', '--vel', str(goodint), 'dummy.mat']
         impproc.main()
         aca, kwca = migrate_patch.call_args
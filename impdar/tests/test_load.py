@@ -11,8 +11,12 @@
 """
 import sys
 import os
+import shutil
+import tempfile
 import unittest
+import numpy as np
 from impdar.lib import load
+from impdar.lib.ImpdarError import ImpdarError
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -25,6 +29,9 @@ class TestLoad(unittest.TestCase):
 
     def test_loadgssi(self):
         data = load.load('gssi', os.path.join(THIS_DIR, 'input_data', 'test_gssi.DZT'))
+        data_mmap = load.load('gssi', os.path.join(THIS_DIR, 'input_data', 'test_gssi.DZT'), mmap=True)
+        self.assertNotIn('data', data_mmap[0].__dict__)
+        self.assertTrue(np.all(data_mmap[0].data == data[0].data))
 
     def test_loadUoA(self):
         data = load.load('UoA_h5', os.path.join(THIS_DIR, 'input_data', 'UoA_dummy.h5'))
@@ -37,6 +44,27 @@ class TestLoad(unittest.TestCase):
         data = load.load('gecko', os.path.join(THIS_DIR, 'input_data', 'test_gecko.gtd'))
         data = load.load('gecko', [os.path.join(THIS_DIR, 'input_data', 'test_gecko.gtd'), os.path.join(THIS_DIR, 'input_data', 'test_gecko.gtd')])
 
+    def test_gecko_markers(self):
+        from impdar.lib.load import load_olaf
+        with open(os.path.join(THIS_DIR, 'input_data', 'test_gecko.gtd'), 'rb') as fin:
+            lines = fin.read()
+        sinfo = load_olaf.SInfo(lines)
+        headers, data = load_olaf._read_records(lines, sinfo)
+        self.assertEqual(len(headers), 2 * sinfo.tnum)
+        self.assertTrue(np.all(headers['header_type'] == 0))
+
+        # Put a marker and a comment between the first two traces
+        head_len = np.dtype(load_olaf._trace_header_fields(sinfo.version)).itemsize
+        cut = sinfo.offset + 2 * (head_len + 2 * sinfo.snum)
+        marker = b'\x01' + lines[cut + 1:cut + head_len] + b'm' * 38
+        comment = b'\x02' + lines[cut + 1:cut + head_len]
+        marked = lines[:cut] + marker + comment + lines[cut:]
+        headers_m, data_m = load_olaf._read_records(marked, sinfo)
+        self.assertEqual(list(headers_m['header_type'][:5]), [0, 0, 1, 2, 0])
+        self.assertTrue(np.all(data_m[2:4] == 0))
+        self.assertTrue(np.all(data_m[4:] == data[2:]))
+        self.assertTrue(np.all(headers_m['lat'][4:] == headers['lat'][2:]))
+
     def test_loadbad(self):
         with self.assertRaises(ValueError):
             data = load.load('bad', os.path.join(THIS_DIR, 'input_data', 'small_data.bad'))
@@ -44,6 +72,34 @@ class TestLoad(unittest.TestCase):
     def test_loadtek(self):
         data = load.load('tek', os.path.join(THIS_DIR, 'input_data', 'test_tek.DAT'))
 
+    def test_tek_records(self):
+        from impdar.lib.load import load_tek
+        with open(os.path.join(THIS_DIR, 'input_data', 'test_tek.DAT'), 'rb') as fin:
+            lines = fin.read()
+        headers, data = load_tek._read_records(lines)
+        self.assertEqual(data.shape, (12, 1000))
+
+        # A truncated record at the end is dropped
+        headers_t, data_t = load_tek._read_records(lines + lines[:1000])
+        self.assertTrue(np.all(data_t == data))
+        self.assertTrue(np.all(headers_t == headers))
+
+        # Including when it is the only one
+        for truncated in [lines[:500], lines[:10], b'']:
+            headers_t, data_t = load_tek._read_records(truncated)
+            self.assertEqual(len(headers_t), 0)
+            self.assertEqual(data_t.shape[0], 0)
+
+        # Shorter records are padded
+        short = np.frombuffer(lines[:load_tek.TEK_HEADER.itemsize], dtype=load_tek.TEK_HEADER).copy()
+        short['length'] = 500
+        short = short.tobytes() + lines[load_tek.TEK_HEADER.itemsize:load_tek.TEK_HEADER.itemsize + 1000]
+        headers_v, data_v = load_tek._read_records(lines[:2020] + short + lines[2020:])
+        self.assertEqual(list(headers_v['length'][:3]), [1000, 500, 1000])
+        self.assertTrue(np.all(data_v[1, :500] == data[0, :500]))
+        self.assertTrue(np.all(data_v[1, 500:] == 512))
+        self.assertTrue(np.all(data_v[2:] == data[1:]))
+
     def test_load_apresprofile(self):
         data = load.load('apres', os.path.join(THIS_DIR, 'input_data', 'apres_1.DAT'))
 
@@ -60,6 +116,41 @@ class TestLoad(unittest.TestCase):
         self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'input_data', 'test_gecko_raw.mat')))
         os.remove(os.path.join(THIS_DIR, 'input_data', 'test_gecko_raw.mat'))
 
+    def test_load_workers(self):
+        fns = [os.path.join(THIS_DIR, 'input_data', fn) for fn in ['small_data.mat', 'data_raw.mat', 'small_data.mat']]
+        dats = load.load('mat', fns)
+        dats_parallel = load.load('mat', fns, workers=2)
+        self.assertEqual(len(dats_parallel), 3)
+        for dat, dat_parallel in zip(dats, dats_parallel):
+            self.assertEqual(dat.fn, dat_parallel.fn)
+            self.assertTrue(np.all(dat.data == dat_parallel.data))
+
+        # Extra positional arguments go to the workers too
+        dats_parallel = load.load('mat', fns, 1, None, None, 'extra', workers=2)
+        self.assertEqual([dat.fn for dat in dats_parallel], [dat.fn for dat in dats])
+
+        # One bad file fails the load, but the others are still tried
+        with self.assertRaises(ImpdarError):
+            load.load('mat', fns + [os.path.join(THIS_DIR, 'input_data', 'not_a_file.mat')], workers=2)
+
+        # Memory maps would be copied back from workers, so we load them here
+        dats_mmap = load.load('gssi', [os.path.join(THIS_DIR, 'input_data', 'test_gssi.DZT')] * 2,
+                              mmap=True, workers=2)
+        self.assertTrue(all('data' not in dat.__dict__ for dat in dats_mmap))
+
+    def test_load_and_exit_workers(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fns = []
+            for fn in ['small_data.mat', 'data_raw.mat', 'test_tek.DAT']:
+                shutil.copy(os.path.join(THIS_DIR, 'input_data', fn), tmpdir)
+                fns.append(os.path.join(tmpdir, fn))
+            load.load_and_exit('mat', fns[:2], workers=2)
+            # Each worker writes its own output
+            for fn in ['small_data_raw.mat', 'data_raw_raw.mat']:
+                self.assertTrue(os.path.exists(os.path.join(tmpdir, fn)))
+            with self.assertRaises(ImpdarError):
+                load.load_and_exit('mat', fns[1:], workers=2)
+
     def test_load_and_exitcustomfn(self):
         data = load.load_and_exit('mat', os.path.join(THIS_DIR, 'input_data', 'small_data.mat'))
         self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'input_data', 'small_data_raw.mat')))
@@ -16,6 +16,7 @@ Mar 12 2019
 
 import sys
 import os
+import time
 import unittest
 import pytest
 import subprocess as sp
@@ -109,10 +110,91 @@ class TestMigration(unittest.TestCase):
         data.data.dtype = int
         data = mig_python.migrationStolt(data)
 
+    def test_StoltInterp(self):
+        # Compare to the spline evaluated point-by-point, which is what we used to do
+        from scipy.interpolate import RectBivariateSpline
+        vel = 1.68e8
+        FK = np.random.random((26, 30)) + 1j * np.random.random((26, 30))
+        ws = 2. * np.pi * np.fft.rfftfreq(50, d=1.0e-8)
+        kx = 2. * np.pi * np.fft.fftfreq(30, d=3.)
+        interp_real = RectBivariateSpline(np.fft.fftshift(kx), ws, np.fft.fftshift(FK.real, axes=[1]).T, kx=1, ky=1)
+        interp_imag = RectBivariateSpline(np.fft.fftshift(kx), ws, np.fft.fftshift(FK.imag, axes=[1]).T, kx=1, ky=1)
+        KK_spline = np.zeros_like(FK)
+        for zj in range(25):
+            for xi in range(len(kx)):
+                wsj = vel / 2. * np.sqrt((ws[zj] * 2. / vel) ** 2. + kx[xi] ** 2.)
+                KK_spline[zj, xi] = interp_real(kx[xi], wsj)[0, 0] + 1j * interp_imag(kx[xi], wsj)[0, 0]
+
+        KK = mig_python.stoltInterp(FK, ws, kx, vel)
+        self.assertTrue(np.allclose(KK, KK_spline))
+        # chunking should not matter
+        KK = mig_python.stoltInterp(FK, ws, kx, vel, chunksize=7)
+        self.assertTrue(np.allclose(KK, KK_spline))
+
+    @unittest.skipIf(os.environ.get('IMPDAR_BENCHMARK') is None, 'Set IMPDAR_BENCHMARK to run benchmarks')
+    def test_Stolt_benchmark(self):
+        data = NoInitRadarData(big=True)
+        data.data = np.random.random((4000, 20000))
+        data.snum, data.tnum = data.data.shape
+        data.travel_time = np.arange(data.snum) * 0.01
+        data.dt = 1.0e-8
+        data.trace_int = np.ones((data.tnum, ))
+        start = time.time()
+        mig_python.migrationStolt(data)
+        print('Stolt migration of 4000x20000 took {:4.1f} seconds'.format(time.time() - start))
+        self.assertLess(time.time() - start, 60.)
+
     def test_Kirchhoff(self):
         data = NoInitRadarData(big=True)
         data = mig_python.migrationKirchhoff(data)
 
+    def test_KirchhoffAperture(self):
+        # close enough traces that the hyperbolae span several of them
+        data = NoInitRadarData(big=True)
+        data.data = np.random.random(data.data.shape)
+        data.dist = data.dist * 0.1
+        pdata = NoInitRadarData(big=True)
+        pdata.data = data.data.copy()
+        pdata.dist = data.dist.copy()
+        data = mig_python.migrationKirchhoff(data)
+        pdata = mig_python.migrationKirchhoff(pdata, aperture=1.0e6, max_angle=90.)
+        self.assertTrue(np.allclose(data.data, pdata.data))
+
+        # a narrow aperture should change things
+        pdata = NoInitRadarData(big=True)
+        pdata.data = np.random.random(data.data.shape)
+        pdata.dist = data.dist.copy()
+        adata = NoInitRadarData(big=True)
+        adata.data = pdata.data.copy()
+        adata.dist = data.dist.copy()
+        pdata = mig_python.migrationKirchhoff(pdata)
+        adata = mig_python.migrationKirchhoff(adata, aperture=250., max_angle=20.)
+        self.assertFalse(np.allclose(adata.data, pdata.data))
+
+    def test_KirchhoffTable(self):
+        for kwargs in [{}, {'aperture': 250.}, {'max_angle': 30.}, {'nearfield': True}]:
+            data = NoInitRadarData(big=True)
+            data.data = np.random.random(data.data.shape)
+            data.dist = data.dist * 0.1
+            tdata = NoInitRadarData(big=True)
+            tdata.data = data.data.copy()
+            tdata.dist = data.dist.copy()
+            data = mig_python.migrationKirchhoff(data, **kwargs)
+            tdata = mig_python.migrationKirchhoffTable(tdata, **kwargs)
+            self.assertTrue(np.allclose(data.data, tdata.data))
+
+        # tables get reused
+        Didx, weight, nearweight = mig_python.kirchhoffTable(1.0e3, 1.69e8, np.arange(10) / 1.0e6)
+        Didx2, _, _ = mig_python.kirchhoffTable(1.0e3, 1.69e8, np.arange(10) / 1.0e6)
+        self.assertIs(Didx, Didx2)
+        self.assertEqual(Didx.shape, weight.shape)
+
+        # need constant spacing
+        data = NoInitRadarData(big=True)
+        data.dist = data.dist ** 2.
+        with self.assertRaises(ValueError):
+            mig_python.migrationKirchhoffTable(data)
+
     def test_TimeWavenumber(self):
         data = NoInitRadarData(big=True)
         data = mig_python.migrationTimeWavenumber(data)
@@ -130,6 +212,32 @@ class TestMigration(unittest.TestCase):
         with self.assertRaises(TypeError):
             data = mig_python.migrationPhaseShift(data, vel_fn=os.path.join(THIS_DIR, 'input_data', 'notafile.txt'))
 
+    def test_PhaseShiftThreads(self):
+        for vel_fn in [None, os.path.join(THIS_DIR, 'input_data', 'velocity_layers.txt')]:
+            data = NoInitRadarData(big=True)
+            data.data = np.random.random(data.data.shape)
+            data.travel_time = data.travel_time / 10.
+            tdata = NoInitRadarData(big=True)
+            tdata.data = data.data.copy()
+            tdata.travel_time = data.travel_time.copy()
+            data = mig_python.migrationPhaseShift(data, vel_fn=vel_fn)
+            tdata = mig_python.migrationPhaseShift(tdata, vel_fn=vel_fn, n_threads=3)
+            self.assertTrue(np.allclose(data.data, tdata.data))
+
+    def test_phaseShiftOperator(self):
+        ws = 2. * np.pi * np.fft.fftfreq(16, d=1.0e-8)
+        kx = 2. * np.pi * np.fft.fftfreq(20, d=1.)
+        cshift, coss = mig_python.phaseShiftOperator(1.68e8, 1.0e-8, ws, kx)
+        self.assertEqual(cshift.shape, (16, 20))
+        self.assertTrue(np.allclose(np.abs(cshift), 1.))
+        # no shift for evanescent waves
+        self.assertTrue(np.all(cshift[coss <= 0.] == 1.))
+        # Reused for the same layer
+        cshift2, _ = mig_python.phaseShiftOperator(1.68e8, 1.0e-8, ws, kx)
+        self.assertIs(cshift, cshift2)
+        cshift2, _ = mig_python.phaseShiftOperator(1.0e8, 1.0e-8, ws, kx)
+        self.assertIsNot(cshift, cshift2)
+
     def test_PhaseShiftLateral(self):
         data = NoInitRadarData(big=True)
         data = mig_python.migrationPhaseShift(data, vel_fn=os.path.join(THIS_DIR, 'input_data', 'velocity_lateral.txt'))
@@ -193,6 +301,31 @@ class TestCythonMig(unittest.TestCase):
         data.data[np.isnan(data.data)] = 0.
         self.assertTrue(np.allclose(data.data, pdata.data))
 
+    @unittest.skipIf(not CYTHON, 'No compiled mig library here')
+    def test_compKirchoff_cython_aperture(self):
+        data = NoInitRadarData(big=True)
+        data.data = np.random.random(data.data.shape)
+        data.dist = data.dist * 0.1
+        pdata = NoInitRadarData(big=True)
+        pdata.data = data.data.copy()
+        pdata.dist = data.dist.copy()
+
+        data = mig_cython.migrationKirchhoff(data, aperture=250., max_angle=30.)
+        pdata = mig_python.migrationKirchhoff(pdata, aperture=250., max_angle=30.)
+        data.data[np.isnan(data.data)] = 0.
+        self.assertTrue(np.allclose(data.data, pdata.data))
+
+    @unittest.skipIf(not CYTHON, 'No compiled mig library here')
+    def test_Kirchoff_cython_threads(self):
+        data = NoInitRadarData(big=True)
+        data.data = np.random.random(data.data.shape)
+        tdata = NoInitRadarData(big=True)
+        tdata.data = data.data.copy()
+
+        data = mig_cython.migrationKirchhoff(data, n_threads=1)
+        tdata = mig_cython.migrationKirchhoff(tdata, n_threads=4)
+        self.assertTrue(np.allclose(data.data, tdata.data, equal_nan=True))
+
 
 if __name__ == '__main__':
     unittest.main()
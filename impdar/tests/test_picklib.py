@@ -11,6 +11,7 @@ Test the methods on the Pick object
 """
 
 import os
+import time
 import unittest
 import numpy as np
 from impdar.lib.NoInitRadarData import NoInitRadarData
@@ -31,6 +32,66 @@ class BareRadarData(NoInitRadarData):
         self.picks = Picks.Picks(self)
 
 
+def pick_loop(traces, snum_start, snum_end, pickparams):
+    """Pick trace by trace, as pick used to."""
+    picks_out = np.zeros((5, traces.shape[1]))
+    dmid = picklib._midpoint(traces.shape[1], snum_start, snum_end)
+    for i in range(traces.shape[1]):
+        picks_out[:, i] = picklib.packet_pick(traces[:, i], pickparams, dmid[i])
+    return picks_out
+
+
+def auto_pick_loop(dat, snums, tnums):
+    """Follow each reflector trace by trace, as auto_pick used to."""
+    picks_out = np.empty((len(snums), 5, dat.tnum))
+    for i in range(len(snums)):
+        j = int(tnums[i])
+        t_start = int(tnums[i])
+        dmid = snums[i]
+        for n in range(dat.tnum):
+            pp = picklib.packet_pick(dat.data[:, j], dat.picks.pickparams, dmid)
+            picks_out[i, :, j] = pp
+            if j <= t_start and j > 0:
+                dmid = (pp[0] + pp[2]) // 2
+                j -= 1
+            elif j == 0:
+                dmid = (picks_out[i, 0, t_start] + picks_out[i, 2, t_start]) // 2
+                j = t_start + 1
+            elif j > t_start:
+                dmid = (pp[0] + pp[2]) // 2
+                j += 1
+    return picks_out
+
+
+def wavy_data(snum, tnum, noise=0.3):
+    """A noisy image with two undulating reflectors."""
+    data = BareRadarData()
+    data.data = noise * np.random.RandomState(0).standard_normal((snum, tnum))
+    data.snum, data.tnum = snum, tnum
+    tt = np.arange(tnum)
+    surf = snum // 3 + snum / 10. * np.sin(tt * 6. * np.pi / tnum) + 2. * np.sin(tt / 7.)
+    for offset in [0, snum // 3]:
+        idx = (surf + offset).astype(int)
+        data.data[idx, tt] += 3.
+        data.data[idx - 3, tt] -= 2.
+        data.data[idx + 3, tt] -= 2.
+    return data, surf
+
+
+def survey_line(x_coord, y_coord, picknums=(1,)):
+    """A profile along the given coordinates with picks numbered by trace."""
+    data = BareRadarData()
+    data.tnum = len(x_coord)
+    data.data = np.zeros((data.snum, data.tnum))
+    data.x_coord = np.array(x_coord, dtype=float)
+    data.y_coord = np.array(y_coord, dtype=float)
+    data.picks = Picks.Picks(data)
+    for num in picknums:
+        data.picks.add_pick(num)
+        data.picks.update_pick(num, np.ones((5, data.tnum)) * np.arange(data.tnum) + 1000 * num)
+    return data
+
+
 class TestPickLib(unittest.TestCase):
 
     def test_midpoint(self):
@@ -140,6 +201,55 @@ class TestPickLib(unittest.TestCase):
         tnum, sn = picklib.get_intersection(thisdata, thatdata, multiple_int=False, return_nans=False)
         self.assertTrue(len(sn) == len(thisdata.picks.picknums))
 
+    def test_crossovers(self):
+        # three lines east-west, two north-south, and one that wiggles across
+        # the first east-west line three times
+        xx = np.arange(301.)
+        dats = [survey_line(xx, np.zeros_like(xx) + y) for y in [0., 100., 200.]]
+        yy = np.arange(-50., 251.)
+        dats += [survey_line(np.zeros_like(yy) + x, yy, picknums=(1, 2)) for x in [50., 150.]]
+        dats.append(survey_line(xx, 20. * np.sin(xx * np.pi / 100.), picknums=(3,)))
+        dats.append(survey_line(xx + 1000., np.zeros_like(xx)))
+
+        out = picklib.get_crossovers(dats, cutoff=2.)
+        found = sorted(zip(out['line_a'], out['line_b'], out['trace_a'], out['trace_b']))
+        self.assertEqual(found[:6], [(0, 3, 50, 50), (0, 4, 150, 50), (0, 5, 0, 0),
+                                     (0, 5, 100, 100), (0, 5, 200, 200), (0, 5, 300, 300)])
+        self.assertEqual(found[6:], [(1, 3, 50, 150), (1, 4, 150, 150),
+                                     (2, 3, 50, 250), (2, 4, 150, 250), (3, 5, 70, 50),
+                                     (4, 5, 30, 150)])
+        self.assertTrue(np.all(out['dist'] < 2.))
+
+        # depths come from the picks, nan where the line lacks that pick
+        self.assertEqual(out['picknums'].tolist(), [1, 2, 3])
+        self.assertTrue(np.allclose(out['samp_a'][:, 0], 1000 + out['trace_a']))
+        self.assertTrue(np.all(np.isnan(out['samp_a'][:, 2])))
+        line_b = out['line_b'][:, None] == np.array([3, 4, 5])[None, :]
+        self.assertTrue(np.allclose(out['samp_b'][line_b[:, 2], 2], 3000 + out['trace_b'][line_b[:, 2]]))
+        self.assertTrue(np.allclose(out['samp_b'][line_b[:, 0], 1], 2000 + out['trace_b'][line_b[:, 0]]))
+        self.assertTrue(np.all(np.isnan(out['samp_b'][line_b[:, 2], :2])))
+
+        # agree with get_intersection for a single pair
+        tnums, sns = picklib.get_intersection(dats[0], dats[3], multiple_int=False)
+        self.assertEqual(tnums[0], 50)
+        self.assertEqual(sns[0], 1050)
+
+        # the locations are cached, but the picks are read fresh
+        fn_cache = os.path.join(THIS_DIR, 'input_data', 'crossovers.npz')
+        picklib.get_crossovers(dats, cutoff=2., cache_fn=fn_cache)
+        self.assertTrue(os.path.exists(fn_cache))
+        dats[0].picks.samp1[:] = 0.
+        cached = picklib.get_crossovers(dats, cutoff=2., cache_fn=fn_cache)
+        for name in ['line_a', 'line_b', 'trace_a', 'trace_b', 'dist']:
+            self.assertTrue(np.all(cached[name] == out[name]))
+        self.assertTrue(np.all(cached['samp_a'][cached['line_a'] == 0, 0] == 0.))
+
+        # a different cutoff needs a new search; this one is wide enough that
+        # the wiggly line never leaves the first, so they cross just once
+        wider = picklib.get_crossovers(dats, cutoff=21., cache_fn=fn_cache)
+        self.assertEqual(np.sum((wider['line_a'] == 0) & (wider['line_b'] == 5)), 1)
+        os.remove(fn_cache)
+
     def test_autopick(self):
         easy_pick_traces = np.zeros_like(traces)
         cpeak = 100
@@ -165,6 +275,90 @@ class TestPickLib(unittest.TestCase):
         with self.assertRaises(TypeError):
             picks = picklib.auto_pick(data, 101, 9)
 
+    def test_pick_matches_loop(self):
+        data, surf = wavy_data(300, 200)
+        for freq, pol in [(0.5, 1), (1.0, -1), (2.0, 1)]:
+            data.picks.pickparams.freq_update(freq)
+            data.picks.pickparams.pol = pol
+            for snum_start, snum_end in [(100, 120), (-9999, 150), (20, 280)]:
+                self.assertTrue(np.allclose(
+                    picklib.pick(data.data, snum_start, snum_end, data.picks.pickparams),
+                    pick_loop(data.data, snum_start, snum_end, data.picks.pickparams),
+                    equal_nan=True))
+
+            # windows that run off the top or bottom fail the same way
+            for snum_start, snum_end in [(1, 2), (298, 299)]:
+                with self.assertRaises(ValueError):
+                    pick_loop(data.data, snum_start, snum_end, data.picks.pickparams)
+                with self.assertRaises(ValueError):
+                    picklib.pick(data.data, snum_start, snum_end, data.picks.pickparams)
+
+        picks = picklib.packet_pick_traces(data.data, data.picks.pickparams,
+                                           [100, 150], tnums=[3, 7])
+        self.assertEqual(picks.shape, (5, 2))
+        self.assertTrue(np.allclose(picks[:, 1],
+                                    picklib.packet_pick(data.data[:, 7], data.picks.pickparams, 150),
+                                    equal_nan=True))
+
+        data.picks.pickparams.scst = 200
+        data.picks.pickparams.FWW = 200
+        with self.assertRaises(ValueError):
+            picklib.packet_pick_traces(data.data, data.picks.pickparams, np.ones((200, )) * 100)
+
+    def test_autopick_matches_loop(self):
+        data, surf = wavy_data(300, 400)
+        for freq, pol in [(0.5, 1), (1.0, -1), (2.0, 1)]:
+            data.picks.pickparams.freq_update(freq)
+            data.picks.pickparams.pol = pol
+            # start on, near, and between the reflectors
+            tnums = [0, 399, 150, 150]
+            snums = [int(surf[0]), int(surf[399]) + 100, int(surf[150]) + 4, int(surf[150]) + 50]
+            for snum, tnum in zip(snums, tnums):
+                try:
+                    picks_loop = auto_pick_loop(data, [snum], [tnum])
+                except ValueError:
+                    # we wandered off the edge of the data, and should do so again
+                    with self.assertRaises(ValueError):
+                        picklib.auto_pick(data, [snum], [tnum])
+                    continue
+                self.assertTrue(np.allclose(picklib.auto_pick(data, [snum], [tnum]),
+                                            picks_loop, equal_nan=True))
+
+        data.picks.pickparams.freq_update(0.5)
+        data.picks.pickparams.pol = 1
+        self.assertTrue(np.allclose(picklib.auto_pick(data, snums, tnums),
+                                    auto_pick_loop(data, snums, tnums),
+                                    equal_nan=True))
+
+    def test_autopick_parallel(self):
+        data, surf = wavy_data(300, 400)
+        data.picks.pickparams.freq_update(0.5)
+        tnums = [0, 399, 150]
+        snums = [int(surf[0]), int(surf[399]) + 100, int(surf[150])]
+        self.assertTrue(np.allclose(picklib.auto_pick(data, snums, tnums, workers=2),
+                                    picklib.auto_pick(data, snums, tnums),
+                                    equal_nan=True))
+
+        # errors in the workers get back to us
+        with self.assertRaises(ValueError):
+            picklib.auto_pick(data, [1, 1], [0, 0], workers=2)
+
+    @unittest.skipIf(os.environ.get('IMPDAR_BENCHMARK') is None, 'Set IMPDAR_BENCHMARK to run benchmarks')
+    def test_autopick_benchmark(self):
+        data, surf = wavy_data(1000, 30000)
+        data.picks.pickparams.freq_update(1.0)
+        tnums = np.random.randint(0, 30000, 20)
+        snums = surf[tnums].astype(int) + np.tile([0, 333], 10)
+
+        t0 = time.time()
+        picks = picklib.auto_pick(data, snums, tnums)
+        t1 = time.time()
+        picks_loop = auto_pick_loop(data, snums[:2], tnums[:2])
+        t2 = time.time()
+        self.assertTrue(np.allclose(picks[:2], picks_loop, equal_nan=True))
+        print('auto_pick 20 layers, 30000 traces: {:4.2f}s, trace by trace (extrapolated): {:4.2f}s'.format(
+            t1 - t0, (t2 - t1) * 10.))
+
 
 if __name__ == '__main__':
     unittest.main()
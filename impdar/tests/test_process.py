@@ -11,11 +11,16 @@ Test the machinery of process. This is broken up to match where it would likely
 """
 import sys
 import os
+import tempfile
+import tracemalloc
 import unittest
 import numpy as np
 from impdar.lib.NoInitRadarData import NoInitRadarData
 from impdar.lib.RadarData import RadarData
+from impdar.lib.RadarData._RadarDataSaving import H5
 from impdar.lib import process
+from impdar.lib.load.load_gssi import load_gssi
+from impdar.lib.ImpdarError import ImpdarError
 if sys.version_info[0] >= 3:
     from unittest.mock import MagicMock, patch
 else:
@@ -131,6 +136,27 @@ class TestProcess_and_exit(unittest.TestCase):
         self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'data_proc.mat')))
         self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'small_data_proc.mat')))
 
+    def test_process_and_exitEACHFILE(self):
+        with patch('impdar.lib.process.load', wraps=process.load) as load_patch:
+            process.process_and_exit([os.path.join(THIS_DIR, 'input_data', 'small_data.mat'), os.path.join(THIS_DIR, 'input_data', 'data_raw.mat')], rev=True)
+            self.assertEqual(load_patch.call_count, 2)
+        self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'input_data', 'small_data_proc.mat')))
+        self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'input_data', 'data_proc.mat')))
+
+    def test_process_and_exitJOBS(self):
+        process.process_and_exit([os.path.join(THIS_DIR, 'input_data', 'data_raw.mat'), os.path.join(THIS_DIR, 'input_data', 'small_data.mat')], rev=True, o=THIS_DIR, jobs=2)
+        self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'data_proc.mat')))
+        self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'small_data_proc.mat')))
+        os.remove(os.path.join(THIS_DIR, 'small_data_proc.mat'))
+
+        # A bad file should not stop the others
+        with self.assertRaises(ImpdarError):
+            process.process_and_exit([os.path.join(THIS_DIR, 'input_data', 'not_a_file.mat'), os.path.join(THIS_DIR, 'input_data', 'small_data.mat')], rev=True, o=THIS_DIR, jobs=2)
+        self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'small_data_proc.mat')))
+
+        with self.assertRaises(FileNotFoundError):
+            process.process_and_exit([os.path.join(THIS_DIR, 'input_data', 'data_raw.mat'), os.path.join(THIS_DIR, 'input_data', 'small_data.mat')], rev=True, o=os.path.join(THIS_DIR, 'not_a_dir'), jobs=2)
+
     def tearDown(self):
         if os.path.exists(os.path.join(THIS_DIR, 'small_data_cat.mat')):
             os.remove(os.path.join(THIS_DIR, 'small_data_cat.mat'))
@@ -250,5 +276,101 @@ class TestProcess(unittest.TestCase):
             os.remove(os.path.join(THIS_DIR, 'input_data', 'test_out.mat'))
 
 
+class TestProcessStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.fn = os.path.join(THIS_DIR, 'input_data', 'test_gssi_justdzt.DZT')
+
+    def _load(self):
+        dat = load_gssi(self.fn)
+        dat.data = dat.data.astype(float)
+        dat.trig = np.zeros((dat.tnum, ))
+        return dat
+
+    def test_matches_inmemory(self):
+        for kwargs in [{'vbp': (100., 400.)},
+                       {'restack': 3},
+                       {'hfilt': (5, 300)},
+                       {'ahfilt': 31},
+                       {'denoise': (3, 5)},
+                       {'crop': (10., 'top', 'snum')},
+                       {'vbp': (100., 400.), 'ahfilt': 21, 'restack': 5, 'denoise': (3, 3)}]:
+            dat = self._load()
+            process.process([dat], **kwargs)
+            dat_stream = self._load()
+            self.assertTrue(process.process_streaming(dat_stream, blocksize=50, **kwargs))
+            # Without out_fn, the result is read back into memory
+            self.assertNotIsInstance(dat_stream.data, np.memmap)
+            self.assertEqual(dat_stream.data.shape, dat.data.shape)
+            self.assertEqual(dat_stream.tnum, dat.tnum)
+            self.assertEqual(dat_stream.snum, dat.snum)
+            self.assertTrue(np.allclose(dat_stream.data, dat.data))
+            self.assertTrue(np.allclose(dat_stream.decday, dat.decday))
+            self.assertTrue(np.allclose(dat_stream.trace_num, dat.trace_num))
+
+    def test_mmap_input(self):
+        dat = load_gssi(self.fn, mmap=True)
+        dat_stream = load_gssi(self.fn, mmap=True)
+        dat.vertical_band_pass(100., 400.)
+        process.process_streaming(dat_stream, blocksize=100, vbp=(100., 400.))
+        self.assertTrue(np.allclose(dat_stream.data, dat.data))
+
+    def test_out_fn(self):
+        out_fn = os.path.join(THIS_DIR, 'input_data', 'test_stream.npy')
+        dat = self._load()
+        process.process_streaming(dat, out_fn=out_fn, blocksize=100, restack=3)
+        self.assertTrue(os.path.exists(out_fn))
+        self.assertIsInstance(dat.data, np.memmap)
+        self.assertTrue(np.all(np.load(out_fn) == dat.data))
+
+    def test_nothing(self):
+        dat = self._load()
+        self.assertFalse(process.process_streaming(dat))
+
+    def test_process_blocksize(self):
+        dat = self._load()
+        files = os.listdir(os.path.join(THIS_DIR, 'input_data'))
+        self.assertTrue(process.process([dat], blocksize=100, restack=3, vbp=(100., 400.)))
+        # No temporary files are left next to the input
+        self.assertEqual(sorted(os.listdir(os.path.join(THIS_DIR, 'input_data'))), sorted(files))
+        with self.assertRaises(ValueError):
+            process.process([dat], blocksize=100, rev=True)
+        with self.assertRaises(ValueError):
+            process.process_streaming(dat, blocksize=0, restack=3)
+
+    @unittest.skipIf(not H5, 'No h5py found')
+    def test_process_and_exit_blocksize(self):
+        dat = self._load()
+        dat.data_dtype = dat.data.dtype
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, 'stream_raw.h5')
+            dat.save_h5(fn, chunk_traces=20)
+            tracemalloc.start()
+            try:
+                process.process_and_exit([fn], blocksize=6, restack=3, vbp=(100., 400.))
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            # The profile was never all in memory, going in or coming out
+            self.assertLess(peak, dat.data.nbytes / 4)
+            self.assertEqual(sorted(os.listdir(tmpdir)), ['stream_proc.mat', 'stream_raw.h5'])
+
+            process.process([dat], restack=3, vbp=(100., 400.))
+            dat_stream = RadarData(os.path.join(tmpdir, 'stream_proc.mat'))
+            self.assertEqual(dat_stream.data.shape, dat.data.shape)
+            self.assertTrue(np.allclose(dat_stream.data, dat.data))
+            self.assertTrue(np.allclose(dat_stream.trace_num, dat.trace_num))
+
+    def test_failure_cleanup(self):
+        dat = self._load()
+        with self.assertRaises(ValueError):
+            process.process_streaming(dat, blocksize=100, vbp=(100., 400.), denoise=(3, 5), nmo=(10., 1.69e8))
+        self.assertEqual([fn for fn in os.listdir(os.path.join(THIS_DIR, 'input_data')) if fn.endswith('.npy')], [])
+
+    def tearDown(self):
+        if os.path.exists(os.path.join(THIS_DIR, 'input_data', 'test_stream.npy')):
+            os.remove(os.path.join(THIS_DIR, 'input_data', 'test_stream.npy'))
+
+
 if __name__ == '__main__':
     unittest.main()
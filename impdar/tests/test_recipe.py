@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2019 dlilien <dlilien90@gmail.com>
+#
+# Distributed under terms of the GNU GPL-3.0 license.
+
+"""
+Test processing recipes
+"""
+import os
+import json
+import unittest
+import numpy as np
+from impdar.lib.RadarData import RadarData
+from impdar.lib import recipe
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STEPS = [{'reverse': None},
+         {'restack': [3], 'save': True},
+         {'crop': {'lim': 5, 'top_or_bottom': 'top', 'dimension': 'snum'}}]
+
+
+class TestRecipe(unittest.TestCase):
+
+    def setUp(self):
+        self.fn = os.path.join(THIS_DIR, 'input_data', 'small_data.mat')
+
+    def test_parse(self):
+        steps = recipe.parse_recipe({'steps': STEPS + ['reverse']})
+        self.assertEqual(steps[0], ('reverse', None, False))
+        self.assertEqual(steps[1], ('restack', [3], True))
+        self.assertEqual(steps[3], ('reverse', None, False))
+
+        with self.assertRaises(ValueError):
+            recipe.parse_recipe({'not_steps': STEPS})
+        with self.assertRaises(ValueError):
+            recipe.parse_recipe('reverse')
+        with self.assertRaises(ValueError):
+            recipe.parse_recipe([{'save': True}])
+        with self.assertRaises(ValueError):
+            recipe.parse_recipe([{'reverse': None, 'restack': 3}])
+        with self.assertRaises(ValueError):
+            recipe.parse_recipe([{'save': None}])
+        with self.assertRaises(ValueError):
+            recipe.parse_recipe([3])
+
+    def test_load(self):
+        fn_json = os.path.join(THIS_DIR, 'input_data', 'test_recipe.json')
+        with open(fn_json, 'w') as fout:
+            json.dump({'steps': STEPS}, fout)
+        self.assertEqual(recipe.load_recipe(fn_json), recipe.parse_recipe(STEPS))
+
+        if recipe.YAML:
+            fn_yml = os.path.join(THIS_DIR, 'input_data', 'test_recipe.yml')
+            with open(fn_yml, 'w') as fout:
+                fout.write('steps:\n  - reverse\n  - restack: [3]\n    save: true\n'
+                           '  - crop: {lim: 5, top_or_bottom: top, dimension: snum}\n')
+            self.assertEqual(recipe.load_recipe(fn_yml), recipe.parse_recipe(STEPS))
+
+        with self.assertRaises(ValueError):
+            recipe.load_recipe(self.fn)
+
+    def test_apply(self):
+        dat = RadarData(self.fn)
+        dat.reverse()
+        dat.restack(3)
+        dat.crop(5, top_or_bottom='top', dimension='snum')
+
+        dat_recipe = RadarData(self.fn)
+        recipe.apply_recipe(dat_recipe, recipe.parse_recipe(STEPS))
+        self.assertTrue(np.allclose(dat_recipe.data, dat.data))
+        self.assertEqual(json.loads(dat_recipe.flags.recipe),
+                         [{'reverse': None}, {'restack': [3]},
+                          {'crop': {'lim': 5, 'top_or_bottom': 'top', 'dimension': 'snum'}}])
+
+        # We asked for output after the restack
+        fn_restack = os.path.join(THIS_DIR, 'input_data', 'small_data_restack.mat')
+        self.assertTrue(os.path.exists(fn_restack))
+        self.assertEqual(json.loads(RadarData(fn_restack).flags.recipe),
+                         [{'reverse': None}, {'restack': [3]}])
+
+        # The recipe should survive a save, and further steps add to it
+        fn_out = os.path.join(THIS_DIR, 'input_data', 'small_data_recipe.mat')
+        dat_recipe.save(fn_out)
+        dat_recipe = RadarData(fn_out)
+        recipe.apply_recipe(dat_recipe, recipe.parse_recipe(['reverse']))
+        self.assertEqual(len(json.loads(dat_recipe.flags.recipe)), 4)
+
+    @patch('impdar.lib.recipe.interpdeep')
+    def test_interp(self, interp_patch):
+        dat = RadarData(self.fn)
+        recipe.apply_recipe(dat, recipe.parse_recipe([{'interp': [1.0, 'gps.csv']}]))
+        interp_patch.assert_called_with([dat], 1.0, 'gps.csv')
+        recipe.apply_recipe(dat, recipe.parse_recipe([{'interp': {'spacing': 2.0, 'fn': 'gps.csv'}}]))
+        interp_patch.assert_called_with([dat], spacing=2.0, fn='gps.csv')
+
+    def test_save_names(self):
+        dat = RadarData(self.fn)
+        recipe.apply_recipe(dat, recipe.parse_recipe([{'reverse': None, 'save': True},
+                                                      {'restack': 3, 'save': 'stacked'}]))
+        # Each suffix is added to the original name, not to the previous save
+        self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'input_data', 'small_data_reverse.mat')))
+        self.assertTrue(os.path.exists(os.path.join(THIS_DIR, 'input_data', 'small_data_stacked.mat')))
+
+    def tearDown(self):
+        for fn in ['test_recipe.json', 'test_recipe.yml', 'small_data_restack.mat',
+                   'small_data_recipe.mat', 'small_data_reverse.mat', 'small_data_stacked.mat']:
+            if os.path.exists(os.path.join(THIS_DIR, 'input_data', fn)):
+                os.remove(os.path.join(THIS_DIR, 'input_data', fn))
+
+
+if __name__ == '__main__':
+    unittest.main()
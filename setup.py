@@ -9,6 +9,7 @@
 """Install ImpDAR, possibly with C sources."""
 import setuptools
 import socket
+import sys
 
 try:
     import numpy as np
@@ -22,6 +23,18 @@ if socket.gethostname() == 'hozideh':
 else:
     CYTHON = False
 
+# OpenMP for the Kirchhoff loop. Apple clang does not ship it by default,
+# so macOS gets the serial version
+if sys.platform == 'win32':
+    OMP_COMPILE_ARGS = ['/openmp']
+    OMP_LINK_ARGS = []
+elif sys.platform == 'darwin':
+    OMP_COMPILE_ARGS = []
+    OMP_LINK_ARGS = []
+else:
+    OMP_COMPILE_ARGS = ['-fopenmp']
+    OMP_LINK_ARGS = ['-fopenmp']
+
 
 if __name__ == '__main__':
     console_scripts = ['impdar=impdar.bin.impdarexec:main',
@@ -36,7 +49,9 @@ if __name__ == '__main__':
                              sources=["impdar/lib/migrationlib/_mig_cython"
                                       + ext,
                                       "impdar/lib/migrationlib/mig_cython.c"],
-                             include_dirs=[np.get_include()]),
+                             include_dirs=[np.get_include()],
+                             extra_compile_args=OMP_COMPILE_ARGS,
+                             extra_link_args=OMP_LINK_ARGS),
                    Extension("impdar.lib.ApresData.coherence",
                              sources=["impdar/lib/ApresData/_coherence"
                                       + ext,